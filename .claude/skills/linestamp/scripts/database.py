@@ -5,9 +5,13 @@ SQLiteを使用したセッション管理・品質管理・テンプレート
 """
 
 import sqlite3
+import hashlib
+import itertools
 import json
 import os
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
@@ -34,19 +38,77 @@ def ensure_database():
         print("[DB] seed_master_data.py が見つかりません。テーブルのみ作成しました。")
 
 
+# 接続ごとのプリペアドステートメントキャッシュ数
+# （SQL文字列が完全一致すればコンパイル済みステートメントを再利用する）
+STATEMENT_CACHE_SIZE = 128
+
+
+# 接続ごとのPRAGMA（接続単位の設定なので init_database ではなく接続時に毎回設定する）
+# WAL では synchronous=NORMAL でも破損せず、fsync はチェックポイント時だけになる
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
 def get_connection() -> sqlite3.Connection:
     """データベース接続を取得"""
     db_path = get_db_path()
-    conn = sqlite3.connect(str(db_path))
+    conn = sqlite3.connect(str(db_path), cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row  # 辞書形式でアクセス可能に
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
 
+@contextmanager
+def transaction():
+    """1接続・1トランザクションで複数の書き込みを行う
+
+    with ブロックが正常終了すれば commit、例外なら rollback する。
+    yield した接続は conn 引数を持つ関数に渡す（渡された側は commit/close しない）。
+    """
+    conn = get_connection()
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+# 一括投入時のPRAGMA（シードは冪等で再実行できるため耐久性を緩める）
+BULK_LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def tune_for_bulk_load(conn: sqlite3.Connection, fast: bool = False):
+    """書き込み中心の一括投入向けに接続をチューニング
+
+    fast=True では synchronous=OFF にする（開発用。クラッシュ時はDB破損の可能性あり）。
+    journal_mode=WAL 以外は接続単位の設定なので、接続を閉じれば元に戻る。
+    """
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+    if fast:
+        conn.execute("PRAGMA synchronous=OFF")
+
+
 def init_database():
     """データベースを初期化（テーブル作成）"""
     conn = get_connection()
     cursor = conn.cursor()
 
+    # WAL はDBファイルに保存される設定（コミットごとの fsync が減り、書き込み中も読み取れる）
+    cursor.execute("PRAGMA journal_mode=WAL")
+
     # セッション管理テーブル
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS sessions (
@@ -306,6 +368,7 @@ def init_database():
             avg_quality_score REAL,
             last_used DATETIME,
             source TEXT DEFAULT 'builtin',
+            content_hash TEXT,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             updated_at DATETIME
         )
@@ -331,6 +394,7 @@ def init_database():
             seasonal TEXT,
             usage_count INTEGER DEFAULT 0,
             source TEXT DEFAULT 'builtin',
+            content_hash TEXT,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         )
     """)
@@ -358,6 +422,7 @@ def init_database():
             success_rate REAL,
             avg_rating REAL,
             source TEXT DEFAULT 'builtin',
+            content_hash TEXT,
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
             updated_at DATETIME,
             FOREIGN KEY (text_id) REFERENCES text_master(id),
@@ -387,6 +452,13 @@ def init_database():
         )
     """)
 
+    # マスタに内容ハッシュ列を追加（マイグレーション）
+    for table in ("pose_master", "text_master", "reactions_master"):
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN content_hash TEXT")
+        except sqlite3.OperationalError:
+            pass
+
     # 生成ログ（学習用）
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS generation_logs (
@@ -415,11 +487,21 @@ def init_database():
         )
     """)
 
+    # シード投入済みファイルのハッシュ（未変更なら再投入をスキップ）
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS _seed_meta (
+            name TEXT PRIMARY KEY,
+            digest TEXT NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
     # インデックス作成
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions(created_at)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_reactions_session ON reactions(session_id)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_pose_name ON pose_dictionary(name)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pose_category ON pose_dictionary(category, name, success_count, failure_count)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompt_type ON prompt_results(prompt_type)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_templates_persona ON reaction_templates(persona_age, persona_target, persona_theme)")
 
@@ -449,7 +531,8 @@ def init_database():
 
 # ==================== セッション管理 ====================
 
-def create_session(
+def _session_params(
+    session_id: str,
     image_path: str,
     style: str = "sd_25",
     text_mode: str = "deka",
@@ -457,28 +540,72 @@ def create_session(
     persona_age: str = None,
     persona_target: str = None,
     persona_theme: str = None,
-    persona_intensity: int = 2
-) -> str:
-    """新規セッションを作成"""
-    session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    persona_intensity: int = 2,
+    output_root: str = None
+) -> tuple:
+    """セッション1件分のバインドパラメータを INSERT の列順で作成"""
+    output_dir = str(Path(output_root) / session_id / "output") if output_root else None
+    return (
+        session_id, image_path, style, text_mode, outline,
+        persona_age, persona_target, persona_theme, persona_intensity, output_dir
+    )
 
-    conn = get_connection()
-    cursor = conn.cursor()
 
-    cursor.execute("""
-        INSERT INTO sessions (
-            id, image_path, style, text_mode, outline,
-            persona_age, persona_target, persona_theme, persona_intensity
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
-        session_id, image_path, style, text_mode, outline,
-        persona_age, persona_target, persona_theme, persona_intensity
-    ))
+def create_sessions(configs: List[Dict], output_root: str = None) -> List[str]:
+    """セッションをまとめて作成（1トランザクションの executemany）
 
-    conn.commit()
-    conn.close()
+    configs の各要素は create_session と同じキーワード引数。
+    output_root を渡すと output_dir（<output_root>/<id>/output）も同じ INSERT で記録する。
+    IDは作成時刻で、2件目以降は連番を付ける。同じ秒に作成済みのIDは飛ばして重複を避ける。
+    """
+    base_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    with transaction() as conn:
+        # 同じ秒の create_session / create_sessions で使われたIDを除いて採番
+        # （GLOB の _ は通常の文字として一致する）
+        used = {
+            row[0] for row in conn.execute(
+                "SELECT id FROM sessions WHERE id = ? OR id GLOB ?", (base_id, f"{base_id}_*")
+            )
+        }
+        candidates = (base_id if i == 0 else f"{base_id}_{i:02d}" for i in itertools.count())
+        session_ids = list(itertools.islice((c for c in candidates if c not in used), len(configs)))
+
+        conn.executemany("""
+            INSERT INTO sessions (
+                id, image_path, style, text_mode, outline,
+                persona_age, persona_target, persona_theme, persona_intensity, output_dir
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [
+            _session_params(session_id, output_root=output_root, **config)
+            for session_id, config in zip(session_ids, configs)
+        ])
+
+    return session_ids
 
-    return session_id
+
+def create_session(
+    image_path: str,
+    style: str = "sd_25",
+    text_mode: str = "deka",
+    outline: str = "bold",
+    persona_age: str = None,
+    persona_target: str = None,
+    persona_theme: str = None,
+    persona_intensity: int = 2,
+    output_root: str = None
+) -> str:
+    """新規セッションを作成（output_root を渡すと output_dir も記録）"""
+    return create_sessions([{
+        "image_path": image_path,
+        "style": style,
+        "text_mode": text_mode,
+        "outline": outline,
+        "persona_age": persona_age,
+        "persona_target": persona_target,
+        "persona_theme": persona_theme,
+        "persona_intensity": persona_intensity,
+    }], output_root=output_root)[0]
 
 
 def get_session(session_id: str) -> Optional[Dict]:
@@ -497,7 +624,10 @@ def get_session(session_id: str) -> Optional[Dict]:
 
 
 def update_session(session_id: str, **kwargs):
-    """セッション情報を更新"""
+    """セッション情報を更新（渡された列を1回の UPDATE でまとめて更新）"""
+    if not kwargs:
+        return
+
     conn = get_connection()
     cursor = conn.cursor()
 
@@ -540,9 +670,14 @@ def get_latest_session() -> Optional[Dict]:
 
 # ==================== REACTIONS管理 ====================
 
-def save_reactions(session_id: str, reactions: List[Dict]):
-    """セッションのREACTIONSを保存"""
-    conn = get_connection()
+def save_reactions(session_id: str, reactions: List[Dict], conn=None):
+    """セッションのREACTIONSを保存
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     # 既存のREACTIONSを削除
@@ -561,8 +696,9 @@ def save_reactions(session_id: str, reactions: List[Dict]):
             json.dumps(r.get("item")) if r.get("item") else None
         ))
 
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
 
 
 def get_reactions(session_id: str) -> List[Dict]:
@@ -688,6 +824,19 @@ def get_pose(name: str) -> Optional[Dict]:
     return None
 
 
+def get_pose_prompts() -> Dict[str, Optional[str]]:
+    """ポーズ辞書の全ポーズを {名前: プロンプト（日本語優先、無ければ英語）} で取得"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT name, COALESCE(NULLIF(prompt_ja, ''), prompt_en) FROM pose_dictionary")
+    prompts = dict(cursor.fetchall())
+
+    conn.close()
+
+    return prompts
+
+
 def search_poses(keyword: str = None, category: str = None) -> List[Dict]:
     """ポーズを検索"""
     conn = get_connection()
@@ -718,6 +867,26 @@ def search_poses(keyword: str = None, category: str = None) -> List[Dict]:
     return [dict(row) for row in rows]
 
 
+def search_poses_summary(category: str = None) -> List[Dict]:
+    """ポーズ一覧用に name / category / 成功・失敗回数のみ取得（カバリングインデックス使用）"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    where_clause = "category = ?" if category else "1=1"
+    params = [category] if category else []
+
+    cursor.execute(f"""
+        SELECT name, category, success_count, failure_count FROM pose_dictionary
+        WHERE {where_clause}
+        ORDER BY (success_count * 1.0 / NULLIF(success_count + failure_count, 0)) DESC
+    """, params)
+
+    rows = cursor.fetchall()
+    conn.close()
+
+    return [dict(row) for row in rows]
+
+
 def update_pose_stats(name: str, success: bool):
     """ポーズの成功/失敗統計を更新"""
     conn = get_connection()
@@ -918,9 +1087,14 @@ def search_templates(
     return results
 
 
-def update_template_usage(template_id: int):
-    """テンプレート使用回数を更新"""
-    conn = get_connection()
+def update_template_usage(template_id: int, conn=None):
+    """テンプレート使用回数を更新
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -929,8 +1103,44 @@ def update_template_usage(template_id: int):
         WHERE id = ?
     """, (template_id,))
 
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def consume_template(template_id: int, conn=None) -> Optional[Dict]:
+    """テンプレートの使用回数を更新し、更新後のテンプレートを返す（存在しなければ None）
+
+    SQLite 3.35 以降は UPDATE ... RETURNING の1文で取得と更新を行う。
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+
+    update_sql = """
+        UPDATE reaction_templates
+        SET usage_count = usage_count + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        cursor.execute(update_sql + " RETURNING *", (template_id,))
+        row = cursor.fetchone()
+    else:
+        cursor.execute(update_sql, (template_id,))
+        cursor.execute("SELECT * FROM reaction_templates WHERE id = ?", (template_id,))
+        row = cursor.fetchone()
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+    if row:
+        result = dict(row)
+        result["reactions"] = json.loads(result["reactions_json"])
+        return result
+    return None
 
 
 def rate_template(template_id: int, rating: int):
@@ -1091,22 +1301,15 @@ def save_ranking_snapshot(
     snapshot_id = cursor.lastrowid
 
     # ランキング順位を保存
-    for rank, product_id in enumerate(product_ids, start=1):
-        cursor.execute(
-            """
-            INSERT INTO ranking_entries (snapshot_id, rank_position, product_id)
-            VALUES (?, ?, ?)
-            """,
-            (snapshot_id, rank, product_id)
-        )
-        # productsテーブルにも追加（存在しなければ）
-        cursor.execute(
-            """
-            INSERT OR IGNORE INTO products_meta (product_id, store_url)
-            VALUES (?, ?)
-            """,
-            (product_id, f"https://store.line.me/stickershop/product/{product_id}/ja")
-        )
+    cursor.executemany(
+        """
+        INSERT INTO ranking_entries (snapshot_id, rank_position, product_id)
+        VALUES (?, ?, ?)
+        """,
+        [(snapshot_id, rank, product_id) for rank, product_id in enumerate(product_ids, start=1)]
+    )
+    # productsテーブルにも追加（存在しなければ）
+    register_products(product_ids, conn=conn)
 
     conn.commit()
     conn.close()
@@ -1133,6 +1336,40 @@ def get_products_without_meta(limit: int = 50) -> List[int]:
     return [row["product_id"] for row in rows]
 
 
+_UPSERT_PRODUCT_META_SQL = """
+    INSERT INTO products_meta (
+        product_id, store_url, title, creator_id, creator_name,
+        description, price_amount, price_currency, sticker_type, sticker_count
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (product_id) DO UPDATE SET
+        title = excluded.title,
+        creator_id = excluded.creator_id,
+        creator_name = excluded.creator_name,
+        description = excluded.description,
+        price_amount = excluded.price_amount,
+        price_currency = excluded.price_currency,
+        sticker_type = excluded.sticker_type,
+        sticker_count = excluded.sticker_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _product_meta_params(
+    product_id: int,
+    store_url: str,
+    title: str = None,
+    creator_id: int = None,
+    creator_name: str = None,
+    description: str = None,
+    price_amount: int = None,
+    price_currency: str = "JPY",
+    sticker_type: str = None,
+    sticker_count: int = None
+) -> tuple:
+    return (product_id, store_url, title, creator_id, creator_name,
+            description, price_amount, price_currency, sticker_type, sticker_count)
+
+
 def upsert_product_meta(
     product_id: int,
     store_url: str,
@@ -1146,32 +1383,48 @@ def upsert_product_meta(
     sticker_count: int = None
 ):
     """商品メタデータをアップサート"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    upsert_product_meta_many([_product_meta_params(
+        product_id, store_url, title, creator_id, creator_name,
+        description, price_amount, price_currency, sticker_type, sticker_count,
+    )])
 
-    cursor.execute(
+
+def upsert_product_meta_many(rows: List, conn=None):
+    """商品メタデータを1トランザクションの executemany で一括アップサート
+
+    rows は upsert_product_meta と同じキーの dict か、同じ引数順のタプル。
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    params = _build_params(_product_meta_params, rows)
+    if not params:
+        return
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    conn.executemany(_UPSERT_PRODUCT_META_SQL, params)
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def register_products(product_ids: List[int], creator_id: int = None, conn=None):
+    """商品IDを products_meta に登録（既存の行は変更しない）
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    conn.executemany(
         """
-        INSERT INTO products_meta (
-            product_id, store_url, title, creator_id, creator_name,
-            description, price_amount, price_currency, sticker_type, sticker_count
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT (product_id) DO UPDATE SET
-            title = excluded.title,
-            creator_id = excluded.creator_id,
-            creator_name = excluded.creator_name,
-            description = excluded.description,
-            price_amount = excluded.price_amount,
-            price_currency = excluded.price_currency,
-            sticker_type = excluded.sticker_type,
-            sticker_count = excluded.sticker_count,
-            updated_at = CURRENT_TIMESTAMP
+        INSERT OR IGNORE INTO products_meta (product_id, store_url, creator_id)
+        VALUES (?, ?, ?)
         """,
-        (product_id, store_url, title, creator_id, creator_name,
-         description, price_amount, price_currency, sticker_type, sticker_count)
+        [(pid, f"https://store.line.me/stickershop/product/{pid}/ja", creator_id) for pid in product_ids]
     )
-
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
 
 
 def get_products_without_features(limit: int = 10) -> List[int]:
@@ -1195,6 +1448,16 @@ def get_products_without_features(limit: int = 10) -> List[int]:
     return [row["product_id"] for row in rows]
 
 
+def _sticker_features_params(
+    sticker_id: str,
+    product_id: int,
+    image_path: str = None,
+    features_json: dict = None
+) -> tuple:
+    features_str = _dumps_compact(features_json) if features_json else "{}"
+    return (sticker_id, product_id, image_path, features_str)
+
+
 def upsert_sticker_features(
     sticker_id: str,
     product_id: int,
@@ -1202,12 +1465,22 @@ def upsert_sticker_features(
     features_json: dict = None
 ):
     """スタンプ特徴をアップサート"""
-    conn = get_connection()
-    cursor = conn.cursor()
+    upsert_sticker_features_many([(sticker_id, product_id, image_path, features_json)])
 
-    features_str = json.dumps(features_json, ensure_ascii=False) if features_json else "{}"
 
-    cursor.execute(
+def upsert_sticker_features_many(rows: List, conn=None):
+    """スタンプ特徴を1トランザクションの executemany で一括アップサート
+
+    rows は upsert_sticker_features と同じキーの dict か、同じ引数順のタプル。
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    params = _build_params(_sticker_features_params, rows)
+    if not params:
+        return
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    conn.executemany(
         """
         INSERT INTO sticker_features (sticker_id, product_id, image_path, features_json)
         VALUES (?, ?, ?, ?)
@@ -1216,19 +1489,24 @@ def upsert_sticker_features(
             features_json = excluded.features_json,
             analyzed_at = CURRENT_TIMESTAMP
         """,
-        (sticker_id, product_id, image_path, features_str)
+        params
     )
+    if own_conn:
+        conn.commit()
+        conn.close()
 
-    conn.commit()
-    conn.close()
 
+def upsert_product_features(product_id: int, pack_features: dict, conn=None):
+    """商品特徴集約をアップサート
 
-def upsert_product_features(product_id: int, pack_features: dict):
-    """商品特徴集約をアップサート"""
-    conn = get_connection()
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
     cursor = conn.cursor()
 
-    features_str = json.dumps(pack_features, ensure_ascii=False)
+    features_str = _dumps_compact(pack_features)
 
     cursor.execute(
         """
@@ -1241,8 +1519,9 @@ def upsert_product_features(product_id: int, pack_features: dict):
         (product_id, features_str)
     )
 
-    conn.commit()
-    conn.close()
+    if own_conn:
+        conn.commit()
+        conn.close()
 
 
 def upsert_embedding(sticker_id: int, model_name: str, embedding: List[float]):
@@ -1414,7 +1693,162 @@ def get_latest_rankings(list_type: str = "top_creators", limit: int = 100) -> Li
 
 # ==================== v2.0 マスタ管理 ====================
 
-def upsert_pose_master(
+# マスタのリスト列・特徴JSONのJSON化は orjson（C実装）があれば使う
+try:
+    import orjson
+
+    def _dumps_compact(value) -> str:
+        return orjson.dumps(value).decode()
+except ImportError:
+    def _dumps_compact(value) -> str:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _with_content_hash(params: tuple) -> tuple:
+    """バインドパラメータの末尾に内容ハッシュを付ける"""
+    digest = hashlib.blake2b(_dumps_compact(params).encode(), digest_size=16).hexdigest()
+    return params + (digest,)
+
+
+def _json_or_none(value):
+    """リスト/辞書をJSON文字列に変換（空ならNone）"""
+    return _dumps_compact(value) if value else None
+
+
+# マスタ書き込みSQL（文字列を固定し、接続のステートメントキャッシュで再利用させる）
+# 内容ハッシュが同じ行は DO UPDATE の WHERE で弾き、ページ・インデックスを書き換えない
+_UPSERT_POSE_MASTER_SQL = """
+    INSERT INTO pose_master (
+        id, name, name_en, gesture, gesture_en, expression, expression_en,
+        vibe, prompt_full, category, tags, difficulty, body_parts,
+        requires_full_body, similar_poses, incompatible_with, hints, avoid, source, content_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name,
+        name_en = excluded.name_en,
+        gesture = excluded.gesture,
+        gesture_en = excluded.gesture_en,
+        expression = excluded.expression,
+        expression_en = excluded.expression_en,
+        vibe = excluded.vibe,
+        prompt_full = excluded.prompt_full,
+        category = excluded.category,
+        tags = excluded.tags,
+        difficulty = excluded.difficulty,
+        body_parts = excluded.body_parts,
+        requires_full_body = excluded.requires_full_body,
+        similar_poses = excluded.similar_poses,
+        incompatible_with = excluded.incompatible_with,
+        hints = excluded.hints,
+        avoid = excluded.avoid,
+        source = excluded.source,
+        content_hash = excluded.content_hash,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE excluded.content_hash IS NOT pose_master.content_hash
+"""
+
+_UPSERT_TEXT_MASTER_SQL = """
+    INSERT INTO text_master (
+        id, text, text_variants, reading, meaning, meaning_en,
+        category, usage, formality, persona_age, persona_target, persona_theme,
+        text_size, decoration, seasonal, source, content_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        text = excluded.text,
+        text_variants = excluded.text_variants,
+        reading = excluded.reading,
+        meaning = excluded.meaning,
+        meaning_en = excluded.meaning_en,
+        category = excluded.category,
+        usage = excluded.usage,
+        formality = excluded.formality,
+        persona_age = excluded.persona_age,
+        persona_target = excluded.persona_target,
+        persona_theme = excluded.persona_theme,
+        text_size = excluded.text_size,
+        decoration = excluded.decoration,
+        seasonal = excluded.seasonal,
+        source = excluded.source,
+        content_hash = excluded.content_hash
+    WHERE excluded.content_hash IS NOT text_master.content_hash
+"""
+
+_UPSERT_REACTIONS_MASTER_SQL = """
+    INSERT INTO reactions_master (
+        id, text_id, pose_id, emotion, emotion_en,
+        persona_age, persona_target, persona_theme, intensity_range,
+        slot_type, priority, is_essential, outfit, item_hint,
+        enhance_expression, incompatible_reactions, source, content_hash
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        text_id = excluded.text_id,
+        pose_id = excluded.pose_id,
+        emotion = excluded.emotion,
+        emotion_en = excluded.emotion_en,
+        persona_age = excluded.persona_age,
+        persona_target = excluded.persona_target,
+        persona_theme = excluded.persona_theme,
+        intensity_range = excluded.intensity_range,
+        slot_type = excluded.slot_type,
+        priority = excluded.priority,
+        is_essential = excluded.is_essential,
+        outfit = excluded.outfit,
+        item_hint = excluded.item_hint,
+        enhance_expression = excluded.enhance_expression,
+        incompatible_reactions = excluded.incompatible_reactions,
+        source = excluded.source,
+        content_hash = excluded.content_hash,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE excluded.content_hash IS NOT reactions_master.content_hash
+"""
+
+
+_DELETE_PERSONA_CONFIG_SQL = """
+    DELETE FROM persona_config
+    WHERE age = ? AND target = ? AND (theme = ? OR (theme IS NULL AND ? IS NULL)) AND intensity = ?
+"""
+
+_INSERT_PERSONA_CONFIG_SQL = """
+    INSERT INTO persona_config (
+        age, target, theme, intensity,
+        core_slots, theme_slots, reaction_slots,
+        recommended_formality, recommended_text_size, recommended_style,
+        essential_reactions, excluded_reactions, description, example_texts
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# 列指向（タプル）で渡すときの各マスタの列順（_*_params の引数順と一致）
+POSE_MASTER_FIELDS = (
+    "id", "name", "gesture", "name_en", "gesture_en", "expression", "expression_en",
+    "vibe", "category", "tags", "difficulty", "body_parts", "requires_full_body",
+    "similar_poses", "incompatible_with", "hints", "avoid", "source",
+)
+TEXT_MASTER_FIELDS = (
+    "id", "text", "text_variants", "reading", "meaning", "meaning_en", "category",
+    "usage", "formality", "persona_age", "persona_target", "persona_theme",
+    "text_size", "decoration", "seasonal", "source",
+)
+REACTIONS_MASTER_FIELDS = (
+    "id", "text_id", "pose_id", "emotion", "emotion_en", "persona_age",
+    "persona_target", "persona_theme", "intensity_range", "slot_type", "priority",
+    "is_essential", "outfit", "item_hint", "enhance_expression",
+    "incompatible_reactions", "source",
+)
+PERSONA_CONFIG_FIELDS = (
+    "age", "target", "theme", "intensity", "core_slots", "theme_slots",
+    "reaction_slots", "recommended_formality", "recommended_text_size",
+    "recommended_style", "essential_reactions", "excluded_reactions",
+    "description", "example_texts",
+)
+
+
+def _build_params(build, rows) -> List[tuple]:
+    """行をバインドパラメータに変換（dict はキーワード、タプル/リストは *_FIELDS 順の位置引数）"""
+    return [build(**row) if isinstance(row, dict) else build(*row) for row in rows]
+
+
+def _pose_master_params(
     id: str,
     name: str,
     gesture: str,
@@ -1433,64 +1867,34 @@ def upsert_pose_master(
     hints: list = None,
     avoid: list = None,
     source: str = "builtin"
-):
-    """ポーズマスタをアップサート"""
-    conn = get_connection()
-    cursor = conn.cursor()
+) -> tuple:
+    """ポーズマスタの1行分のバインドパラメータを INSERT の列順で作成（リスト列はここで1回だけJSON化）
 
+    末尾に content_hash を付ける。
+    """
     # プロンプトを自動生成
     prompt_parts = [gesture]
     if expression:
         prompt_parts.append(expression)
     if vibe:
         prompt_parts.append(f"（{vibe}）")
-    prompt_full = "\n".join(prompt_parts)
 
-    cursor.execute("""
-        INSERT INTO pose_master (
-            id, name, name_en, gesture, gesture_en, expression, expression_en,
-            vibe, prompt_full, category, tags, difficulty, body_parts,
-            requires_full_body, similar_poses, incompatible_with, hints, avoid, source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT (id) DO UPDATE SET
-            name = excluded.name,
-            name_en = excluded.name_en,
-            gesture = excluded.gesture,
-            gesture_en = excluded.gesture_en,
-            expression = excluded.expression,
-            expression_en = excluded.expression_en,
-            vibe = excluded.vibe,
-            prompt_full = excluded.prompt_full,
-            category = excluded.category,
-            tags = excluded.tags,
-            difficulty = excluded.difficulty,
-            body_parts = excluded.body_parts,
-            requires_full_body = excluded.requires_full_body,
-            similar_poses = excluded.similar_poses,
-            incompatible_with = excluded.incompatible_with,
-            hints = excluded.hints,
-            avoid = excluded.avoid,
-            source = excluded.source,
-            updated_at = CURRENT_TIMESTAMP
-    """, (
+    return _with_content_hash((
         id, name, name_en, gesture, gesture_en, expression, expression_en,
-        vibe, prompt_full, category,
-        json.dumps(tags, ensure_ascii=False) if tags else None,
+        vibe, "\n".join(prompt_parts), category,
+        _json_or_none(tags),
         difficulty,
-        json.dumps(body_parts, ensure_ascii=False) if body_parts else None,
+        _json_or_none(body_parts),
         requires_full_body,
-        json.dumps(similar_poses, ensure_ascii=False) if similar_poses else None,
-        json.dumps(incompatible_with, ensure_ascii=False) if incompatible_with else None,
-        json.dumps(hints, ensure_ascii=False) if hints else None,
-        json.dumps(avoid, ensure_ascii=False) if avoid else None,
-        source
+        _json_or_none(similar_poses),
+        _json_or_none(incompatible_with),
+        _json_or_none(hints),
+        _json_or_none(avoid),
+        source,
     ))
 
-    conn.commit()
-    conn.close()
 
-
-def upsert_text_master(
+def _text_master_params(
     id: str,
     text: str,
     text_variants: list = None,
@@ -1507,53 +1911,25 @@ def upsert_text_master(
     decoration: dict = None,
     seasonal: list = None,
     source: str = "builtin"
-):
-    """セリフマスタをアップサート"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO text_master (
-            id, text, text_variants, reading, meaning, meaning_en,
-            category, usage, formality, persona_age, persona_target, persona_theme,
-            text_size, decoration, seasonal, source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT (id) DO UPDATE SET
-            text = excluded.text,
-            text_variants = excluded.text_variants,
-            reading = excluded.reading,
-            meaning = excluded.meaning,
-            meaning_en = excluded.meaning_en,
-            category = excluded.category,
-            usage = excluded.usage,
-            formality = excluded.formality,
-            persona_age = excluded.persona_age,
-            persona_target = excluded.persona_target,
-            persona_theme = excluded.persona_theme,
-            text_size = excluded.text_size,
-            decoration = excluded.decoration,
-            seasonal = excluded.seasonal,
-            source = excluded.source
-    """, (
+) -> tuple:
+    """セリフマスタの1行分のバインドパラメータを INSERT の列順で作成"""
+    return _with_content_hash((
         id, text,
-        json.dumps(text_variants, ensure_ascii=False) if text_variants else None,
+        _json_or_none(text_variants),
         reading, meaning, meaning_en, category,
-        json.dumps(usage, ensure_ascii=False) if usage else None,
+        _json_or_none(usage),
         formality,
-        json.dumps(persona_age, ensure_ascii=False) if persona_age else None,
-        json.dumps(persona_target, ensure_ascii=False) if persona_target else None,
-        json.dumps(persona_theme, ensure_ascii=False) if persona_theme else None,
+        _json_or_none(persona_age),
+        _json_or_none(persona_target),
+        _json_or_none(persona_theme),
         text_size,
-        json.dumps(decoration, ensure_ascii=False) if decoration else None,
-        json.dumps(seasonal, ensure_ascii=False) if seasonal else None,
-        source
+        _json_or_none(decoration),
+        _json_or_none(seasonal),
+        source,
     ))
 
-    conn.commit()
-    conn.close()
-
 
-def upsert_reactions_master(
+def _reactions_master_params(
     id: str,
     text_id: str,
     pose_id: str,
@@ -1571,50 +1947,100 @@ def upsert_reactions_master(
     enhance_expression: bool = True,
     incompatible_reactions: list = None,
     source: str = "builtin"
-):
-    """リアクションマスタをアップサート"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO reactions_master (
-            id, text_id, pose_id, emotion, emotion_en,
-            persona_age, persona_target, persona_theme, intensity_range,
-            slot_type, priority, is_essential, outfit, item_hint,
-            enhance_expression, incompatible_reactions, source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT (id) DO UPDATE SET
-            text_id = excluded.text_id,
-            pose_id = excluded.pose_id,
-            emotion = excluded.emotion,
-            emotion_en = excluded.emotion_en,
-            persona_age = excluded.persona_age,
-            persona_target = excluded.persona_target,
-            persona_theme = excluded.persona_theme,
-            intensity_range = excluded.intensity_range,
-            slot_type = excluded.slot_type,
-            priority = excluded.priority,
-            is_essential = excluded.is_essential,
-            outfit = excluded.outfit,
-            item_hint = excluded.item_hint,
-            enhance_expression = excluded.enhance_expression,
-            incompatible_reactions = excluded.incompatible_reactions,
-            source = excluded.source,
-            updated_at = CURRENT_TIMESTAMP
-    """, (
+) -> tuple:
+    """リアクションマスタの1行分のバインドパラメータを INSERT の列順で作成"""
+    return _with_content_hash((
         id, text_id, pose_id, emotion, emotion_en,
-        json.dumps(persona_age, ensure_ascii=False) if persona_age else None,
-        json.dumps(persona_target, ensure_ascii=False) if persona_target else None,
-        json.dumps(persona_theme, ensure_ascii=False) if persona_theme else None,
-        json.dumps(intensity_range, ensure_ascii=False) if intensity_range else None,
+        _json_or_none(persona_age),
+        _json_or_none(persona_target),
+        _json_or_none(persona_theme),
+        _json_or_none(intensity_range),
         slot_type, priority, is_essential, outfit, item_hint,
         enhance_expression,
-        json.dumps(incompatible_reactions, ensure_ascii=False) if incompatible_reactions else None,
-        source
+        _json_or_none(incompatible_reactions),
+        source,
     ))
 
-    conn.commit()
-    conn.close()
+
+# 1ステートメントあたりのバインド変数上限（古いSQLiteの既定値 999 に合わせる）
+SQLITE_MAX_VARIABLES = 999
+
+
+@lru_cache(maxsize=64)
+def _multirow_sql(sql: str, rows: int) -> str:
+    """1行分の INSERT ... VALUES (?, ...) を rows 行分の VALUES に展開"""
+    head, tail = sql.split(") VALUES (", 1)
+    placeholders, rest = tail.split(")", 1)
+    group = f"({placeholders})"
+    return f"{head}) VALUES {', '.join([group] * rows)}{rest}"
+
+
+def _upsert_rows(sql: str, params: List[tuple], conn=None):
+    """アップサートを複数行VALUESで一括実行（conn指定時はcommit/closeしない）
+
+    バインド変数の上限に収まる行数ごとに1ステートメントにまとめる。
+    """
+    # マスタが変わるのでペルソナ別リアクションのインデックスを破棄
+    _persona_reaction_index.cache_clear()
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+
+    if len(params) == 1:
+        cursor.execute(sql, params[0])
+    elif params:
+        chunk_size = max(1, SQLITE_MAX_VARIABLES // len(params[0]))
+        for start in range(0, len(params), chunk_size):
+            chunk = params[start:start + chunk_size]
+            cursor.execute(_multirow_sql(sql, len(chunk)), [value for row in chunk for value in row])
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def upsert_pose_master(*, conn=None, **fields):
+    """ポーズマスタをアップサート（引数は _pose_master_params と同じ）
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    _upsert_rows(_UPSERT_POSE_MASTER_SQL, [_pose_master_params(**fields)], conn)
+
+
+def upsert_text_master(*, conn=None, **fields):
+    """セリフマスタをアップサート（引数は _text_master_params と同じ）
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    _upsert_rows(_UPSERT_TEXT_MASTER_SQL, [_text_master_params(**fields)], conn)
+
+
+def upsert_reactions_master(*, conn=None, **fields):
+    """リアクションマスタをアップサート（引数は _reactions_master_params と同じ）
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    _upsert_rows(_UPSERT_REACTIONS_MASTER_SQL, [_reactions_master_params(**fields)], conn)
+
+
+def bulk_upsert_pose_master(rows: List[Dict], conn=None):
+    """ポーズマスタを一括アップサート（複数行VALUESの1ステートメントで投入）
+
+    rows は dict か POSE_MASTER_FIELDS 順のタプル。
+    """
+    _upsert_rows(_UPSERT_POSE_MASTER_SQL, _build_params(_pose_master_params, rows), conn)
+
+
+def bulk_upsert_text_master(rows: List[Dict], conn=None):
+    """セリフマスタを一括アップサート（rows は dict か TEXT_MASTER_FIELDS 順のタプル）"""
+    _upsert_rows(_UPSERT_TEXT_MASTER_SQL, _build_params(_text_master_params, rows), conn)
+
+
+def bulk_upsert_reactions_master(rows: List[Dict], conn=None):
+    """リアクションマスタを一括アップサート（rows は dict か REACTIONS_MASTER_FIELDS 順のタプル）"""
+    _upsert_rows(_UPSERT_REACTIONS_MASTER_SQL, _build_params(_reactions_master_params, rows), conn)
 
 
 def get_pose_master(id: str) -> Optional[Dict]:
@@ -1665,27 +2091,28 @@ def get_reactions_master(id: str) -> Optional[Dict]:
     return None
 
 
-def select_reactions_for_persona(
-    age: str,
-    target: str,
-    theme: str = None,
-    intensity: int = 2,
-    limit: int = 24
-) -> List[Dict]:
-    """ペルソナに合ったリアクションを選択（ポーズ・セリフ詳細付き）"""
+# ペルソナ条件として使う reactions_master の列（intensity_range は数値のリスト）
+_PERSONA_INDEX_COLUMNS = ("persona_age", "persona_target", "persona_theme", "intensity_range")
+
+
+def _persona_index_key(value) -> str:
+    """LIKE と同じく ASCII の大文字小文字を区別しない比較キー"""
+    return str(value).lower()
+
+
+@lru_cache(maxsize=1)
+def _persona_reaction_index() -> tuple:
+    """ポーズ・セリフ詳細付きのリアクションと、ペルソナ条件ごとの転置インデックスを1回だけ読み込む
+
+    Returns:
+        (rows, indexes)
+        rows: 優先順（is_essential, priority の降順）に並べたリアクション
+        indexes: {列名: ({値: 行番号の集合}, 値がNULLの行番号の集合)}
+    マスタを書き換えたら _upsert_rows がキャッシュを破棄する。
+    """
     conn = get_connection()
     cursor = conn.cursor()
 
-    # ペルソナ設定を取得
-    cursor.execute("""
-        SELECT * FROM persona_config
-        WHERE age = ? AND target = ? AND (theme = ? OR theme IS NULL) AND intensity = ?
-        ORDER BY theme DESC NULLS LAST
-        LIMIT 1
-    """, (age, target, theme, intensity))
-    config = cursor.fetchone()
-
-    # リアクションを選択
     cursor.execute("""
         SELECT
             rm.*,
@@ -1694,22 +2121,13 @@ def select_reactions_for_persona(
         FROM reactions_master rm
         JOIN pose_master pm ON rm.pose_id = pm.id
         JOIN text_master tm ON rm.text_id = tm.id
-        WHERE (rm.persona_age LIKE ? OR rm.persona_age IS NULL)
-          AND (rm.persona_target LIKE ? OR rm.persona_target IS NULL)
-          AND (rm.persona_theme LIKE ? OR rm.persona_theme IS NULL OR ? IS NULL)
-          AND (rm.intensity_range LIKE ? OR rm.intensity_range IS NULL)
         ORDER BY rm.is_essential DESC, rm.priority DESC
-        LIMIT ?
-    """, (
-        f'%{age}%', f'%{target}%', f'%{theme}%' if theme else '%', theme,
-        f'%{intensity}%', limit
-    ))
-
-    rows = cursor.fetchall()
+    """)
+    fetched = cursor.fetchall()
     conn.close()
 
-    results = []
-    for row in rows:
+    rows = []
+    for row in fetched:
         data = dict(row)
         # JSONフィールドをパース
         for key in ['persona_age', 'persona_target', 'persona_theme', 'intensity_range',
@@ -1719,9 +2137,55 @@ def select_reactions_for_persona(
                     data[key] = json.loads(data[key])
                 except (json.JSONDecodeError, TypeError):
                     pass
-        results.append(data)
+        rows.append(data)
+
+    indexes = {}
+    for column in _PERSONA_INDEX_COLUMNS:
+        by_value, unrestricted = {}, set()
+        for pos, data in enumerate(rows):
+            values = data.get(column)
+            if values is None:
+                unrestricted.add(pos)
+                continue
+            for value in values if isinstance(values, list) else [values]:
+                by_value.setdefault(_persona_index_key(value), set()).add(pos)
+        indexes[column] = (by_value, frozenset(unrestricted))
+
+    return tuple(rows), indexes
+
+
+def _persona_matches(indexes: dict, column: str, needle) -> set:
+    """列の値に needle を含む行（LIKE '%needle%' 相当）とNULLの行の行番号"""
+    by_value, unrestricted = indexes[column]
+    key = _persona_index_key(needle)
+    matched = set(unrestricted)
+    for value, positions in by_value.items():
+        if key in value:
+            matched |= positions
+    return matched
 
-    return results
+
+def select_reactions_for_persona(
+    age: str,
+    target: str,
+    theme: str = None,
+    intensity: int = 2,
+    limit: int = 24
+) -> List[Dict]:
+    """ペルソナに合ったリアクションを選択（ポーズ・セリフ詳細付き）
+
+    行ごとの LIKE 走査ではなく、プロセス内の転置インデックスの積集合で絞り込む。
+    """
+    rows, indexes = _persona_reaction_index()
+
+    matched = (_persona_matches(indexes, "persona_age", age)
+               & _persona_matches(indexes, "persona_target", target)
+               & _persona_matches(indexes, "intensity_range", intensity))
+    if theme:
+        matched &= _persona_matches(indexes, "persona_theme", theme)
+
+    # rows は優先順に並んでいるので行番号順がそのまま結果の順序
+    return [dict(rows[pos]) for pos in sorted(matched)[:limit]]
 
 
 def list_pose_master(category: str = None) -> List[Dict]:
@@ -1763,7 +2227,38 @@ def list_text_master(category: str = None, formality: int = None) -> List[Dict]:
     return [dict(row) for row in rows]
 
 
-def upsert_persona_config(
+def _count_rows(table: str, conn=None) -> int:
+    """テーブルの行数を取得（JSON列のデコードなし）"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if own_conn:
+        conn.close()
+    return count
+
+
+def count_pose_master(conn=None) -> int:
+    """ポーズマスタの件数を取得"""
+    return _count_rows("pose_master", conn)
+
+
+def count_text_master(conn=None) -> int:
+    """セリフマスタの件数を取得"""
+    return _count_rows("text_master", conn)
+
+
+def count_reactions_master(conn=None) -> int:
+    """リアクションマスタの件数を取得"""
+    return _count_rows("reactions_master", conn)
+
+
+def count_persona_config(conn=None) -> int:
+    """ペルソナ設定の件数を取得"""
+    return _count_rows("persona_config", conn)
+
+
+def _persona_config_params(
     age: str,
     target: str,
     theme: str = None,
@@ -1778,36 +2273,48 @@ def upsert_persona_config(
     excluded_reactions: list = None,
     description: str = None,
     example_texts: list = None
-):
-    """ペルソナ設定をアップサート"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 既存レコードを削除してから挿入（UNIQUE制約対応）
-    cursor.execute("""
-        DELETE FROM persona_config
-        WHERE age = ? AND target = ? AND (theme = ? OR (theme IS NULL AND ? IS NULL)) AND intensity = ?
-    """, (age, target, theme, theme, intensity))
-
-    cursor.execute("""
-        INSERT INTO persona_config (
-            age, target, theme, intensity,
-            core_slots, theme_slots, reaction_slots,
-            recommended_formality, recommended_text_size, recommended_style,
-            essential_reactions, excluded_reactions, description, example_texts
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (
+) -> tuple:
+    """ペルソナ設定の1行分のバインドパラメータを INSERT の列順で作成"""
+    return (
         age, target, theme, intensity,
         core_slots, theme_slots, reaction_slots,
         recommended_formality, recommended_text_size, recommended_style,
-        json.dumps(essential_reactions, ensure_ascii=False) if essential_reactions else None,
-        json.dumps(excluded_reactions, ensure_ascii=False) if excluded_reactions else None,
+        _json_or_none(essential_reactions),
+        _json_or_none(excluded_reactions),
         description,
-        json.dumps(example_texts, ensure_ascii=False) if example_texts else None
-    ))
+        _json_or_none(example_texts)
+    )
 
-    conn.commit()
-    conn.close()
+
+def upsert_persona_config(*, conn=None, **fields):
+    """ペルソナ設定をアップサート（引数は _persona_config_params と同じ）
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    bulk_upsert_persona_config([fields], conn)
+
+
+def bulk_upsert_persona_config(rows: List[Dict], conn=None):
+    """ペルソナ設定を一括アップサート（該当キーをまとめて削除してから一括挿入）
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    # (age, target, theme, intensity) が重複する行は後勝ち（行ごとの DELETE→INSERT と同じ結果）
+    params = list({p[:4]: p for p in _build_params(_persona_config_params, rows)}.values())
+
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    cursor = conn.cursor()
+
+    # 既存レコードを削除してから挿入（UNIQUE制約対応）
+    cursor.executemany(_DELETE_PERSONA_CONFIG_SQL,
+                       [(age, target, theme, theme, intensity) for age, target, theme, intensity, *_ in params])
+    cursor.executemany(_INSERT_PERSONA_CONFIG_SQL, params)
+
+    if own_conn:
+        conn.commit()
+        conn.close()
 
 
 def list_persona_config(age: str = None, target: str = None) -> List[Dict]:
@@ -1871,6 +2378,61 @@ def get_persona_config(age: str, target: str, theme: str = None, intensity: int
     return None
 
 
+# ==================== シード管理 ====================
+
+def get_seed_digest(name: str, conn=None) -> Optional[str]:
+    """投入済みシードファイルのハッシュを取得"""
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    row = conn.execute("SELECT digest FROM _seed_meta WHERE name = ?", (name,)).fetchone()
+    if own_conn:
+        conn.close()
+    return row[0] if row else None
+
+
+def set_seed_digest(name: str, digest: str, conn=None):
+    """投入したシードファイルのハッシュを記録
+
+    conn を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    conn.execute("""
+        INSERT INTO _seed_meta (name, digest) VALUES (?, ?)
+        ON CONFLICT (name) DO UPDATE SET
+            digest = excluded.digest,
+            updated_at = CURRENT_TIMESTAMP
+    """, (name, digest))
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def drop_secondary_indexes(conn: sqlite3.Connection, tables) -> List[str]:
+    """一括投入前に非UNIQUEの二次インデックスを外し、再作成用のDDLを返す
+
+    主キー・UNIQUE（ON CONFLICT の判定に必要）は残す。
+    """
+    placeholders = ", ".join("?" * len(tables))
+    rows = conn.execute(f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND tbl_name IN ({placeholders})
+          AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'
+    """, tuple(tables)).fetchall()
+    for name, _ in rows:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    return [sql for _, sql in rows]
+
+
+def restore_indexes(conn: sqlite3.Connection, index_sql: List[str]):
+    """drop_secondary_indexes で外したインデックスを再作成"""
+    for sql in index_sql:
+        conn.execute(sql)
+    conn.commit()
+
+
 # ==================== 生成ログ ====================
 
 def record_generation_log(
@@ -13,6 +13,7 @@ import sys
 import yaml
 import zipfile
 from collections import Counter, deque
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
 
@@ -21,6 +22,7 @@ from google.genai import types
 from PIL import Image, ImageFilter
 from rembg import remove, new_session
 import io
+import numpy as np
 
 # ポーズマスタ参照
 try:
@@ -57,6 +59,13 @@ try:
 except ImportError:
     ONNX_AVAILABLE = False
 
+# 透過処理のピクセルループJIT化（オプション、無ければ numpy のベクトル演算）
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # グローバルセッション（初期化は遅延）
 _rembg_session = None
 _use_cuda = False
@@ -543,51 +552,14 @@ def get_reactions_from_db(
         return REACTIONS[:limit]
 
     try:
-        db_reactions = select_reactions_for_persona(
-            age=age,
-            target=target,
-            theme=theme,
-            intensity=intensity,
-            limit=limit
-        )
+        cached = _fetch_persona_reactions(age, target, theme, intensity, limit)
 
-        if not db_reactions:
+        if not cached:
             print("  DBから該当リアクションが見つからず、ハードコードREACTIONSを使用")
             return REACTIONS[:limit]
 
-        # DB結果をREACTIONS形式に変換
-        reactions = []
-        for r in db_reactions:
-            reaction = {
-                "id": r.get("id"),
-                "emotion": r.get("emotion", ""),
-                "text": r.get("text", ""),
-                "pose_locked": True,  # DBからの取得は常にロック
-                "_pose_id": r.get("pose_id"),  # 生成ログ用
-                "_text_id": r.get("text_id"),  # 生成ログ用
-            }
-
-            # ポーズ詳細を設定 (prompt_full優先)
-            if r.get("prompt_full"):
-                reaction["pose"] = r["prompt_full"]
-            elif r.get("gesture"):
-                parts = [r["gesture"]]
-                if r.get("expression"):
-                    parts.append(r["expression"])
-                if r.get("vibe"):
-                    parts.append(f"（{r['vibe']}）")
-                reaction["pose"] = "\n".join(parts)
-            else:
-                reaction["pose"] = r.get("pose_name", "")
-
-            # オプション項目
-            if r.get("outfit"):
-                reaction["outfit"] = r["outfit"]
-            if r.get("item_hint"):
-                reaction["item"] = {"type": r["item_hint"]}
-
-            reactions.append(reaction)
-
+        # キャッシュ共有のため呼び出し側にはコピーを返す
+        reactions = [dict(r) for r in cached]
         print(f"  DBから{len(reactions)}件のリアクションを取得 (persona: {age}/{target}/{theme})")
         return reactions
 
@@ -596,6 +568,57 @@ def get_reactions_from_db(
         return REACTIONS[:limit]
 
 
+@lru_cache(maxsize=256)
+def _fetch_persona_reactions(age: str, target: str, theme: str, intensity: int, limit: int) -> tuple:
+    """ペルソナ別のリアクションをDBから取得してREACTIONS形式に変換（プロセス内キャッシュ）
+
+    同じペルソナでの再取得はSQLを発行せずキャッシュから返す。
+    例外はキャッシュされないため、DBエラー時は次回呼び出しで再試行される。
+    """
+    db_reactions = select_reactions_for_persona(
+        age=age,
+        target=target,
+        theme=theme,
+        intensity=intensity,
+        limit=limit
+    )
+
+    # DB結果をREACTIONS形式に変換
+    reactions = []
+    for r in db_reactions:
+        reaction = {
+            "id": r.get("id"),
+            "emotion": r.get("emotion", ""),
+            "text": r.get("text", ""),
+            "pose_locked": True,  # DBからの取得は常にロック
+            "_pose_id": r.get("pose_id"),  # 生成ログ用
+            "_text_id": r.get("text_id"),  # 生成ログ用
+        }
+
+        # ポーズ詳細を設定 (prompt_full優先)
+        if r.get("prompt_full"):
+            reaction["pose"] = r["prompt_full"]
+        elif r.get("gesture"):
+            parts = [r["gesture"]]
+            if r.get("expression"):
+                parts.append(r["expression"])
+            if r.get("vibe"):
+                parts.append(f"（{r['vibe']}）")
+            reaction["pose"] = "\n".join(parts)
+        else:
+            reaction["pose"] = r.get("pose_name", "")
+
+        # オプション項目
+        if r.get("outfit"):
+            reaction["outfit"] = r["outfit"]
+        if r.get("item_hint"):
+            reaction["item"] = {"type": r["item_hint"]}
+
+        reactions.append(reaction)
+
+    return tuple(reactions)
+
+
 def load_reactions_from_file(file_path: str) -> list:
     """JSON/YAMLファイルからカスタムリアクションを読み込む
 
@@ -2395,38 +2418,42 @@ def _split_grid_with_layout(grid_img: Image.Image, rows: int, cols: int,
     return stamps
 
 
+def _first_cell_ratio(width: int, height: int, rows: int, cols: int, trim_border: int = 2) -> float:
+    """_split_grid_with_layout が切り出す先頭セルの縦横比（width/height）を境界から計算"""
+    x_bounds = _grid_bounds(width, cols)
+    y_bounds = _grid_bounds(height, rows)
+    return (x_bounds[1] - x_bounds[0] - 2 * trim_border) / (y_bounds[1] - y_bounds[0] - 2 * trim_border)
+
+
 def split_grid_image(grid_img: Image.Image, rows: int = 3, cols: int = 4,
                      clean_edges: bool = True) -> list:
     """グリッド画像を個別のスタンプに分割
 
-    両方のレイアウト（指定通り / 行列入れ替え）で分割を試行し、
-    セルのアスペクト比がスタンプ仕様（370×320 ≒ 1.156:1）に
-    近い方を採用する。
+    両方のレイアウト（指定通り / 行列入れ替え）のセル比率を分割境界から求め、
+    スタンプ仕様（370×320 ≒ 1.156:1）に近い方のレイアウトだけで分割する。
     """
     # スタンプの目標アスペクト比（width/height）
     TARGET_RATIO = 370.0 / 320.0  # ≒ 1.156
 
+    width, height = grid_img.size
+
     # レイアウト1: 指定通り (cols×rows)
-    stamps_normal = _split_grid_with_layout(grid_img, rows, cols, clean_edges)
-    cell_normal = stamps_normal[0]
-    ratio_normal = cell_normal.width / cell_normal.height
+    ratio_normal = _first_cell_ratio(width, height, rows, cols)
 
     # レイアウト2: 行列入れ替え (rows×cols)
     if rows != cols:
-        stamps_swapped = _split_grid_with_layout(grid_img, cols, rows, clean_edges)
-        cell_swapped = stamps_swapped[0]
-        ratio_swapped = cell_swapped.width / cell_swapped.height
+        ratio_swapped = _first_cell_ratio(width, height, cols, rows)
 
         diff_normal = abs(ratio_normal - TARGET_RATIO)
         diff_swapped = abs(ratio_swapped - TARGET_RATIO)
 
         if diff_swapped < diff_normal:
             print(f"  [レイアウト自動検出] セル比率 {ratio_normal:.2f}(指定) vs {ratio_swapped:.2f}(入替) → 入替採用 ({rows}cols×{cols}rows)")
-            return stamps_swapped
+            return _split_grid_with_layout(grid_img, cols, rows, clean_edges)
         else:
             print(f"  [レイアウト自動検出] セル比率 {ratio_normal:.2f}(指定) vs {ratio_swapped:.2f}(入替) → 指定採用 ({cols}cols×{rows}rows)")
 
-    return stamps_normal
+    return _split_grid_with_layout(grid_img, rows, cols, clean_edges)
 
 
 def center_character_in_cell(cell_img: Image.Image) -> Image.Image:
@@ -3455,6 +3482,26 @@ def _dominant_bg_from_band(img: Image.Image, config: dict) -> tuple:
     return (r, g, b)
 
 
+def _border_fill_color(img: Image.Image, config: dict = TRANSPARENCY_CONFIG_DEFAULT) -> tuple:
+    """RGB画像の境界帯で最も多い色を返す（不透明な余白の塗り色用）
+
+    _dominant_bg_from_band と同じ帯幅・量子化で最頻ビンを選び、
+    そのビンに属する実ピクセルの平均色を返す。
+    """
+    arr = np.asarray(img.convert("RGB"), dtype=np.int32)
+    h, w = arr.shape[:2]
+    band = max(1, min(int(min(w, h) * config["band_ratio"]), config["max_band"], min(w, h) // 2))
+    border = np.ones((h, w), dtype=bool)
+    border[band:h - band, band:w - band] = False
+    pixels = arr[border]
+    qstep = config["quantize_step"]
+    q = np.round(pixels / qstep).astype(np.int32)
+    keys = (q[:, 0] << 16) | (q[:, 1] << 8) | q[:, 2]
+    values, counts = np.unique(keys, return_counts=True)
+    mean = pixels[keys == values[np.argmax(counts)]].mean(axis=0)
+    return tuple(int(round(v)) for v in mean)
+
+
 def _build_opaque_mask(img: Image.Image) -> list:
     w, h = img.size
     pixels = img.load()
@@ -3505,12 +3552,13 @@ def _remove_bottom_green_line(img: Image.Image, qc: dict) -> Image.Image:
     pixels = img.load()
     w, h = img.size
     band = qc["bottom_band"]
+    green_min, green_gap = qc["green_min"], qc["green_gap"]
     for y in range(max(0, h - band), h):
         for x in range(w):
             r, g, b, a = pixels[x, y]
             if a == 0:
                 continue
-            if g >= qc["green_min"] and (g - max(r, b)) >= qc["green_gap"]:
+            if g >= green_min and (g - max(r, b)) >= green_gap:
                 pixels[x, y] = (r, g, b, 0)
     return img
 
@@ -3535,13 +3583,14 @@ def _degreen_white(img: Image.Image, qc: dict) -> Image.Image:
     img = img.copy()
     pixels = img.load()
     w, h = img.size
+    degreen_min, degreen_gap = qc["degreen_min"], qc["degreen_gap"]
     for y in range(h):
         for x in range(w):
             r, g, b, a = pixels[x, y]
             if a == 0:
                 continue
-            if r >= qc["degreen_min"] and g >= qc["degreen_min"] and b >= qc["degreen_min"]:
-                if g - max(r, b) >= qc["degreen_gap"]:
+            if r >= degreen_min and g >= degreen_min and b >= degreen_min:
+                if g - max(r, b) >= degreen_gap:
                     pixels[x, y] = (255, 255, 255, a)
     return img
 
@@ -3624,12 +3673,13 @@ def _remove_stray_top_white(img: Image.Image, qc: dict) -> Image.Image:
     pixels = img.load()
     w, h = img.size
     top = min(qc["top_strip"], h - 1)
+    white_min = qc["white_min"]
     for y in range(top):
         for x in range(w):
             r, g, b, a = pixels[x, y]
             if a == 0:
                 continue
-            if r < qc["white_min"] or g < qc["white_min"] or b < qc["white_min"]:
+            if r < white_min or g < white_min or b < white_min:
                 continue
             # 直下に不透明が無い場合は浮き白として除去
             has_below = False
@@ -3642,32 +3692,177 @@ def _remove_stray_top_white(img: Image.Image, qc: dict) -> Image.Image:
     return img
 
 
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True)
+    def _binarize_alpha_jit(arr, bg0, bg1, bg2, bg_tol, alpha_cut):
+        h, w = arr.shape[0], arr.shape[1]
+        for y in prange(h):
+            for x in range(w):
+                a = arr[y, x, 3]
+                if a == 0:
+                    continue
+                dist = (abs(np.int64(arr[y, x, 0]) - bg0) + abs(np.int64(arr[y, x, 1]) - bg1)
+                        + abs(np.int64(arr[y, x, 2]) - bg2))
+                if dist <= bg_tol or a <= alpha_cut:
+                    arr[y, x, 3] = 0
+                else:
+                    arr[y, x, 3] = 255
+
+    @njit(cache=True, parallel=True)
+    def _transparency_counts_jit(arr, bg0, bg1, bg2, bg_tol, bottom_start,
+                                 green_min, green_gap, fringe_min, fringe_gap, top, white_min):
+        h, w = arr.shape[0], arr.shape[1]
+        visible = 0
+        semi = 0
+        bg_remain = 0
+        bottom_green = 0
+        green_fringe = 0
+        stray_top_white = 0
+        for y in prange(h):
+            for x in range(w):
+                a = arr[y, x, 3]
+                if a == 0:
+                    continue
+                r = np.int64(arr[y, x, 0])
+                g = np.int64(arr[y, x, 1])
+                b = np.int64(arr[y, x, 2])
+                visible += 1
+                if a < 255:
+                    semi += 1
+                if abs(r - bg0) + abs(g - bg1) + abs(b - bg2) <= bg_tol:
+                    bg_remain += 1
+                gap = g - max(r, b)
+                if y >= bottom_start and g >= green_min and gap >= green_gap:
+                    bottom_green += 1
+                if g >= fringe_min and gap >= fringe_gap:
+                    green_fringe += 1
+                if y < top and r >= white_min and g >= white_min and b >= white_min:
+                    # 直下2px に不透明が無い白は浮き白
+                    if not ((y + 1 < h and arr[y + 1, x, 3] > 0) or (y + 2 < h and arr[y + 2, x, 3] > 0)):
+                        stray_top_white += 1
+        return visible, semi, bg_remain, bottom_green, green_fringe, stray_top_white
+
+
+def _binarize_alpha(arr: np.ndarray, bg: tuple, bg_tol: int, alpha_cut: int) -> None:
+    """背景色に近い画素を透過し、残りのアルファを二値化（arr: H×W×4 uint8 をその場で更新）"""
+    if NUMBA_AVAILABLE:
+        _binarize_alpha_jit(arr, int(bg[0]), int(bg[1]), int(bg[2]), int(bg_tol), int(alpha_cut))
+        return
+    alpha = arr[..., 3]
+    dist = np.abs(arr[..., :3].astype(np.int16) - np.array(bg[:3], dtype=np.int16)).sum(axis=2)
+    keep = (alpha > alpha_cut) & (dist > bg_tol)
+    arr[..., 3] = np.where(keep, 255, 0)
+
+
+def _transparency_counts(arr: np.ndarray, bg: tuple, qc: dict,
+                         fringe_green_min: int, fringe_green_gap: int) -> tuple:
+    """可視/半透明/背景残り/下端緑/緑フリンジ/上端の浮き白の画素数を返す（arr: H×W×4 uint8）
+
+    画素を読むQC項目はすべてこの1パスで数える（アウトライン白率だけは境界帯が必要なので別）。
+    """
+    if NUMBA_AVAILABLE:
+        h = arr.shape[0]
+        # 非連続配列だと別シグネチャで再コンパイルされるため C 連続にそろえる
+        return _transparency_counts_jit(
+            np.ascontiguousarray(arr), int(bg[0]), int(bg[1]), int(bg[2]),
+            int(qc["bg_tol"]), int(h - qc["bottom_band"]),
+            int(qc["green_min"]), int(qc["green_gap"]), int(fringe_green_min), int(fringe_green_gap),
+            int(min(qc["top_strip"], h - 1)), int(qc["white_min"]),
+        )
+    return _transparency_counts_stacked(arr[None], [bg], qc, fringe_green_min, fringe_green_gap)[0]
+
+
+def warmup_transparency_jit() -> None:
+    """透過処理・QCのJITカーネルを小さなダミー画像で事前にコンパイル/キャッシュ読込しておく
+
+    ワーカープロセスを起動する前に親で呼んでおけば、最初のセルがコンパイル時間を払わない。
+    numba が無い環境では何もしない。
+    """
+    if not NUMBA_AVAILABLE:
+        return
+    dummy = np.zeros((4, 4, 4), dtype=np.uint8)
+    _transparency_counts(dummy, (0, 255, 0), QUALITY_CONFIG_STRICT, 150, 30)
+    _binarize_alpha(dummy, (0, 255, 0), QUALITY_CONFIG_STRICT["bg_tol"], QUALITY_CONFIG_STRICT["alpha_cut"])
+
+
+def _transparency_counts_stacked(batch: np.ndarray, bgs: list, qc: dict,
+                                 fringe_green_min: int, fringe_green_gap: int) -> list:
+    """(N, H, W, 4) の画像群について _transparency_counts と同じ画素数を numpy で数える"""
+    h = batch.shape[1]
+    bottom_start = h - qc["bottom_band"]
+    top = min(qc["top_strip"], h - 1)
+    white_min = qc["white_min"]
+
+    alpha = batch[..., 3]
+    rgb = batch[..., :3].astype(np.int16)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    visible = alpha != 0
+    bg_rgb = np.array([bg[:3] for bg in bgs], dtype=np.int16)[:, None, None, :]
+    dist = np.abs(rgb - bg_rgb).sum(axis=3)
+    gap = g - np.maximum(r, b)
+    bottom_green = visible & (g >= qc["green_min"]) & (gap >= qc["green_gap"])
+    bottom_green[:, :max(0, bottom_start)] = False
+    green_fringe = visible & (g >= fringe_green_min) & (gap >= fringe_green_gap)
+
+    # 上端 top 行の白で、直下2px に不透明が無いもの
+    has_below = np.zeros(visible[:, :max(0, top)].shape, dtype=bool)
+    for dy in (1, 2):
+        n = max(0, min(top, h - dy))
+        has_below[:, :n] |= visible[:, dy:dy + n]
+    stray_top_white = (visible[:, :top] & (r[:, :top] >= white_min) & (g[:, :top] >= white_min)
+                       & (b[:, :top] >= white_min) & ~has_below)
+
+    per_image = zip(
+        visible.sum(axis=(1, 2)),
+        (visible & (alpha < 255)).sum(axis=(1, 2)),
+        (visible & (dist <= qc["bg_tol"])).sum(axis=(1, 2)),
+        bottom_green.sum(axis=(1, 2)),
+        green_fringe.sum(axis=(1, 2)),
+        stray_top_white.sum(axis=(1, 2)),
+    )
+    return [tuple(int(v) for v in values) for values in per_image]
+
+
+def _transparency_counts_batch(arrays: list, bgs: list, qc: dict,
+                               fringe_green_min: int, fringe_green_gap: int) -> list:
+    """_transparency_counts を複数画像に適用（同じサイズの画像は (N, H, W, 4) にまとめて1パスで数える）"""
+    if NUMBA_AVAILABLE:
+        return [_transparency_counts(arr, bg, qc, fringe_green_min, fringe_green_gap)
+                for arr, bg in zip(arrays, bgs)]
+
+    groups = {}
+    for i, arr in enumerate(arrays):
+        groups.setdefault(arr.shape, []).append(i)
+
+    counts = [None] * len(arrays)
+    for shape, indexes in groups.items():
+        batch = np.stack([arrays[i] for i in indexes])
+        stacked = _transparency_counts_stacked(
+            batch, [bgs[i] for i in indexes], qc, fringe_green_min, fringe_green_gap
+        )
+        for i, values in zip(indexes, stacked):
+            counts[i] = values
+    return counts
+
+
 def apply_strict_transparency(cell_img: Image.Image, config: dict = None, qc: dict = None) -> tuple:
     """厳格な透過処理を適用し、(img, bg_color) を返す"""
     if qc is None:
         qc = QUALITY_CONFIG_STRICT
     if config is None:
-        config = TRANSPARENCY_CONFIG_DEFAULT.copy()
+        config = TRANSPARENCY_CONFIG_DEFAULT
 
     img = cell_img.convert("RGBA")
     bg = _dominant_bg_from_band(img, config)
-    cfg = config.copy()
-    cfg["fixed_colors"] = [bg]
+    # 呼び出し側の設定は書き換えず、背景色だけ差し替えたコピーを1回作る
+    cfg = dict(config, fixed_colors=[bg])
 
     transparentize_image_background(img, cfg)
 
-    pixels = img.load()
-    w, h = img.size
-    for y in range(h):
-        for x in range(w):
-            r, g, b, a = pixels[x, y]
-            if a == 0:
-                continue
-            if abs(r - bg[0]) + abs(g - bg[1]) + abs(b - bg[2]) <= qc["bg_tol"]:
-                pixels[x, y] = (r, g, b, 0)
-                continue
-            # アルファ二値化
-            pixels[x, y] = (r, g, b, 255 if a > qc["alpha_cut"] else 0)
+    # 背景色の残りを透過 + アルファ二値化
+    arr = np.array(img)
+    _binarize_alpha(arr, bg, qc["bg_tol"], qc["alpha_cut"])
+    img = Image.fromarray(arr, "RGBA")
 
     try:
         img = clean_edge_lines(img)
@@ -3692,59 +3887,42 @@ def evaluate_transparency_quality(img: Image.Image, bg: tuple, qc: dict = None)
     if qc is None:
         qc = QUALITY_CONFIG_STRICT
 
-    pixels = img.load()
-    w, h = img.size
-    visible = 0
-    bg_remain = 0
-    semi = 0
-    bottom_green = 0
-    green_fringe = 0  # 緑フリンジピクセル数
-
     # 緑フリンジ検出の閾値（設定がなければデフォルト値を使用）
     fringe_green_min = qc.get("fringe_green_min", 150)
     fringe_green_gap = qc.get("fringe_green_gap", 30)
 
-    for y in range(h):
-        for x in range(w):
-            r, g, b, a = pixels[x, y]
-            if a == 0:
-                continue
-            visible += 1
-            if a < 255:
-                semi += 1
-            if abs(r - bg[0]) + abs(g - bg[1]) + abs(b - bg[2]) <= qc["bg_tol"]:
-                bg_remain += 1
-            # 下端の緑ライン（厳格な閾値）
-            if y >= h - qc["bottom_band"]:
-                if g >= qc["green_min"] and (g - max(r, b)) >= qc["green_gap"]:
-                    bottom_green += 1
-            # 緑フリンジ検出（画像全体、緩い閾値）
-            if g >= fringe_green_min and (g - max(r, b)) >= fringe_green_gap:
-                green_fringe += 1
+    # 下端の緑ラインは厳格な閾値、緑フリンジは画像全体を緩い閾値で数える
+    counts = _transparency_counts(np.asarray(img), bg, qc, fringe_green_min, fringe_green_gap)
+    return _transparency_quality_result(img, counts, qc)
+
+
+def evaluate_transparency_quality_batch(images: list, bgs: list, qc: dict = None) -> list:
+    """複数画像の品質テストをまとめて実行（画素数の集計は同サイズの画像ごとに1パス）
+
+    結果は images と同じ順で、各要素は evaluate_transparency_quality と同じ辞書。
+    """
+    if qc is None:
+        qc = QUALITY_CONFIG_STRICT
+
+    counts = _transparency_counts_batch(
+        [np.asarray(img) for img in images], bgs, qc,
+        qc.get("fringe_green_min", 150), qc.get("fringe_green_gap", 30),
+    )
+    return [_transparency_quality_result(img, c, qc) for img, c in zip(images, counts)]
+
+
+def _transparency_quality_result(img: Image.Image, counts: tuple, qc: dict) -> dict:
+    """画素数の集計結果と上端・アウトラインの検査から判定結果を組み立てる"""
+    pixels = img.load()
+    w, h = img.size
+    visible, semi, bg_remain, bottom_green, green_fringe, stray_top_white = counts
 
     bg_remain_pct = (bg_remain / visible * 100) if visible else 0
     semi_pct = (semi / (w * h) * 100) if (w * h) else 0
     bottom_green_pct = (bottom_green / (qc["bottom_band"] * w) * 100) if w else 0
 
-    # 上端の浮き白ライン
-    top = min(qc["top_strip"], h - 1)
-    stray_top_white = 0
-    for y in range(top):
-        for x in range(w):
-            r, g, b, a = pixels[x, y]
-            if a == 0:
-                continue
-            if r < qc["white_min"] or g < qc["white_min"] or b < qc["white_min"]:
-                continue
-            has_below = False
-            for dy in (1, 2):
-                if y + dy < h and pixels[x, y + dy][3] > 0:
-                    has_below = True
-                    break
-            if not has_below:
-                stray_top_white += 1
-
-    # アウトライン白率
+    # アウトライン白率（閾値はループ外で1回だけ取り出す）
+    white_min = qc["white_min"]
     mask = _build_opaque_mask(img)
     band = _boundary_band(mask, qc["outline_thickness"])
     band_total = 0
@@ -3757,7 +3935,7 @@ def evaluate_transparency_quality(img: Image.Image, bg: tuple, qc: dict = None)
             if a == 0:
                 continue
             band_total += 1
-            if r >= qc["white_min"] and g >= qc["white_min"] and b >= qc["white_min"]:
+            if r >= white_min and g >= white_min and b >= white_min:
                 band_white += 1
     outline_white_pct = (band_white / band_total * 100) if band_total else 100.0
 
@@ -4620,30 +4798,45 @@ def regenerate_grid_from_prompts(client, output_dir: str, grid_num: int = 2,
     }
 
 
-def process_image(image_data: bytes, size: tuple = STAMP_SIZE, remove_bg: bool = True) -> Image.Image:
-    """画像をLINEスタンプ仕様に処理"""
+def process_image(image_data: bytes, size: tuple = STAMP_SIZE, remove_bg: bool = True,
+                  pil_mode: str = "RGBA") -> Image.Image:
+    """画像をLINEスタンプ仕様に処理
+
+    Args:
+        pil_mode: "RGBA"（透過対応） / "RGB"（透過不要時。アルファ処理とrembgを省略）。
+            "RGB"では出力もRGBになり、余白は透過ではなく境界帯の背景色で不透明に塗る
+    """
 
     # バイトデータから画像を読み込み
     img = Image.open(io.BytesIO(image_data))
 
-    # RGBAに変換（透過対応）
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
+    if pil_mode == "RGB":
+        # 透過不要: RGBのまま処理してアルファチャンネル分の転送を省く
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+    else:
+        # RGBAに変換（透過対応）
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
 
-    # 背景除去
-    if remove_bg:
-        img = remove_background(img)
+        # 背景除去
+        if remove_bg:
+            img = remove_background(img)
 
     # アスペクト比を維持してリサイズ
     img.thumbnail(size, Image.Resampling.LANCZOS)
 
-    # 中央配置用の新しい画像を作成（透過背景）
-    new_img = Image.new("RGBA", size, (0, 0, 0, 0))
-
-    # 中央に配置
+    # 中央配置用の新しい画像を作成
     x = (size[0] - img.width) // 2
     y = (size[1] - img.height) // 2
-    new_img.paste(img, (x, y), img)
+    if pil_mode == "RGB":
+        # 透過できないので、境界帯の最頻色で余白を埋める（隅1点だと被写体やグラデーションを拾う）
+        new_img = Image.new("RGB", size, _border_fill_color(img))
+        new_img.paste(img, (x, y))
+    else:
+        # 透過背景
+        new_img = Image.new("RGBA", size, (0, 0, 0, 0))
+        new_img.paste(img, (x, y), img)
 
     return new_img
 
@@ -4724,7 +4917,7 @@ def main():
                         help="生成枚数（--promptモード時）")
     parser.add_argument("--project", help="Google Cloud プロジェクトID")
     parser.add_argument("--no-remove-bg", action="store_true",
-                        help="背景除去をスキップ")
+                        help="背景除去をスキップ（出力はRGB。余白は透過せず背景色で塗る）")
     parser.add_argument("--no-items", action="store_true",
                         help="アイテム検出をスキップ（デフォルトは写真からアイテムを自動検出）")
     # モディファイアオプション
@@ -4982,13 +5175,15 @@ def main():
         "tab": TAB_SIZE
     }
     size = sizes[args.type]
+    # 背景除去しない場合は透過不要なのでRGBのまま処理
+    pil_mode = "RGBA" if remove_bg else "RGB"
 
     for i in range(args.count):
         print(f"生成中... ({i + 1}/{args.count})")
 
         try:
             image_data = generate_image(client, args.prompt, transparent_bg=remove_bg)
-            img = process_image(image_data, size, remove_bg=remove_bg)
+            img = process_image(image_data, size, remove_bg=remove_bg, pil_mode=pil_mode)
 
             if args.output:
                 if args.count > 1:
@@ -15,11 +15,17 @@ import sys
 import tempfile
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Callable, Literal
 
 import httpx
 
+try:
+    from .vertex_client import get_client
+except ImportError:
+    from vertex_client import get_client
+
 # 利用可能なモデルタイプ
 AnalyzerType = Literal["claude", "gemini"]
 
@@ -28,6 +34,16 @@ GEMINI_MODEL = "gemini-2.0-flash"
 CLAUDE_MODEL = "claude-sonnet-4-20250514"
 
 
+# 拡張子 → MIMEタイプ
+MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
 def log(msg: str) -> None:
     print(msg, file=sys.stderr, flush=True)
 
@@ -149,6 +165,23 @@ class BaseAnalyzer(ABC):
         """画像ファイルを分析"""
         pass
 
+    def analyze_image_bytes(
+        self,
+        image_data: bytes,
+        mime_type: str = "image/png",
+        timeout_sec: float = 60.0,
+    ) -> ImageAnalysisResult:
+        """メモリ上の画像データを分析（デフォルトは一時ファイル経由）"""
+        suffix = next((s for s, m in MIME_TYPES.items() if m == mime_type), ".png")
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(image_data)
+            temp_path = Path(f.name)
+
+        try:
+            return self.analyze_image(temp_path, timeout_sec)
+        finally:
+            temp_path.unlink(missing_ok=True)
+
     def analyze_image_from_url(
         self,
         image_url: str,
@@ -160,18 +193,8 @@ class BaseAnalyzer(ABC):
             r = client.get(image_url, timeout=timeout_sec)
             r.raise_for_status()
 
-            suffix = ".png"
-            if ".gif" in image_url.lower():
-                suffix = ".gif"
-
-            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
-                f.write(r.content)
-                temp_path = Path(f.name)
-
-            try:
-                return self.analyze_image(temp_path, timeout_sec)
-            finally:
-                temp_path.unlink(missing_ok=True)
+            mime_type = "image/gif" if ".gif" in image_url.lower() else "image/png"
+            return self.analyze_image_bytes(r.content, mime_type, timeout_sec)
 
         except Exception as e:
             log(f"  [error] Failed to fetch image: {e}")
@@ -197,20 +220,70 @@ class ClaudeAnalyzer(BaseAnalyzer):
             log(f"  [error] Image not found: {image_path}")
             return ImageAnalysisResult(analyzer=self.name)
 
-        try:
-            # Claude CLI を呼び出し
-            # claude -p "プロンプト" --model MODEL --output-format text 画像パス
-            cmd = [
-                "claude",
-                "-p", ANALYSIS_PROMPT,
-                "--model", CLAUDE_MODEL,
-                "--output-format", "text",
-                "--allowedTools", "",  # ツール無効化
-                str(image_path),
-            ]
+        # claude -p "プロンプト" --model MODEL --output-format text 画像パス
+        cmd = [
+            "claude",
+            "-p", ANALYSIS_PROMPT,
+            "--model", CLAUDE_MODEL,
+            "--output-format", "text",
+            "--allowedTools", "",  # ツール無効化
+            str(image_path),
+        ]
+        return self._run_cli(cmd, str.strip, timeout_sec)
+
+    def analyze_image_bytes(
+        self,
+        image_data: bytes,
+        mime_type: str = "image/png",
+        timeout_sec: float = 60.0,
+    ) -> ImageAnalysisResult:
+        """画像データを stream-json で stdin に渡して分析（一時ファイル不要）"""
+        message = {
+            "type": "user",
+            "message": {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": mime_type,
+                            "data": base64.b64encode(image_data).decode("ascii"),
+                        },
+                    },
+                    {"type": "text", "text": ANALYSIS_PROMPT},
+                ],
+            },
+        }
 
+        # claude -p --input-format stream-json --output-format stream-json --verbose
+        cmd = [
+            "claude",
+            "-p",
+            "--model", CLAUDE_MODEL,
+            "--input-format", "stream-json",
+            "--output-format", "stream-json",
+            "--verbose",
+            "--allowedTools", "",  # ツール無効化
+        ]
+        return self._run_cli(
+            cmd, _stream_json_result_text, timeout_sec,
+            input_text=json.dumps(message, ensure_ascii=False) + "\n",
+        )
+
+    def _run_cli(
+        self,
+        cmd: list[str],
+        extract_text: Callable[[str], str],
+        timeout_sec: float,
+        input_text: str | None = None,
+    ) -> ImageAnalysisResult:
+        """Claude CLI を実行し、extract_text で標準出力から取り出した応答を結果に変換"""
+        raw_text = ""
+        try:
             result = subprocess.run(
                 cmd,
+                input=input_text,
                 capture_output=True,
                 text=True,
                 timeout=timeout_sec,
@@ -221,16 +294,16 @@ class ClaudeAnalyzer(BaseAnalyzer):
                 log(f"  [error] Claude CLI failed: {result.stderr}")
                 return ImageAnalysisResult(analyzer=self.name, raw_response=result.stderr)
 
-            raw_text = result.stdout.strip()
+            raw_text = extract_text(result.stdout)
             data = parse_json_response(raw_text)
             return result_from_dict(data, self.name, raw_text)
 
         except subprocess.TimeoutExpired:
-            log(f"  [error] Claude CLI timeout")
+            log("  [error] Claude CLI timeout")
             return ImageAnalysisResult(analyzer=self.name)
         except json.JSONDecodeError as e:
             log(f"  [warn] JSON parse error: {e}")
-            return ImageAnalysisResult(analyzer=self.name, raw_response=raw_text if 'raw_text' in dir() else None)
+            return ImageAnalysisResult(analyzer=self.name, raw_response=raw_text or None)
         except FileNotFoundError:
             log("  [error] Claude CLI not found. Install with: npm install -g @anthropic-ai/claude-code")
             return ImageAnalysisResult(analyzer=self.name)
@@ -239,6 +312,19 @@ class ClaudeAnalyzer(BaseAnalyzer):
             return ImageAnalysisResult(analyzer=self.name)
 
 
+def _stream_json_result_text(stdout: str) -> str:
+    """stream-json 出力の最後の result イベントから応答テキストを取り出す"""
+    raw_text = ""
+    for line in stdout.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        event = json.loads(line)
+        if event.get("type") == "result":
+            raw_text = (event.get("result") or "").strip()
+    return raw_text
+
+
 class GeminiAnalyzer(BaseAnalyzer):
     """Gemini CLI を使った画像分析"""
 
@@ -252,15 +338,10 @@ class GeminiAnalyzer(BaseAnalyzer):
     def _get_client(self):
         """Gemini クライアントを取得（遅延初期化）"""
         if self._client is None:
-            try:
-                from google import genai
-                self._client = genai.Client(
-                    vertexai=True,
-                    project=os.environ.get("GOOGLE_CLOUD_PROJECT", "and-and-and-and-and"),
-                    location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
-                )
-            except ImportError:
-                raise RuntimeError("google-genai パッケージが必要です: pip install google-genai")
+            self._client = get_client(
+                os.environ.get("GOOGLE_CLOUD_PROJECT", "and-and-and-and-and"),
+                os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
+            )
         return self._client
 
     def analyze_image(
@@ -269,22 +350,24 @@ class GeminiAnalyzer(BaseAnalyzer):
         timeout_sec: float = 60.0,
     ) -> ImageAnalysisResult:
         """Gemini で画像を分析"""
-        from google.genai import types
-
-        client = self._get_client()
         image_path = Path(image_path)
 
         with open(image_path, "rb") as f:
             image_data = f.read()
 
-        suffix = image_path.suffix.lower()
-        mime_type = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-        }.get(suffix, "image/png")
+        mime_type = MIME_TYPES.get(image_path.suffix.lower(), "image/png")
+        return self.analyze_image_bytes(image_data, mime_type, timeout_sec)
+
+    def analyze_image_bytes(
+        self,
+        image_data: bytes,
+        mime_type: str = "image/png",
+        timeout_sec: float = 60.0,
+    ) -> ImageAnalysisResult:
+        """Gemini で画像データを直接分析（一時ファイル不要）"""
+        from google.genai import types
+
+        client = self._get_client()
 
         try:
             response = client.models.generate_content(
@@ -318,20 +401,29 @@ class GeminiAnalyzer(BaseAnalyzer):
 
 # ==================== ファクトリ関数 ====================
 
+_ANALYZERS: dict[str, type[BaseAnalyzer]] = {
+    "claude": ClaudeAnalyzer,
+    "gemini": GeminiAnalyzer,
+}
+
+
+@lru_cache(maxsize=None)
 def get_analyzer(analyzer_type: AnalyzerType) -> BaseAnalyzer:
-    """指定されたタイプのアナライザを取得"""
-    analyzers = {
-        "claude": ClaudeAnalyzer,
-        "gemini": GeminiAnalyzer,
-    }
-    if analyzer_type not in analyzers:
-        raise ValueError(f"Unknown analyzer type: {analyzer_type}. Available: {list(analyzers.keys())}")
-    return analyzers[analyzer_type]()
+    """指定されたタイプのアナライザを取得
+
+    インスタンスはタイプごとに1つだけ生成して使い回す
+    （Geminiクライアントの初期化・認証をバッチ全体で1回に抑える）。
+    """
+    try:
+        analyzer_cls = _ANALYZERS[analyzer_type]
+    except KeyError:
+        raise ValueError(f"Unknown analyzer type: {analyzer_type}. Available: {list(_ANALYZERS)}") from None
+    return analyzer_cls()
 
 
 def get_available_analyzers() -> list[str]:
     """利用可能なアナライザ一覧"""
-    return ["claude", "gemini"]
+    return list(_ANALYZERS)
 
 
 def analyze_sticker(
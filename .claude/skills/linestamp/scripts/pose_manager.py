@@ -4,12 +4,28 @@ LINEスタンプ生成スキル - ポーズ辞書管理ツール
 ポーズの登録・検索・一覧表示・YAML import/exportを行うCLIツール
 """
 
+import os
+import re
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
-import yaml
+# hints/avoid のJSON変換は orjson（C実装）があれば使う
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _loads = json.loads
 
 from database import (
     init_database,
@@ -18,36 +34,86 @@ from database import (
     register_shigusa,
     get_pose,
     search_poses,
+    search_poses_summary,
     update_pose_stats,
 )
 
 # YAMLポーズ定義のディレクトリ
 POSES_DIR = Path(__file__).parent / "poses"
 
+# ポーズ名 → YAMLファイル名の変換表（スペース・スラッシュ・全角括弧）
+_SAFE_NAME_TABLE = str.maketrans({" ": "_", "/": "_", "（": "_", "）": None})
+
+# yaml-sync-to-db でYAMLを並列パースするスレッド数
+_YAML_PARSE_WORKERS = 8
+_POSE_ROW_FORMAT = "{:<20} {:<10} {:<8} {}回"
+
+# yaml-list で読む先頭バイト数と、トップレベルの name / category 行
+_YAML_HEADER_BYTES = 2048
+_YAML_HEADER_RE = re.compile(r"^(name|category):[ \t]*(\S.*)$", re.M)
+
+# pose_dictionary への登録SQL（成功/失敗回数・最終使用・作成日時は既存行の値を維持）
+_UPSERT_POSE_SQL = """
+    INSERT INTO pose_dictionary (
+        name, name_en, gesture_ja, expression_ja, vibe,
+        prompt_ja, category, hints, avoid, yaml_path, updated_at,
+        success_count, failure_count, last_used, created_at
+    ) VALUES (
+        ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP,
+        0, 0, NULL, CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (name) DO UPDATE SET
+        name_en = excluded.name_en,
+        gesture_ja = excluded.gesture_ja,
+        expression_ja = excluded.expression_ja,
+        vibe = excluded.vibe,
+        prompt_ja = excluded.prompt_ja,
+        category = excluded.category,
+        hints = excluded.hints,
+        avoid = excluded.avoid,
+        yaml_path = excluded.yaml_path,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+@lru_cache(maxsize=None)
+def _yaml_loaders() -> tuple:
+    """PyYAML を遅延インポートして (Loader, Dumper) を返す
+
+    yaml-* 以外のコマンドでは PyYAML を読み込まない（起動時間短縮）。
+    libyaml が使える環境では C 実装を使用（10倍以上高速）。
+    """
+    import yaml
+    try:
+        return yaml.CSafeLoader, yaml.CSafeDumper
+    except AttributeError:
+        return yaml.SafeLoader, yaml.SafeDumper
+
 
 def list_poses(category: str = None):
     """ポーズ一覧を表示"""
-    poses = search_poses(category=category)
+    poses = search_poses_summary(category=category)
 
     if not poses:
         print("ポーズが登録されていません")
         return
 
-    print("\n" + "=" * 70)
-    print("ポーズ辞書一覧")
+    # 表全体を組み立ててから1回で出力（行ごとの write を避ける）
+    lines = ["", "=" * 70, "ポーズ辞書一覧"]
     if category:
-        print(f"カテゴリ: {category}")
-    print("=" * 70)
-    print(f"{'名前':<20} {'カテゴリ':<10} {'成功率':<8} {'使用回数'}")
-    print("-" * 70)
+        lines.append(f"カテゴリ: {category}")
+    lines.append("=" * 70)
+    lines.append(f"{'名前':<20} {'カテゴリ':<10} {'成功率':<8} {'使用回数'}")
+    lines.append("-" * 70)
 
+    row_fmt = _POSE_ROW_FORMAT.format
     for p in poses:
         total = p['success_count'] + p['failure_count']
-        rate = p['success_count'] / total if total > 0 else 0
-        rate_str = f"{rate:.0%}" if total > 0 else "-"
-        print(f"{p['name']:<20} {p['category'] or '-':<10} {rate_str:<8} {total}回")
+        rate_str = f"{p['success_count'] / total:.0%}" if total > 0 else "-"
+        lines.append(row_fmt(p['name'], p['category'] or '-', rate_str, total))
 
-    print("=" * 70 + "\n")
+    lines.append("=" * 70)
+    sys.stdout.write("\n".join(lines) + "\n\n")
 
 
 def show_pose(name: str):
@@ -220,9 +286,39 @@ def export_pose_for_reaction(name: str):
 
 # ==================== YAML Import/Export ====================
 
-def export_pose_to_yaml(name: str, output_path: str = None) -> str:
-    """ポーズをYAML形式でエクスポート"""
-    pose = get_pose(name)
+def _pose_yaml_path(name: str) -> Path:
+    """ポーズ名から poses/ 内のYAMLパスを決定"""
+    # 名前をファイル名に変換（スペースをアンダースコアに）
+    safe_name = name.translate(_SAFE_NAME_TABLE)
+    return POSES_DIR / f"{safe_name}.yaml"
+
+
+def _yaml_is_up_to_date(pose: dict, yaml_path: Path) -> bool:
+    """YAMLファイルがDBの updated_at より後の秒に書かれていれば True
+
+    updated_at（CURRENT_TIMESTAMP）は秒単位で切り捨てて保存されるので、YAMLと同じ秒の
+    更新はどちらが先か分からない。その場合は古いとみなして書き出し直す。
+    """
+    updated_at = pose.get("updated_at")
+    if not updated_at:
+        return False
+    try:
+        mtime = yaml_path.stat().st_mtime
+        # CURRENT_TIMESTAMP は UTC で保存される
+        updated = datetime.fromisoformat(updated_at).replace(tzinfo=timezone.utc)
+    except (OSError, ValueError):
+        return False
+    return int(mtime) > updated.timestamp()
+
+
+def export_pose_to_yaml(name: str, output_path: str = None, *, pose: dict = None, mkdir: bool = True) -> str:
+    """ポーズをYAML形式でエクスポート
+
+    pose に取得済みの行を渡した場合はDB再取得を省略する。
+    mkdir=False なら出力先ディレクトリの作成を呼び出し側に任せる。
+    """
+    if pose is None:
+        pose = get_pose(name)
 
     if not pose:
         print(f"ポーズが見つかりません: {name}")
@@ -257,44 +353,40 @@ def export_pose_to_yaml(name: str, output_path: str = None) -> str:
     # hints/avoid（JSON文字列からパース）
     if pose.get("hints"):
         try:
-            yaml_data["hints"] = json.loads(pose["hints"])
+            yaml_data["hints"] = _loads(pose["hints"])
         except (json.JSONDecodeError, TypeError):
             yaml_data["hints"] = [pose["hints"]]
 
     if pose.get("avoid"):
         try:
-            yaml_data["avoid"] = json.loads(pose["avoid"])
+            yaml_data["avoid"] = _loads(pose["avoid"])
         except (json.JSONDecodeError, TypeError):
             yaml_data["avoid"] = [pose["avoid"]]
 
     # 出力パス決定
     if output_path is None:
-        # 名前をファイル名に変換（スペースをアンダースコアに）
-        safe_name = name.replace(" ", "_").replace("/", "_").replace("（", "_").replace("）", "")
-        output_path = POSES_DIR / f"{safe_name}.yaml"
+        output_path = _pose_yaml_path(name)
     else:
         output_path = Path(output_path)
 
     # YAML出力
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        yaml.dump(yaml_data, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    import yaml
+    _, dumper = _yaml_loaders()
+    text = yaml.dump(yaml_data, Dumper=dumper, allow_unicode=True, default_flow_style=False, sort_keys=False)
+    if mkdir:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+    # 一時ファイルに1回で書き込んでから置き換え（書き込み途中のYAMLを残さない）
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, output_path)
 
     print(f"エクスポート完了: {output_path}")
     return str(output_path)
 
 
-def import_pose_from_yaml(yaml_path: str, update_db: bool = True) -> dict:
-    """YAMLファイルからポーズをインポート"""
-    yaml_path = Path(yaml_path)
-
-    if not yaml_path.exists():
-        print(f"ファイルが見つかりません: {yaml_path}")
-        return None
-
-    with open(yaml_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-
+def _validate_pose_yaml(data, yaml_path: Path):
+    """ポーズYAMLの必須フィールドをチェック（不正なら None）"""
     if not data:
         print(f"YAMLが空です: {yaml_path}")
         return None
@@ -308,6 +400,26 @@ def import_pose_from_yaml(yaml_path: str, update_db: bool = True) -> dict:
         print("エラー: 'gesture' フィールドが必須です")
         return None
 
+    return data
+
+
+def import_pose_from_yaml(yaml_path: str, update_db: bool = True) -> dict:
+    """YAMLファイルからポーズをインポート"""
+    yaml_path = Path(yaml_path)
+
+    if not yaml_path.exists():
+        print(f"ファイルが見つかりません: {yaml_path}")
+        return None
+
+    import yaml
+    loader, _ = _yaml_loaders()
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=loader)
+
+    data = _validate_pose_yaml(data, yaml_path)
+    if data is None:
+        return None
+
     # データベースに登録
     if update_db:
         _save_pose_to_db(data, str(yaml_path))
@@ -316,19 +428,16 @@ def import_pose_from_yaml(yaml_path: str, update_db: bool = True) -> dict:
     return data
 
 
-def _save_pose_to_db(pose_data: dict, yaml_path: str = None):
-    """ポーズデータをDBに保存（内部用）"""
-    conn = get_connection()
-    cursor = conn.cursor()
-
+def _pose_row(pose_data: dict, yaml_path: str = None) -> tuple:
+    """ポーズデータを pose_dictionary 登録用のパラメータに変換（内部用）"""
     name = pose_data["name"]
     name_en = pose_data.get("name_en")
     gesture_ja = pose_data.get("gesture", "")
     expression_ja = pose_data.get("expression", "")
     vibe = pose_data.get("vibe")
     category = pose_data.get("category")
-    hints = json.dumps(pose_data.get("hints", []), ensure_ascii=False) if pose_data.get("hints") else None
-    avoid = json.dumps(pose_data.get("avoid", []), ensure_ascii=False) if pose_data.get("avoid") else None
+    hints = _dumps(pose_data.get("hints", [])) if pose_data.get("hints") else None
+    avoid = _dumps(pose_data.get("avoid", [])) if pose_data.get("avoid") else None
 
     # 統合プロンプトを生成
     g = gesture_ja.strip().rstrip('。')
@@ -337,23 +446,69 @@ def _save_pose_to_db(pose_data: dict, yaml_path: str = None):
     if vibe:
         prompt_ja += f"（{vibe}）"
 
-    cursor.execute("""
-        INSERT OR REPLACE INTO pose_dictionary (
-            name, name_en, gesture_ja, expression_ja, vibe,
-            prompt_ja, category, hints, avoid, yaml_path, updated_at,
-            success_count, failure_count, last_used, created_at
-        ) VALUES (
-            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP,
-            COALESCE((SELECT success_count FROM pose_dictionary WHERE name = ?), 0),
-            COALESCE((SELECT failure_count FROM pose_dictionary WHERE name = ?), 0),
-            COALESCE((SELECT last_used FROM pose_dictionary WHERE name = ?), NULL),
-            COALESCE((SELECT created_at FROM pose_dictionary WHERE name = ?), CURRENT_TIMESTAMP)
-        )
-    """, (name, name_en, gesture_ja, expression_ja, vibe,
-          prompt_ja, category, hints, avoid, yaml_path, name, name, name, name))
-
-    conn.commit()
-    conn.close()
+    return (name, name_en, gesture_ja, expression_ja, vibe,
+            prompt_ja, category, hints, avoid, yaml_path)
+
+
+def _save_pose_to_db(pose_data: dict, yaml_path: str = None, cursor=None):
+    """ポーズデータをDBに保存（内部用）
+
+    cursor を渡した場合は呼び出し側のトランザクションで実行し、commit/close しない。
+    """
+    own_conn = cursor is None
+    if own_conn:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+    cursor.execute(_UPSERT_POSE_SQL, _pose_row(pose_data, yaml_path))
+
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def _iter_pose_yamls() -> list:
+    """poses/ 内のポーズYAMLを1回のディレクトリ走査で列挙（テンプレート '_*' は除外）"""
+    with os.scandir(POSES_DIR) as it:
+        return [
+            Path(entry.path) for entry in it
+            if entry.name.endswith((".yaml", ".yml"))
+            and not entry.name.startswith("_")
+            and entry.is_file()
+        ]
+
+
+def _parse_yaml_file(yaml_file: Path) -> tuple:
+    """YAMLファイルをパースして (パス, データ) を返す（失敗時はデータが None）"""
+    try:
+        return yaml_file, import_pose_from_yaml(yaml_file, update_db=False)
+    except Exception as e:
+        print(f"エラー ({yaml_file.name}): {e}")
+        return yaml_file, None
+
+
+def _parse_yaml_files(yaml_files: list) -> list:
+    """YAML群をパースして [(パス, データ)] を返す（不正なファイルは除外）
+
+    各ファイルを明示的な '---' で区切った1ストリームに連結し、load_all 1回でパースする。
+    連結パースに失敗した場合や文書数が合わない場合（ファイル内に '---' がある等）は
+    ファイル単位のパースにフォールバックする。
+    """
+    import yaml
+    loader, _ = _yaml_loaders()
+    try:
+        with ThreadPoolExecutor(max_workers=_YAML_PARSE_WORKERS) as ex:
+            blobs = list(ex.map(Path.read_bytes, yaml_files))
+        stream = b"".join(b"---\n" + blob + b"\n" for blob in blobs)
+        docs = list(yaml.load_all(stream, Loader=loader))
+    except (OSError, yaml.YAMLError):
+        docs = None
+
+    if docs is None or len(docs) != len(yaml_files):
+        with ThreadPoolExecutor(max_workers=_YAML_PARSE_WORKERS) as ex:
+            return [(f, data) for f, data in ex.map(_parse_yaml_file, yaml_files) if data]
+
+    return [(f, data) for f, data in zip(yaml_files, docs) if _validate_pose_yaml(data, f)]
 
 
 def sync_yaml_to_db():
@@ -362,20 +517,31 @@ def sync_yaml_to_db():
         print(f"ディレクトリが見つかりません: {POSES_DIR}")
         return
 
-    yaml_files = list(POSES_DIR.glob("*.yaml")) + list(POSES_DIR.glob("*.yml"))
-    # テンプレートファイルを除外
-    yaml_files = [f for f in yaml_files if not f.name.startswith("_")]
+    yaml_files = _iter_pose_yamls()
 
-    imported = 0
-    for yaml_file in yaml_files:
-        try:
-            result = import_pose_from_yaml(yaml_file, update_db=True)
-            if result:
-                imported += 1
-        except Exception as e:
-            print(f"エラー ({yaml_file.name}): {e}")
+    # 先にYAMLを全件パースし、DB書き込みは1トランザクションにまとめる
+    parsed = _parse_yaml_files(yaml_files)
+
+    if not parsed:
+        print("\n同期完了: 0件のポーズをインポートしました")
+        return
 
-    print(f"\n同期完了: {imported}件のポーズをインポートしました")
+    conn = get_connection()
+    try:
+        # WAL / synchronous=NORMAL は database.py（init_database / get_connection）で設定済み
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        cursor.executemany(_UPSERT_POSE_SQL, [_pose_row(data, str(yaml_file)) for yaml_file, data in parsed])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    for _, data in parsed:
+        print(f"インポート完了: {data['name']}")
+    print(f"\n同期完了: {len(parsed)}件のポーズをインポートしました")
 
 
 def sync_db_to_yaml():
@@ -386,16 +552,54 @@ def sync_db_to_yaml():
         print("エクスポートするポーズがありません")
         return
 
+    POSES_DIR.mkdir(parents=True, exist_ok=True)
+
     exported = 0
+    skipped = 0
     for pose in poses:
+        # 前回エクスポート以降にDB側が更新されていなければ書き出さない
+        if _yaml_is_up_to_date(pose, _pose_yaml_path(pose["name"])):
+            skipped += 1
+            continue
         try:
-            result = export_pose_to_yaml(pose["name"])
+            result = export_pose_to_yaml(pose["name"], pose=pose, mkdir=False)
             if result:
                 exported += 1
         except Exception as e:
             print(f"エラー ({pose['name']}): {e}")
 
-    print(f"\n同期完了: {exported}件のポーズをエクスポートしました")
+    print(f"\n同期完了: {exported}件のポーズをエクスポートしました（変更なし: {skipped}件）")
+
+
+def _read_yaml_header(yaml_path: Path) -> dict:
+    """YAML先頭部分から name / category だけを読み取る（一覧表示用）
+
+    export_pose_to_yaml は name, name_en, category を先頭に出力するため、
+    通常は先頭 _YAML_HEADER_BYTES だけで足りる。見つからない場合は全体をパースする。
+    """
+    import yaml
+    loader, _ = _yaml_loaders()
+    with open(yaml_path, "rb") as f:
+        head = f.read(_YAML_HEADER_BYTES)
+        truncated = bool(f.read(1))
+
+    header = {}
+    for m in _YAML_HEADER_RE.finditer(head.decode("utf-8", errors="ignore")):
+        raw = m.group(2)
+        if raw.startswith(("|", ">")):
+            continue  # ブロックスカラーは全体パースに任せる
+        try:
+            value = yaml.load(raw, Loader=loader)
+        except yaml.YAMLError:
+            continue
+        if isinstance(value, str):
+            header.setdefault(m.group(1), value)
+
+    if "name" in header and ("category" in header or not truncated):
+        return header
+
+    with open(yaml_path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=loader) or {}
 
 
 def list_yaml_poses():
@@ -404,8 +608,7 @@ def list_yaml_poses():
         print(f"ディレクトリが見つかりません: {POSES_DIR}")
         return
 
-    yaml_files = list(POSES_DIR.glob("*.yaml")) + list(POSES_DIR.glob("*.yml"))
-    yaml_files = [f for f in yaml_files if not f.name.startswith("_")]
+    yaml_files = _iter_pose_yamls()
 
     if not yaml_files:
         print("YAMLファイルがありません")
@@ -417,8 +620,7 @@ def list_yaml_poses():
 
     for yaml_file in sorted(yaml_files):
         try:
-            with open(yaml_file, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            data = _read_yaml_header(yaml_file)
             name = data.get("name", "不明")
             category = data.get("category", "-")
             print(f"  {yaml_file.name:<30} {name:<20} [{category}]")
@@ -4,27 +4,207 @@ LINEスタンプ生成スキル - ポーズ対話調整ツール
 AIと対話しながらポーズ定義を調整し、1枚ずつテスト生成するツール
 """
 
+import argparse
+import hashlib
 import json
+import mmap
+import os
+import pickle
 import sys
-import base64
+import mimetypes
+from collections import ChainMap
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence
 from datetime import datetime
 
 import yaml
 
-from database import init_database, get_connection, get_pose, search_poses
+# libyaml が使える環境では C 実装のローダー/ダンパーを使用
+_YLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+from database import init_database, get_connection, get_pose, search_poses_summary
+from vertex_client import get_client
 from pose_manager import (
     POSES_DIR,
     export_pose_to_yaml,
     import_pose_from_yaml,
     _save_pose_to_db,
+    _pose_yaml_path,
     list_yaml_poses,
 )
 
 # 出力ディレクトリ
 OUTPUT_DIR = Path(__file__).parent.parent.parent.parent.parent / "output" / "pose_test"
 
+# 参照画像ハッシュ → 背景色 のキャッシュ（determine_background_color の API 呼び出しを省略）
+BG_COLOR_CACHE_PATH = OUTPUT_DIR / ".bg_color_cache.json"
+
+# YAMLパース結果のキャッシュ（{パス: (mtime_ns, size, データ)}）
+POSE_INDEX_PATH = POSES_DIR / "_pose_index.pkl"
+POSE_INDEX_VERSION = 1
+
+# これ未満のYAMLは mmap より read() の方が安い
+YAML_MMAP_MIN_BYTES = 4096
+
+
+def _iter_pose_yaml_files():
+    """poses/ 内のポーズYAMLを (パス文字列, stat) で列挙（1回の scandir、テンプレート '_*' は除外）"""
+    with os.scandir(POSES_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith((".yaml", ".yml")) or entry.name.startswith("_"):
+                continue
+            try:
+                if entry.is_file():
+                    yield entry.path, entry.stat()
+            except OSError:
+                continue
+
+
+def _parse_yaml_fast(path: str, size: int):
+    """YAMLをバイト列のまま libyaml に渡してパース（大きいファイルは mmap で読む）"""
+    with open(path, "rb") as f:
+        if size < YAML_MMAP_MIN_BYTES:
+            return yaml.load(f.read(), Loader=_YLoader)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return yaml.load(mm, Loader=_YLoader)
+        finally:
+            mm.close()
+
+
+def _load_pose_index() -> dict:
+    """poses/ 内YAMLのパース結果を返す
+
+    _pose_index.pkl をキャッシュとして使い、mtime/サイズが変わったファイルだけ再パースする。
+    変更があればキャッシュを書き戻す（書き込めない環境では無視）。
+    """
+    cached = {}
+    try:
+        with open(POSE_INDEX_PATH, "rb") as f:
+            version, entries = pickle.load(f)
+        if version == POSE_INDEX_VERSION:
+            cached = entries
+    except Exception:
+        pass
+
+    if not POSES_DIR.exists():
+        return {}
+
+    index = {}
+    changed = False
+    for key, st in _iter_pose_yaml_files():
+        entry = cached.get(key)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            index[key] = entry
+            continue
+
+        try:
+            data = _parse_yaml_fast(key, st.st_size)
+        except Exception:
+            data = None
+        index[key] = (st.st_mtime_ns, st.st_size, data)
+        changed = True
+
+    if changed or len(index) != len(cached):
+        tmp_path = POSE_INDEX_PATH.with_name(POSE_INDEX_PATH.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump((POSE_INDEX_VERSION, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, POSE_INDEX_PATH)
+        except OSError:
+            pass
+
+    return index
+
+
+def _iter_yaml_poses(index: dict):
+    """キャッシュから有効なポーズ定義を (YAMLパス, データのコピー) で列挙"""
+    for path, (_, _, data) in index.items():
+        if isinstance(data, dict) and data.get("name"):
+            yield path, dict(data)
+
+
+@lru_cache(maxsize=256)
+def _decode_json_list(raw: str) -> tuple:
+    """hints/avoid のJSON文字列をデコード（同じ文字列は再デコードしない）"""
+    try:
+        value = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return (raw,)
+    return tuple(value) if isinstance(value, list) else (value,)
+
+
+def _load_bg_color_cache() -> dict:
+    """背景色キャッシュを読み込み（壊れている場合は空）"""
+    try:
+        with open(BG_COLOR_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_bg_color_cache(cache: dict) -> None:
+    """背景色キャッシュを書き込み（一時ファイル経由で置き換え）"""
+    BG_COLOR_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = BG_COLOR_CACHE_PATH.with_name(BG_COLOR_CACHE_PATH.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, BG_COLOR_CACHE_PATH)
+
+
+def _as_tuple(value) -> tuple:
+    """hints/avoid をタプルに正規化（未設定なら空、単一値なら1要素）"""
+    if not value:
+        return ()
+    return tuple(value) if isinstance(value, (list, tuple)) else (value,)
+
+
+# テスト生成用プロンプト（pose_locked用に詳細）
+_STAMP_PROMPT_TEMPLATE = """
+Look at this reference image and create a LINE sticker of this character.
+
+=== CHARACTER STYLE ===
+{style_prompt}
+
+=== POSE (IMPORTANT - FOLLOW EXACTLY) ===
+{pose_prompt}
+
+=== EMOTION ===
+{emotion}
+{text_instruction}
+{hints_header}
+{hints_text}
+
+{avoid_header}
+{avoid_text}
+
+=== STYLE REQUIREMENTS ===
+- Background color: {background_color}
+- SOLID, UNIFORM background color (no gradients, no patterns)
+- High contrast between subject and background
+- Clean, sharp edges on the character
+- Bold outlines, cute appearance
+- Visible complete hands with correct finger count
+- Centered composition
+"""
+
+# テキスト指示（dekaモード）
+_TEXT_INSTRUCTION_TEMPLATE = """
+=== TEXT (CRITICAL - MUST INCLUDE) ===
+Text to display: "{text}"
+
+LARGE BOLD TEXT REQUIREMENTS:
+- Text MUST occupy 40%+ of the image area
+- Use THICK, BOLD handwritten Japanese style
+- Add strong white outline/shadow for readability
+- Text must be clearly visible and readable
+- High contrast between text and background
+- Place text prominently near the character, floating style
+- NO speech bubbles, NO signs - text floats in the air
+"""
+
 
 class PoseTuner:
     """ポーズ対話調整クラス"""
@@ -32,41 +212,45 @@ class PoseTuner:
     def __init__(self):
         init_database()
 
-    def list_poses(self, source: str = "both") -> List[Dict]:
+    def list_poses(self, source: str = "db") -> List[Dict]:
         """
         ポーズ一覧を取得
 
+        DBを正とし、YAMLは明示的に指定された場合のみ走査する。
+        DBからは一覧に必要な name / category のみ取得する。
+
         Args:
             source: "db", "yaml", "both"
         """
         poses = []
 
         if source in ("db", "both"):
-            db_poses = search_poses()
+            db_poses = search_poses_summary()
             for p in db_poses:
                 p["source"] = "db"
                 poses.append(p)
 
         if source in ("yaml", "both"):
-            yaml_files = list(POSES_DIR.glob("*.yaml")) + list(POSES_DIR.glob("*.yml"))
-            yaml_files = [f for f in yaml_files if not f.name.startswith("_")]
-
-            for yaml_file in yaml_files:
-                try:
-                    with open(yaml_file, "r", encoding="utf-8") as f:
-                        data = yaml.safe_load(f)
-                    if data and data.get("name"):
-                        # DBに同名のポーズがある場合はスキップ
-                        if source == "both" and any(p["name"] == data["name"] for p in poses):
-                            continue
-                        data["source"] = "yaml"
-                        data["yaml_path"] = str(yaml_file)
-                        poses.append(data)
-                except Exception:
-                    pass
+            seen_names = {p["name"] for p in poses}
+            for yaml_path, data in _iter_yaml_poses(_load_pose_index()):
+                # DBに同名のポーズがある場合（both時はYAML同士の重複も）はスキップ
+                if source == "both" and data["name"] in seen_names:
+                    continue
+                seen_names.add(data["name"])
+                data["source"] = "yaml"
+                data["yaml_path"] = yaml_path
+                poses.append(data)
 
         return poses
 
+    def _parse_pose_row(self, pose: Dict) -> Dict:
+        """DB行の hints/avoid を JSON からパース"""
+        if pose.get("hints"):
+            pose["hints"] = list(_decode_json_list(pose["hints"]))
+        if pose.get("avoid"):
+            pose["avoid"] = list(_decode_json_list(pose["avoid"]))
+        return pose
+
     def load_pose(self, name: str) -> Optional[Dict]:
         """
         ポーズ定義を読み込み（DB優先、なければYAML）
@@ -74,30 +258,13 @@ class PoseTuner:
         # DB から取得
         pose = get_pose(name)
         if pose:
-            # hints/avoid を JSON からパース
-            if pose.get("hints"):
-                try:
-                    pose["hints"] = json.loads(pose["hints"])
-                except (json.JSONDecodeError, TypeError):
-                    pose["hints"] = [pose["hints"]]
-            if pose.get("avoid"):
-                try:
-                    pose["avoid"] = json.loads(pose["avoid"])
-                except (json.JSONDecodeError, TypeError):
-                    pose["avoid"] = [pose["avoid"]]
-            return pose
+            return self._parse_pose_row(pose)
 
         # YAML から検索
-        yaml_files = list(POSES_DIR.glob("*.yaml")) + list(POSES_DIR.glob("*.yml"))
-        for yaml_file in yaml_files:
-            try:
-                with open(yaml_file, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f)
-                if data and data.get("name") == name:
-                    data["yaml_path"] = str(yaml_file)
-                    return data
-            except Exception:
-                pass
+        for yaml_path, data in _iter_yaml_poses(_load_pose_index()):
+            if data["name"] == name:
+                data["yaml_path"] = yaml_path
+                return data
 
         return None
 
@@ -130,14 +297,7 @@ class PoseTuner:
 
         if to_yaml:
             # YAML に保存
-            safe_name = (
-                pose["name"]
-                .replace(" ", "_")
-                .replace("/", "_")
-                .replace("（", "_")
-                .replace("）", "")
-            )
-            yaml_path = POSES_DIR / f"{safe_name}.yaml"
+            yaml_path = _pose_yaml_path(pose["name"])
 
             yaml_data = {
                 "name": pose["name"],
@@ -164,6 +324,7 @@ class PoseTuner:
                 yaml.dump(
                     yaml_data,
                     f,
+                    Dumper=_YDumper,
                     allow_unicode=True,
                     default_flow_style=False,
                     sort_keys=False,
@@ -214,6 +375,8 @@ class PoseTuner:
         text: str = "",
         style: str = "sd_25",
         output_path: str = None,
+        use_bg_cache: bool = True,
+        background_color: Optional[str] = None,
     ) -> str:
         """
         ポーズ定義から1枚のスタンプを生成（pose_locked用）
@@ -225,15 +388,14 @@ class PoseTuner:
             text: スタンプテキスト
             style: スタイルID
             output_path: 出力パス（Noneなら自動生成）
+            use_bg_cache: False なら背景色キャッシュを使わず再判定する
+            background_color: 背景色（例: "bright green #00FF00"）。指定時は自動判定を省略
 
         Returns:
             生成された画像のパス
         """
-        import os
-        from google import genai
         from google.genai import types
         from generate_stamp import (
-            load_image_as_base64,
             CHIBI_STYLES,
             resolve_style_id,
             determine_background_color,
@@ -247,13 +409,9 @@ class PoseTuner:
         from PIL import Image
         import io
 
-        # Vertex AI クライアント初期化
+        # Vertex AI クライアント（セッション中は使い回す）
         project = os.environ.get("GOOGLE_CLOUD_PROJECT", "perfect-eon-481715-u3")
-        client = genai.Client(
-            vertexai=True,
-            project=project,
-            location="global",
-        )
+        client = get_client(project)
 
         # スタイル解決
         style_id = resolve_style_id(style)
@@ -273,62 +431,44 @@ class PoseTuner:
             avoid = pose["avoid"] if isinstance(pose["avoid"], list) else [pose["avoid"]]
             avoid_text = "\n".join([f"- {a}" for a in avoid])
 
+        # 参照画像を読み込み（Base64 を経由せずバイト列のまま渡す）
+        with open(reference_image, "rb") as f:
+            ref_bytes = f.read()
+        mime_type = mimetypes.guess_type(reference_image)[0] or "image/png"
+
         # 背景色を自動決定（衣装色から安全な色を選択）
-        background_color = determine_background_color(client, reference_image)
+        # 同じ参照画像なら結果は変わらないので、画像のハッシュでキャッシュする
+        if background_color is None:
+            ref_hash = hashlib.sha256(ref_bytes).hexdigest()
+            bg_cache = _load_bg_color_cache()
+            background_color = bg_cache.get(ref_hash) if use_bg_cache else None
+            if background_color is None:
+                background_color = determine_background_color(client, reference_image)
+                bg_cache[ref_hash] = background_color
+                _save_bg_color_cache(bg_cache)
         print(f"  背景色: {background_color}")
 
-        # 参照画像を読み込み
-        image_data, mime_type = load_image_as_base64(reference_image)
-
         # テキスト指示（dekaモード）
         text_instruction = ""
         if text:
-            text_instruction = f"""
-=== TEXT (CRITICAL - MUST INCLUDE) ===
-Text to display: "{text}"
-
-LARGE BOLD TEXT REQUIREMENTS:
-- Text MUST occupy 40%+ of the image area
-- Use THICK, BOLD handwritten Japanese style
-- Add strong white outline/shadow for readability
-- Text must be clearly visible and readable
-- High contrast between text and background
-- Place text prominently near the character, floating style
-- NO speech bubbles, NO signs - text floats in the air
-"""
+            text_instruction = _TEXT_INSTRUCTION_TEMPLATE.format(text=text)
 
         # プロンプト構築（pose_locked用に詳細）
-        prompt = f"""
-Look at this reference image and create a LINE sticker of this character.
-
-=== CHARACTER STYLE ===
-{style_info['prompt']}
-
-=== POSE (IMPORTANT - FOLLOW EXACTLY) ===
-{pose_prompt}
-
-=== EMOTION ===
-{emotion}
-{text_instruction}
-{"=== GENERATION HINTS ===" if hints_text else ""}
-{hints_text}
-
-{"=== MUST AVOID ===" if avoid_text else ""}
-{avoid_text}
-
-=== STYLE REQUIREMENTS ===
-- Background color: {background_color}
-- SOLID, UNIFORM background color (no gradients, no patterns)
-- High contrast between subject and background
-- Clean, sharp edges on the character
-- Bold outlines, cute appearance
-- Visible complete hands with correct finger count
-- Centered composition
-"""
+        prompt = _STAMP_PROMPT_TEMPLATE.format(
+            style_prompt=style_info['prompt'],
+            pose_prompt=pose_prompt,
+            emotion=emotion,
+            text_instruction=text_instruction,
+            hints_header="=== GENERATION HINTS ===" if hints_text else "",
+            hints_text=hints_text,
+            avoid_header="=== MUST AVOID ===" if avoid_text else "",
+            avoid_text=avoid_text,
+            background_color=background_color,
+        )
 
         # 画像付きリクエスト
         contents = [
-            types.Part.from_bytes(data=base64.b64decode(image_data), mime_type=mime_type),
+            types.Part.from_bytes(data=ref_bytes, mime_type=mime_type),
             prompt
         ]
 
@@ -353,11 +493,13 @@ Look at this reference image and create a LINE sticker of this character.
             raise ValueError("画像が生成されませんでした")
 
         # 背景透過処理（メインパイプラインと同じ厳格方式）
-        img = Image.open(io.BytesIO(image_bytes)).convert("RGBA")
+        img = Image.open(io.BytesIO(image_bytes), formats=["PNG", "JPEG", "WEBP"])
+        img.load()
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
         bg_hex = _extract_hex_color(background_color)
-        transparency_config = TRANSPARENCY_CONFIG_DEFAULT.copy()
-        if bg_hex:
-            transparency_config["fixed_colors"] = [bg_hex]
+        # デフォルト設定はコピーせず、背景色だけを上に重ねる
+        transparency_config = ChainMap({"fixed_colors": [bg_hex]} if bg_hex else {}, TRANSPARENCY_CONFIG_DEFAULT)
         img, bg = apply_strict_transparency(img, config=transparency_config, qc=QUALITY_CONFIG_STRICT)
 
         # LINE仕様サイズにリサイズ + 中央配置
@@ -365,7 +507,8 @@ Look at this reference image and create a LINE sticker of this character.
         canvas = Image.new("RGBA", STAMP_SIZE, (0, 0, 0, 0))
         x = (STAMP_SIZE[0] - img.width) // 2
         y = (STAMP_SIZE[1] - img.height) // 2
-        canvas.paste(img, (x, y), img)
+        # 透明キャンバスへの配置なのでマスク合成は不要（画素をそのままコピー）
+        canvas.paste(img, (x, y))
         img = canvas
 
         # QCチェック
@@ -400,49 +543,161 @@ Look at this reference image and create a LINE sticker of this character.
 
     def format_pose_for_display(self, pose: Dict) -> str:
         """ポーズをフォーマットして表示用文字列を返す"""
-        lines = []
-        lines.append(f"【{pose.get('name', '名前なし')}】")
+        get = pose.get
+        gesture = get("gesture", get("gesture_ja", ""))
+        expression = get("expression", get("expression_ja", ""))
+        hints = _as_tuple(get("hints"))
+        avoid = _as_tuple(get("avoid"))
+
+        lines = [f"【{get('name', '名前なし')}】"]
 
-        if pose.get("name_en"):
+        if get("name_en"):
             lines.append(f"  英語名: {pose['name_en']}")
-        if pose.get("category"):
+        if get("category"):
             lines.append(f"  カテゴリ: {pose['category']}")
 
-        lines.append("")
-        lines.append("  [ジェスチャー]")
-        gesture = pose.get("gesture", pose.get("gesture_ja", ""))
-        for line in gesture.strip().split("\n"):
-            lines.append(f"    {line}")
+        lines.extend(("", "  [ジェスチャー]"))
+        lines.extend("    " + line for line in gesture.strip().split("\n"))
 
-        lines.append("")
-        lines.append("  [表情]")
-        expression = pose.get("expression", pose.get("expression_ja", ""))
-        for line in expression.strip().split("\n"):
-            lines.append(f"    {line}")
+        lines.extend(("", "  [表情]"))
+        lines.extend("    " + line for line in expression.strip().split("\n"))
 
-        if pose.get("vibe"):
-            lines.append("")
-            lines.append(f"  [雰囲気] {pose['vibe']}")
+        if get("vibe"):
+            lines.extend(("", f"  [雰囲気] {pose['vibe']}"))
 
-        if pose.get("hints"):
-            lines.append("")
-            lines.append("  [ヒント]")
-            hints = pose["hints"] if isinstance(pose["hints"], list) else [pose["hints"]]
-            for h in hints:
-                lines.append(f"    - {h}")
+        if hints:
+            lines.extend(("", "  [ヒント]"))
+            lines.extend(f"    - {h}" for h in hints)
 
-        if pose.get("avoid"):
-            lines.append("")
-            lines.append("  [避けること]")
-            avoid = pose["avoid"] if isinstance(pose["avoid"], list) else [pose["avoid"]]
-            for a in avoid:
-                lines.append(f"    - {a}")
+        if avoid:
+            lines.extend(("", "  [避けること]"))
+            lines.extend(f"    - {a}" for a in avoid)
 
         return "\n".join(lines)
 
 
 # ==================== CLI ====================
 
+def _input_lines(prompt: str = "", strip: bool = False) -> List[str]:
+    """空行が入力されるまで1行ずつ受け取る"""
+    lines = []
+    while True:
+        line = input(prompt)
+        if strip:
+            line = line.strip()
+        if line == "":
+            break
+        lines.append(line)
+    return lines
+
+
+def _print_list(values) -> None:
+    if isinstance(values, list):
+        for v in values:
+            print(f"  - {v}")
+    else:
+        print(f"  - {values}")
+
+
+def _edit_gesture(tuner: "PoseTuner", pose: Dict) -> None:
+    print("\n現在のジェスチャー:")
+    print(pose.get("gesture", pose.get("gesture_ja", "(未設定)")))
+    print("\n新しいジェスチャーを入力（複数行可、空行で終了）:")
+    lines = _input_lines()
+    if lines:
+        pose["gesture"] = "\n".join(lines)
+        print("ジェスチャーを更新しました")
+
+
+def _edit_expression(tuner: "PoseTuner", pose: Dict) -> None:
+    print("\n現在の表情:")
+    print(pose.get("expression", pose.get("expression_ja", "(未設定)")))
+    print("\n新しい表情を入力（複数行可、空行で終了）:")
+    lines = _input_lines()
+    if lines:
+        pose["expression"] = "\n".join(lines)
+        print("表情を更新しました")
+
+
+def _edit_vibe(tuner: "PoseTuner", pose: Dict) -> None:
+    print(f"\n現在の雰囲気: {pose.get('vibe', '(未設定)')}")
+    vibe = input("新しい雰囲気を入力: ").strip()
+    if vibe:
+        pose["vibe"] = vibe
+        print("雰囲気を更新しました")
+
+
+def _edit_hints(tuner: "PoseTuner", pose: Dict) -> None:
+    print("\n現在のヒント:")
+    _print_list(pose.get("hints", []))
+    print("\n新しいヒントを入力（1行ずつ、空行で終了）:")
+    new_hints = _input_lines("  - ", strip=True)
+    if new_hints:
+        pose["hints"] = new_hints
+        print("ヒントを更新しました")
+
+
+def _edit_avoid(tuner: "PoseTuner", pose: Dict) -> None:
+    print("\n現在の避けること:")
+    _print_list(pose.get("avoid", []))
+    print("\n新しい避けることを入力（1行ずつ、空行で終了）:")
+    new_avoid = _input_lines("  - ", strip=True)
+    if new_avoid:
+        pose["avoid"] = new_avoid
+        print("避けることを更新しました")
+
+
+POSE_CATEGORIES = ["肯定", "否定", "愛情", "応援", "喜び", "礼儀", "照れ", "反応", "その他"]
+
+
+def _edit_category(tuner: "PoseTuner", pose: Dict) -> None:
+    print(f"\n現在のカテゴリ: {pose.get('category', '(未設定)')}")
+    print("カテゴリを選択:")
+    for i, cat in enumerate(POSE_CATEGORIES, 1):
+        print(f"  {i}. {cat}")
+    cat_input = input("番号を入力: ").strip()
+    if cat_input.isdigit() and 1 <= int(cat_input) <= len(POSE_CATEGORIES):
+        pose["category"] = POSE_CATEGORIES[int(cat_input) - 1]
+        print(f"カテゴリを「{pose['category']}」に更新しました")
+
+
+def _edit_name(tuner: "PoseTuner", pose: Dict) -> None:
+    print(f"\n現在の名前: {pose.get('name', '(未設定)')}")
+    new_name = input("新しい名前を入力: ").strip()
+    if new_name:
+        pose["name"] = new_name
+        print(f"名前を「{new_name}」に更新しました")
+
+
+def _show_definition(tuner: "PoseTuner", pose: Dict) -> None:
+    print("\n" + "=" * 60)
+    print("現在の定義:")
+    print("=" * 60)
+    print(tuner.format_pose_for_display(pose))
+
+
+def _preview_prompt(tuner: "PoseTuner", pose: Dict) -> None:
+    prompt = tuner.generate_prompt(pose)
+    print("\n" + "=" * 60)
+    print("生成用プロンプト:")
+    print("=" * 60)
+    print(prompt)
+
+
+# 調整ループのメニュー番号 → 処理
+_ACTIONS = {
+    "1": _edit_gesture,
+    "2": _edit_expression,
+    "3": _edit_vibe,
+    "4": _edit_hints,
+    "5": _edit_avoid,
+    "6": _edit_category,
+    "7": _edit_name,
+    "8": _show_definition,
+    "9": _preview_prompt,
+}
+
+
 def interactive_tune():
     """対話形式でポーズを調整"""
     tuner = PoseTuner()
@@ -543,269 +798,155 @@ def interactive_tune():
             print(f"  DB: 同期済み")
             return
 
-        if action == "1":
-            print("\n現在のジェスチャー:")
-            print(pose.get("gesture", pose.get("gesture_ja", "(未設定)")))
-            print("\n新しいジェスチャーを入力（複数行可、空行で終了）:")
-            lines = []
-            while True:
-                line = input()
-                if line == "":
-                    break
-                lines.append(line)
-            if lines:
-                pose["gesture"] = "\n".join(lines)
-                print("ジェスチャーを更新しました")
-
-        elif action == "2":
-            print("\n現在の表情:")
-            print(pose.get("expression", pose.get("expression_ja", "(未設定)")))
-            print("\n新しい表情を入力（複数行可、空行で終了）:")
-            lines = []
-            while True:
-                line = input()
-                if line == "":
-                    break
-                lines.append(line)
-            if lines:
-                pose["expression"] = "\n".join(lines)
-                print("表情を更新しました")
-
-        elif action == "3":
-            print(f"\n現在の雰囲気: {pose.get('vibe', '(未設定)')}")
-            vibe = input("新しい雰囲気を入力: ").strip()
-            if vibe:
-                pose["vibe"] = vibe
-                print("雰囲気を更新しました")
-
-        elif action == "4":
-            print("\n現在のヒント:")
-            hints = pose.get("hints", [])
-            if isinstance(hints, list):
-                for h in hints:
-                    print(f"  - {h}")
-            else:
-                print(f"  - {hints}")
-            print("\n新しいヒントを入力（1行ずつ、空行で終了）:")
-            new_hints = []
-            while True:
-                line = input("  - ").strip()
-                if line == "":
-                    break
-                new_hints.append(line)
-            if new_hints:
-                pose["hints"] = new_hints
-                print("ヒントを更新しました")
-
-        elif action == "5":
-            print("\n現在の避けること:")
-            avoid = pose.get("avoid", [])
-            if isinstance(avoid, list):
-                for a in avoid:
-                    print(f"  - {a}")
-            else:
-                print(f"  - {avoid}")
-            print("\n新しい避けることを入力（1行ずつ、空行で終了）:")
-            new_avoid = []
-            while True:
-                line = input("  - ").strip()
-                if line == "":
-                    break
-                new_avoid.append(line)
-            if new_avoid:
-                pose["avoid"] = new_avoid
-                print("避けることを更新しました")
-
-        elif action == "6":
-            categories = ["肯定", "否定", "愛情", "応援", "喜び", "礼儀", "照れ", "反応", "その他"]
-            print(f"\n現在のカテゴリ: {pose.get('category', '(未設定)')}")
-            print("カテゴリを選択:")
-            for i, cat in enumerate(categories, 1):
-                print(f"  {i}. {cat}")
-            cat_input = input("番号を入力: ").strip()
-            if cat_input.isdigit() and 1 <= int(cat_input) <= len(categories):
-                pose["category"] = categories[int(cat_input) - 1]
-                print(f"カテゴリを「{pose['category']}」に更新しました")
-
-        elif action == "7":
-            print(f"\n現在の名前: {pose.get('name', '(未設定)')}")
-            new_name = input("新しい名前を入力: ").strip()
-            if new_name:
-                pose["name"] = new_name
-                print(f"名前を「{new_name}」に更新しました")
-
-        elif action == "8":
-            print("\n" + "=" * 60)
-            print("現在の定義:")
-            print("=" * 60)
-            print(tuner.format_pose_for_display(pose))
-
-        elif action == "9":
-            prompt = tuner.generate_prompt(pose)
-            print("\n" + "=" * 60)
-            print("生成用プロンプト:")
-            print("=" * 60)
-            print(prompt)
-
-
-def print_usage():
-    """使い方を表示"""
-    print("""
-ポーズ対話調整ツール
-
-使い方:
-  python pose_tuner.py              - 対話形式でポーズを調整
-  python pose_tuner.py tune         - 対話形式でポーズを調整
-  python pose_tuner.py list         - ポーズ一覧を表示
-  python pose_tuner.py show <名前>  - ポーズ詳細を表示
-  python pose_tuner.py prompt <名前> - 生成用プロンプトを表示
-
-テスト生成:
-  python pose_tuner.py test <ポーズ名> <参照画像> [オプション]
-    --emotion "笑顔"    - 感情（デフォルト: 笑顔）
-    --text "やったー"   - テキスト（省略可）
-    --style sd_25       - スタイル（デフォルト: sd_25）
-    --output path.png   - 出力パス（省略で自動生成）
+        handler = _ACTIONS.get(action)
+        if handler:
+            handler(tuner, pose)
 
-例:
-  python pose_tuner.py show "OKサイン"
-  python pose_tuner.py prompt "OKサイン"
-  python pose_tuner.py test "OKサイン" input/ref.jpg
-  python pose_tuner.py test "OKサイン" input/ref.jpg --emotion "得意げ" --text "いいね！"
-""")
 
+def cmd_tune(args: argparse.Namespace) -> None:
+    """対話形式でポーズを調整"""
+    interactive_tune()
 
-if __name__ == "__main__":
-    init_database()
 
-    if len(sys.argv) < 2:
-        interactive_tune()
-        sys.exit(0)
+def cmd_list(args: argparse.Namespace) -> None:
+    """ポーズ一覧を表示"""
+    tuner = PoseTuner()
+    poses = tuner.list_poses()
 
-    cmd = sys.argv[1]
+    # 表全体を組み立ててから1回で出力
+    rows = ["", "=" * 60, "ポーズ一覧", "=" * 60, f"{'名前':<25} {'カテゴリ':<10} {'ソース'}", "-" * 60]
+    rows.extend(
+        f"{p.get('name', '不明')[:24]:<25} {p.get('category', '-')[:9]:<10} {p.get('source', '-')}"
+        for p in poses
+    )
+    rows.append("=" * 60)
+    sys.stdout.write("\n".join(rows) + "\n\n")
 
-    if cmd == "tune":
-        interactive_tune()
 
-    elif cmd == "list":
-        tuner = PoseTuner()
-        poses = tuner.list_poses()
+def cmd_show(args: argparse.Namespace) -> None:
+    """ポーズ詳細を表示"""
+    tuner = PoseTuner()
+    pose = tuner.load_pose(args.name)
 
-        print("\n" + "=" * 60)
-        print("ポーズ一覧")
-        print("=" * 60)
-        print(f"{'名前':<25} {'カテゴリ':<10} {'ソース'}")
-        print("-" * 60)
+    if pose:
+        sys.stdout.write("\n".join(("", "=" * 60, tuner.format_pose_for_display(pose), "=" * 60, "", "")))
+    else:
+        print(f"ポーズが見つかりません: {args.name}")
 
-        for p in poses:
-            name = p.get("name", "不明")[:24]
-            category = p.get("category", "-")[:9]
-            source = p.get("source", "-")
-            print(f"{name:<25} {category:<10} {source}")
 
-        print("=" * 60 + "\n")
+def cmd_prompt(args: argparse.Namespace) -> None:
+    """生成用プロンプトを表示"""
+    tuner = PoseTuner()
+    pose = tuner.load_pose(args.name)
 
-    elif cmd == "show":
-        if len(sys.argv) < 3:
-            print("ポーズ名を指定してください")
-            sys.exit(1)
+    if pose:
+        prompt = tuner.generate_prompt(pose)
+        sys.stdout.write("\n".join(("", "=" * 60, "生成用プロンプト:", "=" * 60, prompt, "=" * 60, "", "")))
+    else:
+        print(f"ポーズが見つかりません: {args.name}")
 
-        tuner = PoseTuner()
-        pose = tuner.load_pose(sys.argv[2])
 
-        if pose:
-            print("\n" + "=" * 60)
-            print(tuner.format_pose_for_display(pose))
-            print("=" * 60 + "\n")
-        else:
-            print(f"ポーズが見つかりません: {sys.argv[2]}")
+def cmd_test(args: argparse.Namespace) -> None:
+    """ポーズ定義から1枚テスト生成"""
+    tuner = PoseTuner()
+    pose = tuner.load_pose(args.pose_name)
 
-    elif cmd == "prompt":
-        if len(sys.argv) < 3:
-            print("ポーズ名を指定してください")
-            sys.exit(1)
+    if not pose:
+        print(f"ポーズが見つかりません: {args.pose_name}")
+        sys.exit(1)
 
-        tuner = PoseTuner()
-        pose = tuner.load_pose(sys.argv[2])
+    if not Path(args.ref_image).exists():
+        print(f"参照画像が見つかりません: {args.ref_image}")
+        sys.exit(1)
 
-        if pose:
-            prompt = tuner.generate_prompt(pose)
-            print("\n" + "=" * 60)
-            print("生成用プロンプト:")
-            print("=" * 60)
-            print(prompt)
-            print("=" * 60 + "\n")
-        else:
-            print(f"ポーズが見つかりません: {sys.argv[2]}")
-
-    elif cmd == "test":
-        # python pose_tuner.py test <ポーズ名> <参照画像> [--emotion X] [--text X] [--style X] [--output X]
-        if len(sys.argv) < 4:
-            print("使い方: python pose_tuner.py test <ポーズ名> <参照画像> [オプション]")
-            sys.exit(1)
-
-        pose_name = sys.argv[2]
-        ref_image = sys.argv[3]
-
-        # オプション解析
-        emotion = "笑顔"
-        text = ""
-        style = "sd_25"
-        output = None
-
-        i = 4
-        while i < len(sys.argv):
-            if sys.argv[i] == "--emotion" and i + 1 < len(sys.argv):
-                emotion = sys.argv[i + 1]
-                i += 2
-            elif sys.argv[i] == "--text" and i + 1 < len(sys.argv):
-                text = sys.argv[i + 1]
-                i += 2
-            elif sys.argv[i] == "--style" and i + 1 < len(sys.argv):
-                style = sys.argv[i + 1]
-                i += 2
-            elif sys.argv[i] == "--output" and i + 1 < len(sys.argv):
-                output = sys.argv[i + 1]
-                i += 2
-            else:
-                i += 1
-
-        tuner = PoseTuner()
-        pose = tuner.load_pose(pose_name)
+    print("\n" + "=" * 60)
+    print(f"テスト生成: {args.pose_name}")
+    print("=" * 60)
+    print(f"参照画像: {args.ref_image}")
+    print(f"感情: {args.emotion}")
+    print(f"テキスト: {args.text or '(なし)'}")
+    print(f"スタイル: {args.style}")
+    if args.bg_color:
+        print(f"背景色: {args.bg_color}")
+    print("-" * 60)
+
+    try:
+        result = tuner.generate_single_stamp(
+            pose=pose,
+            reference_image=args.ref_image,
+            emotion=args.emotion,
+            text=args.text,
+            style=args.style,
+            output_path=args.output,
+            use_bg_cache=not args.no_bg_cache,
+            background_color=args.bg_color,
+        )
+        print("\n" + "=" * 60)
+        print(f"出力: {result}")
+        print("=" * 60 + "\n")
+    except Exception as e:
+        print(f"エラー: {e}")
+        sys.exit(1)
 
-        if not pose:
-            print(f"ポーズが見つかりません: {pose_name}")
-            sys.exit(1)
 
-        if not Path(ref_image).exists():
-            print(f"参照画像が見つかりません: {ref_image}")
-            sys.exit(1)
+USAGE_EXAMPLES = """
+例:
+  python pose_tuner.py show "OKサイン"
+  python pose_tuner.py prompt "OKサイン"
+  python pose_tuner.py test "OKサイン" input/ref.jpg
+  python pose_tuner.py test "OKサイン" input/ref.jpg --emotion "得意げ" --text "いいね！"
+"""
 
-        print("\n" + "=" * 60)
-        print(f"テスト生成: {pose_name}")
-        print("=" * 60)
-        print(f"参照画像: {ref_image}")
-        print(f"感情: {emotion}")
-        print(f"テキスト: {text or '(なし)'}")
-        print(f"スタイル: {style}")
-        print("-" * 60)
 
-        try:
-            result = tuner.generate_single_stamp(
-                pose=pose,
-                reference_image=ref_image,
-                emotion=emotion,
-                text=text,
-                style=style,
-                output_path=output,
-            )
-            print("\n" + "=" * 60)
-            print(f"出力: {result}")
-            print("=" * 60 + "\n")
-        except Exception as e:
-            print(f"エラー: {e}")
-            sys.exit(1)
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="pose_tuner",
+        description="ポーズ対話調整ツール（サブコマンド省略時は対話形式で調整）",
+        epilog=USAGE_EXAMPLES,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    p.set_defaults(func=cmd_tune)
+    sub = p.add_subparsers(dest="cmd")
+
+    # tune
+    s_tune = sub.add_parser("tune", help="対話形式でポーズを調整")
+    s_tune.set_defaults(func=cmd_tune)
+
+    # list
+    s_list = sub.add_parser("list", help="ポーズ一覧を表示")
+    s_list.set_defaults(func=cmd_list)
+
+    # show
+    s_show = sub.add_parser("show", help="ポーズ詳細を表示")
+    s_show.add_argument("name", help="ポーズ名")
+    s_show.set_defaults(func=cmd_show)
+
+    # prompt
+    s_prompt = sub.add_parser("prompt", help="生成用プロンプトを表示")
+    s_prompt.add_argument("name", help="ポーズ名")
+    s_prompt.set_defaults(func=cmd_prompt)
+
+    # test
+    s_test = sub.add_parser("test", help="ポーズ定義から1枚テスト生成")
+    s_test.add_argument("pose_name", help="ポーズ名")
+    s_test.add_argument("ref_image", help="参照画像")
+    s_test.add_argument("--emotion", default="笑顔", help="感情（デフォルト: 笑顔）")
+    s_test.add_argument("--text", default="", help="テキスト（省略可）")
+    s_test.add_argument("--style", default="sd_25", help="スタイル（デフォルト: sd_25）")
+    s_test.add_argument("--output", help="出力パス（省略で自動生成）")
+    s_test.add_argument("--no-bg-cache", action="store_true", help="背景色キャッシュを使わず再判定")
+    s_test.add_argument("--bg-color", help='背景色を指定して自動判定を省略（例: "bright green #00FF00"）')
+    s_test.set_defaults(func=cmd_test)
+
+    return p
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    init_database()
+    args.func(args)
 
-    else:
-        print(f"不明なコマンド: {cmd}")
-        print_usage()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """グリッド再生成スクリプト - 白枠強調版"""
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
@@ -22,7 +23,7 @@ from generate_stamp import (
     REACTIONS,
     DEFAULT_MODIFIERS,
 )
-from google import genai
+from vertex_client import get_client
 
 # 出力ディレクトリ
 OUTPUT_DIR = Path(r"F:\projects\linestamp\output\kimikimi_home_20250203")
@@ -49,7 +50,7 @@ CRITICAL OUTLINE REQUIREMENTS - MUST FOLLOW:
 """
 
 # Vertex AIクライアント初期化（gemini-3-pro-image-previewはglobalリージョンが必要）
-client = genai.Client(vertexai=True, project=GCP_PROJECT_ID, location="global")
+client = get_client(GCP_PROJECT_ID, "global")
 
 print("=" * 60)
 print("Grid Regeneration with White Outline")
@@ -58,45 +59,41 @@ print("=" * 60)
 # リアクション24個を準備
 reactions = REACTIONS[:24]
 
-# グリッド1生成（1-12）
-print("\n[Grid 1] Generating stamps 1-12...")
-try:
-    grid1_data = generate_grid_from_character(
-        client=client,
-        character_path=str(CHARACTER_PATH),
-        reactions=reactions[:12],
-        chibi_style="sd_25",
-        background_color="bright green #00FF00",
-        character_yaml=character_yaml,
-        modifiers=modifiers,
-        model="gemini-3-pro-image-preview",
-    )
-    grid1_path = OUTPUT_DIR / "grid_1_white_outline.png"
-    with open(grid1_path, "wb") as f:
-        f.write(grid1_data)
-    print(f"  Saved: {grid1_path}")
-except Exception as e:
-    print(f"  Error: {e}")
-
-# グリッド2生成（13-24）
-print("\n[Grid 2] Generating stamps 13-24...")
-try:
-    grid2_data = generate_grid_from_character(
+# グリッド生成（1-12, 13-24）- 2つのAPI呼び出しは独立しているので並列に投げる
+GRID_JOBS = [
+    ("Grid 1", "stamps 1-12", reactions[:12], OUTPUT_DIR / "grid_1_white_outline.png"),
+    ("Grid 2", "stamps 13-24", reactions[12:24], OUTPUT_DIR / "grid_2_white_outline.png"),
+]
+
+
+def generate_grid(grid_reactions):
+    return generate_grid_from_character(
         client=client,
         character_path=str(CHARACTER_PATH),
-        reactions=reactions[12:24],
+        reactions=grid_reactions,
         chibi_style="sd_25",
         background_color="bright green #00FF00",
         character_yaml=character_yaml,
         modifiers=modifiers,
         model="gemini-3-pro-image-preview",
     )
-    grid2_path = OUTPUT_DIR / "grid_2_white_outline.png"
-    with open(grid2_path, "wb") as f:
-        f.write(grid2_data)
-    print(f"  Saved: {grid2_path}")
-except Exception as e:
-    print(f"  Error: {e}")
+
+
+with ThreadPoolExecutor(max_workers=len(GRID_JOBS)) as executor:
+    futures = {}
+    for label, desc, grid_reactions, grid_path in GRID_JOBS:
+        print(f"\n[{label}] Generating {desc}...")
+        futures[executor.submit(generate_grid, grid_reactions)] = (label, grid_path)
+
+    for future in as_completed(futures):
+        label, grid_path = futures[future]
+        try:
+            grid_data = future.result()
+            with open(grid_path, "wb") as f:
+                f.write(grid_data)
+            print(f"  [{label}] Saved: {grid_path}")
+        except Exception as e:
+            print(f"  [{label}] Error: {e}")
 
 print("\n" + "=" * 60)
 print("Done!")
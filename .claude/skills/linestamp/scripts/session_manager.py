@@ -5,41 +5,128 @@ LINEスタンプ生成スキル - セッション管理モジュール
 DBとファイルシステムの両方を管理
 """
 
+import atexit
 import json
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List, Dict, Any
 
+# config.json / reactions.json のシリアライズは orjson（C実装）があれば使う
+try:
+    import orjson
+
+    def _dumps_json(payload) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+except ImportError:
+    def _dumps_json(payload) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+
 from database import (
     init_database,
     create_session as db_create_session,
+    create_sessions as db_create_sessions,
     get_session as db_get_session,
     update_session as db_update_session,
     list_sessions as db_list_sessions,
     get_latest_session as db_get_latest_session,
     save_reactions as db_save_reactions,
     get_reactions as db_get_reactions,
-    get_pose,
+    get_pose_prompts,
     search_templates,
-    update_template_usage,
+    consume_template,
     save_template,
+    transaction,
 )
 
 # セッションディレクトリのルート
 SESSIONS_ROOT = Path(__file__).parent.parent.parent.parent.parent / "sessions"
 
+# sessions テーブルから config にそのまま写す列（persona は別途まとめる）
+_CONFIG_KEYS = ("image_path", "style", "text_mode", "outline", "status", "output_dir", "created_at")
+
+# プロセス内のセッション読み込みキャッシュ（session_id -> (session_row, reactions)）
+SESSION_CACHE_SIZE = 128
+_session_cache: Dict[str, tuple] = {}
+
+# セッションが取りうるステータス
+VALID_STATUSES = frozenset({"draft", "generating", "completed", "failed", "archived"})
+
+# config.json / reactions.json の書き込みは1スレッドのバックグラウンドで順に行う
+# （終了時に atexit で未完了の書き込みを待つ）
+_io_pool = ThreadPoolExecutor(max_workers=1)
+atexit.register(_io_pool.shutdown)
+
+# 最後に書き込んだ内容（パス -> バイト列）。同じ内容の書き直しを省く
+_last_written: Dict[Path, bytes] = {}
+
 
 def ensure_sessions_dir():
     """sessionsディレクトリが存在することを確認"""
     SESSIONS_ROOT.mkdir(parents=True, exist_ok=True)
 
 
+@lru_cache(maxsize=256)
 def get_session_dir(session_id: str) -> Path:
-    """セッションディレクトリのパスを取得"""
+    """セッションディレクトリのパスを取得（同じIDの Path は使い回す）"""
     return SESSIONS_ROOT / session_id
 
 
+def _fetch_session(session_id: str) -> tuple:
+    """セッション行とREACTIONSを取得（同一プロセス内ではキャッシュを返す）"""
+    cached = _session_cache.get(session_id)
+    if cached is not None:
+        return cached
+
+    session_data = db_get_session(session_id)
+    if not session_data:
+        return None, ()
+    cached = (session_data, tuple(db_get_reactions(session_id)))
+
+    if len(_session_cache) >= SESSION_CACHE_SIZE:
+        # 最も古いエントリを捨てる（dictは挿入順）
+        _session_cache.pop(next(iter(_session_cache)))
+    _session_cache[session_id] = cached
+    return cached
+
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    """一時ファイルに書いてから置き換える（途中で落ちても壊れたJSONを残さない）"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def _write_json_async(path: Path, payload):
+    """JSONをバックグラウンドで保存（内容は呼び出し時点でシリアライズする）
+
+    前回このプロセスで書いた内容と同じなら書き込まない。
+    """
+    data = _dumps_json(payload)
+    if _last_written.get(path) == data:
+        return
+    if len(_last_written) >= SESSION_CACHE_SIZE and path not in _last_written:
+        _last_written.pop(next(iter(_last_written)))
+    _last_written[path] = data
+
+    def report_write_error(future):
+        error = future.exception()
+        if error is not None:
+            # 書けなかった内容は次回に再度書き込む
+            _last_written.pop(path, None)
+            print(f"[Session] ファイル保存に失敗: {error}")
+
+    _io_pool.submit(_atomic_write_bytes, path, data).add_done_callback(report_write_error)
+
+
+def _invalidate_session(session_id: str):
+    """セッションのキャッシュを破棄"""
+    _session_cache.pop(session_id, None)
+
+
 class Session:
     """セッションを表すクラス"""
 
@@ -49,36 +136,32 @@ class Session:
             session_id: 既存セッションのID。Noneの場合は新規作成
         """
         self.session_id = session_id
+        self._output_dir = None
         self.config = {}
         self.reactions = []
         self._loaded = False
+        self._reactions_loaded = False
 
         if session_id:
             self._load()
 
     def _load(self):
         """DBからセッション情報を読み込む"""
-        session_data = db_get_session(self.session_id)
+        session_data, reactions = _fetch_session(self.session_id)
         if not session_data:
             raise ValueError(f"Session not found: {self.session_id}")
 
-        self.config = {
-            "image_path": session_data.get("image_path"),
-            "style": session_data.get("style"),
-            "text_mode": session_data.get("text_mode"),
-            "outline": session_data.get("outline"),
-            "persona": {
-                "age": session_data.get("persona_age"),
-                "target": session_data.get("persona_target"),
-                "theme": session_data.get("persona_theme"),
-                "intensity": session_data.get("persona_intensity"),
-            },
-            "status": session_data.get("status"),
-            "output_dir": session_data.get("output_dir"),
-            "created_at": session_data.get("created_at"),
+        self.config = {key: session_data.get(key) for key in _CONFIG_KEYS}
+        self.config["persona"] = {
+            "age": session_data.get("persona_age"),
+            "target": session_data.get("persona_target"),
+            "theme": session_data.get("persona_theme"),
+            "intensity": session_data.get("persona_intensity"),
         }
 
-        self.reactions = db_get_reactions(self.session_id)
+        # キャッシュ内の辞書を書き換えられないようにコピーを持つ
+        self.reactions = [dict(r) for r in reactions]
+        self._reactions_loaded = True
         self._loaded = True
 
     @classmethod
@@ -107,21 +190,32 @@ class Session:
             persona_target=persona_target,
             persona_theme=persona_theme,
             persona_intensity=persona_intensity,
+            output_root=str(SESSIONS_ROOT),  # 出力ディレクトリも同じ INSERT で記録
         )
 
         # セッションディレクトリを作成
-        ensure_sessions_dir()
-        session_dir = get_session_dir(session_id)
-        session_dir.mkdir(parents=True, exist_ok=True)
-        (session_dir / "output").mkdir(exist_ok=True)
-
-        # 出力ディレクトリをDBに記録
-        db_update_session(session_id, output_dir=str(session_dir / "output"))
+        (get_session_dir(session_id) / "output").mkdir(parents=True, exist_ok=True)
 
         # インスタンスを作成して返す
         session = cls(session_id)
         return session
 
+    @classmethod
+    def create_many(cls, configs: List[Dict]) -> List["Session"]:
+        """複数のセッションをまとめて作成
+
+        configs の各要素は create と同じキーワード引数。
+        DBへの登録は1回の executemany で行い、ディレクトリ作成はその後にまとめて行う。
+        """
+        if not configs:
+            return []
+
+        init_database()
+        session_ids = db_create_sessions(configs, output_root=str(SESSIONS_ROOT))
+        for session_id in session_ids:
+            (get_session_dir(session_id) / "output").mkdir(parents=True, exist_ok=True)
+        return [cls(session_id) for session_id in session_ids]
+
     @classmethod
     def load(cls, session_id: str) -> "Session":
         """既存セッションを読み込む"""
@@ -140,31 +234,37 @@ class Session:
         """セッション一覧を取得"""
         return db_list_sessions(status=status, limit=limit)
 
-    def set_reactions(self, reactions: List[Dict]):
-        """REACTIONSを設定"""
+    def set_reactions(self, reactions: List[Dict], conn=None):
+        """REACTIONSを設定
+
+        conn を渡した場合は呼び出し側のトランザクションでDBに保存する。
+        """
         self.reactions = reactions
-        db_save_reactions(self.session_id, reactions)
+        self._reactions_loaded = True
+        db_save_reactions(self.session_id, reactions, conn=conn)
+        _invalidate_session(self.session_id)
 
         # JSONファイルにも保存（バックアップ）
-        session_dir = get_session_dir(self.session_id)
-        reactions_path = session_dir / "reactions.json"
-        with open(reactions_path, "w", encoding="utf-8") as f:
-            json.dump(reactions, f, ensure_ascii=False, indent=2)
+        _write_json_async(get_session_dir(self.session_id) / "reactions.json", reactions)
 
     def get_reactions(self) -> List[Dict]:
         """REACTIONSを取得"""
-        if not self.reactions:
+        if not self._reactions_loaded:
             self.reactions = db_get_reactions(self.session_id)
+            self._reactions_loaded = True
         return self.reactions
 
     def update_config(self, **kwargs):
-        """設定を更新"""
+        """設定を更新（DB更新・config.json保存は1回にまとめる）"""
+        if not kwargs:
+            return
+
+        updates = {}
         for key, value in kwargs.items():
             if key == "persona":
                 # ペルソナは個別のカラムに分解
                 if isinstance(value, dict):
-                    db_update_session(
-                        self.session_id,
+                    updates.update(
                         persona_age=value.get("age"),
                         persona_target=value.get("target"),
                         persona_theme=value.get("theme"),
@@ -172,31 +272,33 @@ class Session:
                     )
                     self.config["persona"] = value
             else:
-                db_update_session(self.session_id, **{key: value})
+                updates[key] = value
                 self.config[key] = value
 
+        db_update_session(self.session_id, **updates)
+        _invalidate_session(self.session_id)
+
         # configファイルも更新
         self._save_config_file()
 
     def _save_config_file(self):
         """config.jsonを保存"""
-        session_dir = get_session_dir(self.session_id)
-        config_path = session_dir / "config.json"
-        with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(self.config, f, ensure_ascii=False, indent=2)
+        _write_json_async(get_session_dir(self.session_id) / "config.json", self.config)
 
     def set_status(self, status: str):
         """ステータスを設定"""
-        valid_statuses = ["draft", "generating", "completed", "failed", "archived"]
-        if status not in valid_statuses:
-            raise ValueError(f"Invalid status: {status}. Must be one of {valid_statuses}")
+        if status not in VALID_STATUSES:
+            raise ValueError(f"Invalid status: {status}. Must be one of {sorted(VALID_STATUSES)}")
 
         db_update_session(self.session_id, status=status)
+        _invalidate_session(self.session_id)
         self.config["status"] = status
 
     def get_output_dir(self) -> Path:
-        """出力ディレクトリを取得"""
-        return get_session_dir(self.session_id) / "output"
+        """出力ディレクトリを取得（初回に組み立てた Path を保持）"""
+        if self._output_dir is None:
+            self._output_dir = get_session_dir(self.session_id) / "output"
+        return self._output_dir
 
     def to_dict(self) -> Dict:
         """辞書形式でセッション情報を取得"""
@@ -210,38 +312,54 @@ class Session:
         return f"Session(id={self.session_id}, status={self.config.get('status')})"
 
 
+@lru_cache(maxsize=None)
+def _pose_prompts() -> Dict[str, Optional[str]]:
+    """ポーズ辞書のプロンプトを初回に1回だけ読み込む
+
+    意図的にプロセスごとに1回だけ読み込むキャッシュ。ポーズの登録・更新は pose_manager /
+    pose_tuner の別プロセスで行うので、その変更は次に起動したプロセスから反映される。
+    """
+    return get_pose_prompts()
+
+
 def expand_pose(pose_name: str) -> Optional[str]:
     """ポーズ名を詳細なプロンプトに展開"""
-    pose = get_pose(pose_name)
-    if pose:
-        return pose.get("prompt_ja") or pose.get("prompt_en")
-    return None
+    return _pose_prompts().get(pose_name)
 
 
+@lru_cache(maxsize=64)
 def get_template_suggestions(
     persona_age: str = None,
     persona_target: str = None,
     persona_theme: str = None,
     limit: int = 5
-) -> List[Dict]:
-    """ペルソナに基づいてテンプレートを提案"""
+) -> tuple:
+    """ペルソナに基づいてテンプレートを提案
+
+    結果はキャッシュを共有するため tuple で返す（要素の辞書は書き換えないこと）。
+    テンプレートの保存・使用時にキャッシュを破棄する。
+    """
     templates = search_templates(
         persona_age=persona_age,
         persona_target=persona_target,
         persona_theme=persona_theme,
     )
-    return templates[:limit]
+    return tuple(templates[:limit])
 
 
 def use_template(template_id: int, session: Session):
-    """テンプレートをセッションに適用"""
-    from database import get_template
-    template = get_template(template_id)
-    if template:
-        session.set_reactions(template["reactions"])
-        update_template_usage(template_id)
-        return True
-    return False
+    """テンプレートをセッションに適用
+
+    テンプレートの取得と使用回数の更新は1文で行い、REACTIONS保存と同じトランザクションでコミットする。
+    """
+    with transaction() as conn:
+        template = consume_template(template_id, conn=conn)
+        if not template:
+            return False
+        session.set_reactions(template["reactions"], conn=conn)
+    # 使用回数は提案の並び順に影響する
+    get_template_suggestions.cache_clear()
+    return True
 
 
 def save_as_template(
@@ -250,13 +368,15 @@ def save_as_template(
 ) -> int:
     """現在のセッションをテンプレートとして保存"""
     persona = session.config.get("persona", {})
-    return save_template(
+    template_id = save_template(
         name=name,
         reactions=session.reactions,
         persona_age=persona.get("age"),
         persona_target=persona.get("target"),
         persona_theme=persona.get("theme"),
     )
+    get_template_suggestions.cache_clear()
+    return template_id
 
 
 # ==================== CLI サポート ====================
@@ -267,14 +387,16 @@ def print_session_list(sessions: List[Dict]):
         print("セッションがありません")
         return
 
-    print("\n" + "=" * 60)
-    print("セッション一覧")
-    print("=" * 60)
-    print(f"{'ID':<20} {'ステータス':<12} {'スタイル':<12} {'作成日時'}")
-    print("-" * 60)
-    for s in sessions:
-        print(f"{s['id']:<20} {s.get('status', '-'):<12} {s.get('style', '-'):<12} {s.get('created_at', '-')}")
-    print("=" * 60 + "\n")
+    # 一覧全体を組み立ててから1回で出力（行ごとの print を避ける）
+    lines = ["", "=" * 60, "セッション一覧", "=" * 60,
+             f"{'ID':<20} {'ステータス':<12} {'スタイル':<12} {'作成日時'}",
+             "-" * 60]
+    lines.extend(
+        f"{s['id']:<20} {s.get('status', '-'):<12} {s.get('style', '-'):<12} {s.get('created_at', '-')}"
+        for s in sessions
+    )
+    lines.append("=" * 60)
+    sys.stdout.write("\n".join(lines) + "\n\n")
 
 
 def print_session_detail(session: Session):
@@ -298,8 +420,6 @@ def print_session_detail(session: Session):
 
 if __name__ == "__main__":
     # テスト実行
-    import sys
-
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
 
@@ -1,34 +1,49 @@
-"""統合テスト - generate_stamp.py の新機能が正しく動作するか確認"""
+"""統合テスト - generate_stamp.py の新機能が正しく動作するか確認
+
+スクリプトとして実行すると各セクションを順に実行して結果を表示する。
+各セクションは test_* 関数なので pytest からも収集できる（モジュールの
+インポートとペルソナ索引は1プロセスで共有される）。
+"""
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-print("=" * 50)
-print("Integration Test: generate_stamp.py")
-print("=" * 50)
-
-# 1. インポートテスト
-print("\n[1] Import test...")
+# 1. インポートはモジュール読み込み時に1回だけ行い、全セクションで共有する
 try:
     from generate_stamp import (
         MASTER_DB_AVAILABLE,
         POSE_DB_AVAILABLE,
         get_reactions_from_db,
+        _fetch_persona_reactions,
         log_generation_result,
         expand_pose_ref,
         expand_all_pose_refs,
         REACTIONS,
     )
+    IMPORT_ERROR = None
+except Exception as e:
+    IMPORT_ERROR = e
+
+# [6] で確認するペルソナ (age, target, theme)
+TEST_PERSONAS = [
+    ("Teen", "Friend", None),
+    ("20s", "Friend", None),
+    ("30s", "Work", None),
+    ("20s", "Partner", None),
+]
+
+
+def test_imports():
+    """[1] インポートテスト"""
+    if IMPORT_ERROR is not None:
+        raise IMPORT_ERROR
     print("  OK: All imports successful")
     print(f"  MASTER_DB_AVAILABLE: {MASTER_DB_AVAILABLE}")
     print(f"  POSE_DB_AVAILABLE: {POSE_DB_AVAILABLE}")
-except Exception as e:
-    print(f"  FAIL: {e}")
-    sys.exit(1)
 
-# 2. get_reactions_from_db テスト
-print("\n[2] get_reactions_from_db test...")
-try:
+
+def test_get_reactions_from_db():
+    """[2] get_reactions_from_db テスト"""
     reactions = get_reactions_from_db(
         age="20s",
         target="Friend",
@@ -43,12 +58,10 @@ try:
         print(f"  Has _pose_id: {'_pose_id' in r}")
         print(f"  Has _text_id: {'_text_id' in r}")
         print(f"  pose_locked: {r.get('pose_locked')}")
-except Exception as e:
-    print(f"  FAIL: {e}")
 
-# 3. expand_pose_ref テスト
-print("\n[3] expand_pose_ref test...")
-try:
+
+def test_expand_pose_ref():
+    """[3] expand_pose_ref テスト"""
     # pose_ref を含むリアクション
     test_reaction = {"id": "test", "pose_ref": "kimikimi", "text": "test", "emotion": "test"}
     expanded = expand_pose_ref(test_reaction)
@@ -59,50 +72,82 @@ try:
         print(f"  pose_locked: {expanded.get('pose_locked')}")
     else:
         print(f"  WARN: pose_ref may not have expanded properly")
-except Exception as e:
-    print(f"  FAIL: {e}")
 
-# 4. log_generation_result テスト (dry run)
-print("\n[4] log_generation_result test...")
-try:
+
+def test_log_generation_result():
+    """[4] log_generation_result テスト (dry run)"""
     # 実際にはログしない（セッションIDがないため）
     # 関数が呼べるかだけ確認
     if MASTER_DB_AVAILABLE:
+        assert callable(log_generation_result)
         print("  OK: log_generation_result function available")
         print("  (Skipping actual logging - no active session)")
     else:
         print("  SKIP: MASTER_DB not available")
-except Exception as e:
-    print(f"  FAIL: {e}")
 
-# 5. ハードコードREACTIONSとの比較
-print("\n[5] REACTIONS comparison...")
-print(f"  Hardcoded REACTIONS: {len(REACTIONS)} items")
-try:
+
+def test_reactions_comparison():
+    """[5] ハードコードREACTIONSとの比較"""
+    print(f"  Hardcoded REACTIONS: {len(REACTIONS)} items")
     db_reactions = get_reactions_from_db(age="20s", target="Friend", limit=24)
     print(f"  DB reactions (20s/Friend): {len(db_reactions)} items")
 
     # DBからの取得がハードコードより少ない場合は警告
     if len(db_reactions) < len(REACTIONS):
         print(f"  INFO: DB has fewer reactions - fallback to hardcoded may occur")
-except Exception as e:
-    print(f"  FAIL: {e}")
 
-# 6. ペルソナ別テスト
-print("\n[6] Persona variations test...")
-test_personas = [
-    ("Teen", "Friend", None),
-    ("20s", "Friend", None),
-    ("30s", "Work", None),
-    ("20s", "Partner", None),
-]
-for age, target, theme in test_personas:
+
+def _check_persona(age, target, theme=None):
+    """1ペルソナ分のリアクション取得"""
+    reactions = get_reactions_from_db(age=age, target=target, theme=theme, limit=5)
+    print(f"  {age}/{target}: {len(reactions)} reactions")
+
+
+def test_persona_variations():
+    """[6] ペルソナ別テスト（TEST_PERSONAS 全件）"""
+    for age, target, theme in TEST_PERSONAS:
+        _check_persona(age, target, theme)
+
+
+def _run_section(title: str, func, *args, label: str = "") -> bool:
+    """1セクションを実行し、例外は FAIL として表示する"""
+    if title:
+        print(f"\n{title}")
     try:
-        reactions = get_reactions_from_db(age=age, target=target, theme=theme, limit=5)
-        print(f"  {age}/{target}: {len(reactions)} reactions")
+        func(*args)
+        return True
     except Exception as e:
-        print(f"  {age}/{target}: FAIL - {e}")
+        print(f"  {label}FAIL{' - ' if label else ': '}{e}")
+        return False
+
+
+def main():
+    print("=" * 50)
+    print("Integration Test: generate_stamp.py")
+    print("=" * 50)
+
+    if not _run_section("[1] Import test...", test_imports):
+        sys.exit(1)
+    _run_section("[2] get_reactions_from_db test...", test_get_reactions_from_db)
+    _run_section("[3] expand_pose_ref test...", test_expand_pose_ref)
+    _run_section("[4] log_generation_result test...", test_log_generation_result)
+    _run_section("[5] REACTIONS comparison...", test_reactions_comparison)
+
+    # main ではペルソナごとに FAIL を表示するため、1件ずつ実行する
+    print("\n[6] Persona variations test...")
+    for age, target, theme in TEST_PERSONAS:
+        _run_section("", _check_persona, age, target, theme, label=f"{age}/{target}: ")
+
+    # [2] と同じペルソナ（20s/Friend, limit=5）はプロセス内キャッシュから返る
+    cache_info = _fetch_persona_reactions.cache_info()
+    print(f"  DB query cache: {cache_info.hits} hits / {cache_info.misses} misses")
+    if MASTER_DB_AVAILABLE and cache_info.hits == 0:
+        print("  WARN: repeated persona queries did not hit the cache")
+
+    print("\n" + "=" * 50)
+    print("Test completed!")
+    print("=" * 50)
+
 
-print("\n" + "=" * 50)
-print("Test completed!")
-print("=" * 50)
+if __name__ == "__main__":
+    main()
@@ -1,43 +1,127 @@
 """緑フリンジ除去機能をテストするスクリプト"""
+import hashlib
+import os
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
+import numpy as np
 from PIL import Image
 from generate_stamp import (
     apply_strict_transparency,
     evaluate_transparency_quality,
+    evaluate_transparency_quality_batch,
     split_grid_image,
+    warmup_transparency_jit,
     QUALITY_CONFIG_STRICT,
     TRANSPARENCY_CONFIG_DEFAULT,
 )
 
+# QCで明示的に指定する緑背景
+BG_GREEN = (0, 255, 0)
+
+# 確認用の出力PNGは圧縮率より保存速度を優先（zlib の既定 6 → 1）
+PNG_COMPRESS_LEVEL = 1
+
+# 全セルを並べた確認用シートの列数（グリッドと同じ 4 列）
+SHEET_COLS = 4
+
 
 def test_single_stamp(stamp_path: str, output_path: str = None):
     """単一スタンプに新しい透過処理を適用してテスト"""
     print(f"\nProcessing: {stamp_path}")
 
     # グリッドセルを読み込み（既存の透過済み画像ではなく、グリッドから切り出す）
-    img = Image.open(stamp_path).convert("RGBA")
+    # 既にRGBAならコピーを作らない
+    img = Image.open(stamp_path)
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
 
     # 新しい透過処理を適用
     processed, bg = apply_strict_transparency(img, TRANSPARENCY_CONFIG_DEFAULT, QUALITY_CONFIG_STRICT)
 
     # QCチェック（緑背景を明示的に指定）
-    bg_green = (0, 255, 0)
-    qc_result = evaluate_transparency_quality(processed, bg_green, QUALITY_CONFIG_STRICT)
+    qc_result = evaluate_transparency_quality(processed, BG_GREEN, QUALITY_CONFIG_STRICT)
 
     print(f"  QC OK: {qc_result['ok']}")
     print(f"  Green fringe: {qc_result.get('green_fringe_count', 'N/A')}")
     print(f"  BG remain: {qc_result['bg_remain_pct']:.4f}%")
 
     if output_path:
-        processed.save(output_path, "PNG")
+        processed.save(output_path, "PNG", compress_level=PNG_COMPRESS_LEVEL)
         print(f"  Saved: {output_path}")
 
     return qc_result
 
 
+def _load_cells(grid_file: Path, rows: int, cols: int) -> list:
+    """グリッド画像を分割したセル（RGBA配列）のリストを返す
+
+    グリッドPNGのデコードと分割は重いので、(パス, mtime, rows, cols) をキーにした
+    npzキャッシュを一時ディレクトリに置き、グリッドが変わっていなければ再利用する。
+    """
+    key = hashlib.md5(f"{grid_file}:{os.path.getmtime(grid_file)}:{rows}:{cols}".encode()).hexdigest()
+    cache_path = Path(tempfile.gettempdir()) / f"lstamp_cells_{key}.npz"
+
+    if cache_path.exists():
+        try:
+            with np.load(cache_path) as data:
+                return [data[f"cell_{i}"] for i in range(len(data.files))]
+        except (OSError, ValueError, KeyError):
+            pass  # 壊れたキャッシュは作り直す
+
+    grid_img = Image.open(grid_file)
+    if grid_img.mode != "RGBA":
+        grid_img = grid_img.convert("RGBA")
+    stamps = split_grid_image(grid_img, rows=rows, cols=cols, clean_edges=True)
+    # セルごとにサイズが異なる場合があるので、スタックせず個別の配列として保存する
+    cells = [np.asarray(cell if cell.mode == "RGBA" else cell.convert("RGBA")) for cell in stamps]
+    np.savez_compressed(cache_path, **{f"cell_{i}": c for i, c in enumerate(cells)})
+    return cells
+
+
+def _process_cells(tasks: list) -> list:
+    """複数セルの透過処理・QC（ワーカープロセスで実行）
+
+    PIL画像はそのままだとpickleが重いので、各セルを (サイズ, RGBAバイト列) で受け渡しする。
+    QCはワーカーが受け持つセルをまとめて1回で行い、セルごとに
+    ((idx, ok, fringe), サイズ, 処理後のRGBAバイト列) を返す。
+    """
+    processed_list = []
+    for stamp_idx, size, data in tasks:
+        cell = Image.frombytes("RGBA", size, data)
+
+        # 新しい透過処理を適用
+        processed, bg = apply_strict_transparency(cell, TRANSPARENCY_CONFIG_DEFAULT, QUALITY_CONFIG_STRICT)
+        processed_list.append(processed)
+
+    # QCチェック（緑背景を明示的に指定）
+    qc_results = evaluate_transparency_quality_batch(
+        processed_list, [BG_GREEN] * len(processed_list), QUALITY_CONFIG_STRICT
+    )
+    return [
+        ((task[0], qc["ok"], qc.get("green_fringe_count", 0)), img.size, img.tobytes())
+        for task, img, qc in zip(tasks, processed_list, qc_results)
+    ]
+
+
+def _save_sheet(frames: list, out_path: Path) -> None:
+    """処理済みセルを SHEET_COLS 列のシート1枚に並べて保存（セル順は左上から行優先）"""
+    cell_w = max(f.size[0] for f in frames)
+    cell_h = max(f.size[1] for f in frames)
+    rows = -(-len(frames) // SHEET_COLS)
+    sheet = Image.new("RGBA", (cell_w * SHEET_COLS, cell_h * rows), (0, 0, 0, 0))
+    for i, frame in enumerate(frames):
+        sheet.paste(frame, ((i % SHEET_COLS) * cell_w, (i // SHEET_COLS) * cell_h))
+    sheet.save(out_path, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+
+# セルごとのQC結果（構造化配列のレコード型）
+RESULT_DTYPE = np.dtype([("idx", "i4"), ("ok", "?"), ("fringe", "i4")])
+
+
 def main():
     grid_dir = Path(r"F:\projects\linestamp\output\kimikimi_home_20250203")
     output_dir = grid_dir / "transparency_fixed"
@@ -50,7 +134,8 @@ def main():
     # グリッド画像から再分割して透過処理
     grid_files = [grid_dir / "grid_1.png", grid_dir / "grid_2.png"]
 
-    all_results = []
+    # 分割は親プロセスで行い、セルごとの処理はプロセスプールで並列に実行する
+    tasks = []
     stamp_idx = 1
 
     for grid_file in grid_files:
@@ -58,44 +143,54 @@ def main():
             print(f"Grid not found: {grid_file}")
             continue
 
-        print(f"\n--- Processing {grid_file.name} ---")
-        grid_img = Image.open(grid_file).convert("RGBA")
-        stamps = split_grid_image(grid_img, rows=3, cols=4, clean_edges=True)
-
-        for i, cell in enumerate(stamps):
-            out_path = output_dir / f"{stamp_idx:02d}.png"
-
-            # 新しい透過処理を適用
-            processed, bg = apply_strict_transparency(cell, TRANSPARENCY_CONFIG_DEFAULT, QUALITY_CONFIG_STRICT)
-
-            # QCチェック（緑背景を明示的に指定）
-            bg_green = (0, 255, 0)
-            qc_result = evaluate_transparency_quality(processed, bg_green, QUALITY_CONFIG_STRICT)
-
-            status = "OK" if qc_result["ok"] else "NG"
-            fringe = qc_result.get("green_fringe_count", 0)
-
-            if not qc_result["ok"] or fringe > 0:
-                print(f"  [{stamp_idx:02d}] {status} - fringe={fringe}")
-
-            processed.save(out_path, "PNG")
-            all_results.append({"idx": stamp_idx, "ok": qc_result["ok"], "fringe": fringe})
+        print(f"\n--- Splitting {grid_file.name} ---")
+        for cell in _load_cells(grid_file, rows=3, cols=4):
+            h, w = cell.shape[:2]
+            tasks.append((stamp_idx, (w, h), cell.tobytes()))
             stamp_idx += 1
 
+    print(f"\n--- Processing {len(tasks)} cells ---")
+    # 結果は構造化配列に直接書き込み、サマリーはベクトル演算で集計する
+    results = np.zeros(len(tasks), dtype=RESULT_DTYPE)
+    frames = []
+    if tasks:
+        # ワーカー数ぶんの連続したチャンクに分ける（結果はセル順のまま連結できる）
+        workers = min(len(tasks), os.cpu_count() or 1)
+        chunk_size = -(-len(tasks) // workers)
+        chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+        # JITカーネルの読み込みは各ワーカーの initializer で行い、親では呼ばない。
+        # カーネルは parallel=True で、親で一度動かすと numba のスレッド層が起動する。
+        # その後に fork（Linux の既定）したワーカーはロックを抱えたまま複製され、
+        # プール終了時に固まる（spawn の Windows / macOS はどちらでも読み込み直す）
+        k = 0
+        with ProcessPoolExecutor(max_workers=len(chunks), initializer=warmup_transparency_jit) as ex:
+            for chunk_results in ex.map(_process_cells, chunks):
+                for record, size, data in chunk_results:
+                    results[k] = record
+                    frames.append(Image.frombytes("RGBA", size, data))
+                    k += 1
+
+        # 24枚を個別に書き出す代わりに、確認用シート1枚にまとめて保存する
+        _save_sheet(frames, output_dir / "all_stamps.png")
+
+    for r in results[~results["ok"] | (results["fringe"] > 0)]:
+        status = "OK" if r["ok"] else "NG"
+        print(f"  [{r['idx']:02d}] {status} - fringe={r['fringe']}")
+
     # サマリー
     print("\n" + "=" * 70)
     print("SUMMARY")
     print("=" * 70)
 
-    passed = sum(1 for r in all_results if r["ok"])
-    total_fringe = sum(r["fringe"] for r in all_results)
-    failed = [r["idx"] for r in all_results if not r["ok"]]
+    passed = int(results["ok"].sum())
+    total_fringe = int(results["fringe"].sum())
+    failed = results["idx"][~results["ok"]].tolist()
 
-    print(f"Total stamps: {len(all_results)}")
-    print(f"QC Passed: {passed}/{len(all_results)}")
+    print(f"Total stamps: {len(results)}")
+    print(f"QC Passed: {passed}/{len(results)}")
     print(f"QC Failed: {failed if failed else 'None'}")
     print(f"Total green fringe: {total_fringe}")
-    print(f"\nOutput saved to: {output_dir}")
+    print(f"\nOutput saved to: {output_dir / 'all_stamps.png'}")
 
 
 if __name__ == "__main__":
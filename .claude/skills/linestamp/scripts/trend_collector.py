@@ -7,19 +7,58 @@ LINE STORE トレンド収集モジュール
 from __future__ import annotations
 
 import argparse
+import asyncio
 import hashlib
 import json
+import os
 import re
 import sys
 import time
+import weakref
 from collections.abc import Sequence
-from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 import httpx
-from bs4 import BeautifulSoup
+
+# HTML解析は selectolax (lexbor) を優先（オプション、無ければ lxml + cssselect）
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    from lxml import html as lxml_html
+    from lxml.cssselect import CSSSelector
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# スタンププレビューのJSONパースは orjson（C実装）があれば使う
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# 並列取得で HTTP/2 を使う（オプション、h2 が無ければ HTTP/1.1）
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# 取得結果をディスクにキャッシュし、再実行時は条件付きGETで再検証する（オプション）
+try:
+    import hishel
+    HTTP_CACHE_AVAILABLE = True
+except ImportError:
+    HTTP_CACHE_AVAILABLE = False
 
 try:
     from .database import (
@@ -28,8 +67,10 @@ try:
         get_products_without_features,
         list_products_for_analysis,
         save_ranking_snapshot,
-        upsert_product_meta,
-        upsert_sticker_features,
+        register_products,
+        transaction,
+        upsert_product_meta_many,
+        upsert_sticker_features_many,
         upsert_product_features,
         upsert_embedding,
         init_database,
@@ -41,8 +82,10 @@ except ImportError:
         get_products_without_features,
         list_products_for_analysis,
         save_ranking_snapshot,
-        upsert_product_meta,
-        upsert_sticker_features,
+        register_products,
+        transaction,
+        upsert_product_meta_many,
+        upsert_sticker_features_many,
         upsert_product_features,
         upsert_embedding,
         init_database,
@@ -54,27 +97,268 @@ RANKING_URLS = {
     "top_creators": "https://store.line.me/stickershop/showcase/top_creators/ja",
 }
 
+# Accept-Encoding は httpx に任せる（brotli / zstandard が入っていれば br, zstd も自動で要求・展開する。
+# 展開できない形式を要求しないよう、ここで固定しないこと）
 DEFAULT_HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; linestamp-trend-collector; +https://example.invalid)",
     "Accept-Language": "ja,en;q=0.8",
 }
 
+# 並列取得の同時リクエスト数（開始間隔はレート制限のまま、応答待ちだけを重ねる）
+DEFAULT_CONCURRENCY = 4
+
+# 同一オリジンへの接続を使い回すための接続プール設定
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# HTTPキャッシュの保存先（DBと同じリポジトリ直下。LINESTAMP_HTTP_CACHE_DIR で上書き）
+DEFAULT_HTTP_CACHE_DIR = Path(__file__).parent.parent.parent.parent.parent / ".cache" / "linestamp"
+
+# メタデータをDBへまとめて書き込む行数
+META_FLUSH_ROWS = 500
+
+# URL・価格の抽出パターン
+_PRODUCT_ID_RE = re.compile(r"/stickershop/product/(\d+)")
+_AUTHOR_ID_RE = re.compile(r"/author/(\d+)")
+_CREATOR_URL_RE = re.compile(r"/stickershop/author/(\d+)")
+_PRICE_RE = re.compile(r"([\d,]+)")
+# 一覧ページ用: <a> の href に含まれる商品ID（DOMを組まずに生のバイト列から拾う）。
+# コメントと <script>/<style> の中身は要素にならないので、先にその範囲ごと一致させて
+# 読み飛ばす（商品IDは2番目のグループ。閉じられていなければ文書末尾まで）
+_ANCHOR_PRODUCT_ID_RE = re.compile(
+    rb"""<!--.*?(?:-->|\Z)"""
+    rb"""|<(script|style)\b[^>]*>.*?(?:</\1\s*>|\Z)"""
+    rb"""|<a\s(?:[^>]*?\s)?href\s*=\s*["']?[^"'\s>]*?/stickershop/product/(\d+)""",
+    re.I | re.S,
+)
+
 
 class RateLimiter:
-    """シンプルなレート制限"""
+    """ホストごとのレート制限（トークンバケット）
+
+    リクエストの開始間隔をホストごとに min_interval_sec 以上あける。burst > 1 なら
+    その回数までは間隔をあけずに連続で開始できる（burst=1 は従来の一定間隔と同じ）。
+    別ホスト（ページとスタンプ画像のCDNなど）同士は互いに待たない。
+    """
 
-    def __init__(self, min_interval_sec: float = 1.0):
+    def __init__(self, min_interval_sec: float = 1.0, burst: int = 1):
         self.min_interval_sec = float(min_interval_sec)
-        self._last_ts = 0.0
+        self.burst = max(1, int(burst))
+        # ホスト → 次にバケットが満杯から1つ減った状態になる時刻（GCRA の理論到着時刻）
+        self._tat: dict[str | None, float] = {}
 
-    def wait(self) -> None:
+    def _reserve(self, host: str | None) -> float:
+        """次の開始枠を予約し、それまでの待ち秒数を返す"""
+        now = time.monotonic()
+        tat = self._tat.get(host, now)
+        start = max(now, tat - (self.burst - 1) * self.min_interval_sec)
+        self._tat[host] = max(tat, start) + self.min_interval_sec
+        return start - now
+
+    def wait(self, host: str | None = None) -> None:
         if self.min_interval_sec <= 0:
             return
-        now = time.monotonic()
-        elapsed = now - self._last_ts
-        if elapsed < self.min_interval_sec:
-            time.sleep(self.min_interval_sec - elapsed)
-        self._last_ts = time.monotonic()
+        delay = self._reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, host: str | None = None) -> None:
+        """wait() の asyncio 版（同じ間隔管理を共有する）
+
+        次の開始時刻を先に予約してから眠るので、並列のタスクからでも間隔が保たれる。
+        """
+        if self.min_interval_sec <= 0:
+            return
+        delay = self._reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def get_http_cache_dir() -> Path:
+    """HTTPキャッシュの保存先"""
+    return Path(os.environ.get("LINESTAMP_HTTP_CACHE_DIR", DEFAULT_HTTP_CACHE_DIR))
+
+
+# create_client() がディスクキャッシュ付きで作ったクライアント（AsyncFetcher が同じ設定にそろえる）
+_HTTP_CACHE_CLIENTS: "weakref.WeakSet[httpx.Client]" = weakref.WeakSet()
+
+
+def create_client(use_cache: bool = True) -> httpx.Client:
+    """CLI 共通の HTTP クライアント（keep-alive の接続プール、h2 があれば HTTP/2）
+
+    hishel があればディスクキャッシュを挟む。キャッシュ済みのURLは ETag /
+    Last-Modified による条件付きGETで再検証し、304 ならキャッシュの本文を返す。
+    """
+    use_cache = use_cache and HTTP_CACHE_AVAILABLE
+    transport = httpx.HTTPTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS)
+    if use_cache:
+        transport = hishel.CacheTransport(
+            transport=transport,
+            storage=hishel.FileStorage(base_path=get_http_cache_dir()),
+            controller=_http_cache_controller(),
+        )
+    client = httpx.Client(
+        headers=DEFAULT_HEADERS,
+        follow_redirects=True,
+        transport=transport,
+        timeout=HTTP_TIMEOUT,
+    )
+    if use_cache:
+        _HTTP_CACHE_CLIENTS.add(client)
+    return client
+
+
+def _http_cache_controller() -> hishel.Controller:
+    """キャッシュ方針: 保存は常に行い、使う前に必ず条件付きGETで再検証する
+
+    ランキングのスナップショットが古いキャッシュで撮られないよう、鮮度の推定には頼らない。
+    再検証を省くのは force_cache を付けた取得（スタンプ画像）だけ。
+    """
+    return hishel.Controller(allow_heuristics=True, always_revalidate=True)
+
+
+def _uses_http_cache(client: httpx.Client) -> bool:
+    """create_client() がキャッシュ付きで作ったクライアントか"""
+    return client in _HTTP_CACHE_CLIENTS
+
+
+class AsyncFetcher:
+    """fetch_many 用の非同期クライアントとイベントループ（CLI 1回につき1つ作って使い回す）
+
+    client のヘッダ・Cookie・リダイレクト設定（HTTPキャッシュの有無を含む）を引き継ぐ。
+    同じループ上の1つの AsyncClient を使い続けるので、fetch_many を商品ごとに呼んでも
+    keep-alive の接続（TCP/TLS）は呼び出しをまたいで再利用される。
+    """
+
+    def __init__(self, client: httpx.Client):
+        self.uses_cache = _uses_http_cache(client)
+        transport = httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS)
+        if self.uses_cache:
+            transport = hishel.AsyncCacheTransport(
+                transport=transport,
+                storage=hishel.AsyncFileStorage(base_path=get_http_cache_dir()),
+                controller=_http_cache_controller(),
+            )
+        # asyncio.run は呼ぶたびにループを作り直し、接続プールを持ち越せないのでループを持つ
+        self._loop = asyncio.new_event_loop()
+        self._client = httpx.AsyncClient(
+            headers=client.headers,
+            cookies=client.cookies,
+            follow_redirects=client.follow_redirects,
+            transport=transport,
+        )
+
+    def fetch_many(
+        self,
+        limiter: RateLimiter,
+        urls: list[str],
+        timeout_sec: float = 30.0,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        immutable: bool = False,
+    ) -> list[httpx.Response | Exception]:
+        """urls を並列に取得し、同じ順で Response か例外を返す（引数は fetch_many と同じ）"""
+        if not urls:
+            return []
+        extensions = {"force_cache": True} if immutable and self.uses_cache else None
+        return self._loop.run_until_complete(
+            _fetch_many_async(limiter, self._client, urls, timeout_sec, concurrency, extensions)
+        )
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self._client.aclose())
+        self._loop.close()
+
+    def __enter__(self) -> "AsyncFetcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def fetch_many(
+    limiter: RateLimiter,
+    client: httpx.Client,
+    urls: list[str],
+    timeout_sec: float = 30.0,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    immutable: bool = False,
+    fetcher: AsyncFetcher | None = None,
+) -> list[httpx.Response | Exception]:
+    """複数URLを並列に取得し、urls と同じ順で Response か例外を返す
+
+    client のヘッダ・Cookie・リダイレクト設定（HTTPキャッシュの有無を含む）を引き継いだ
+    非同期クライアントで取得する。HTTPエラーは raise_for_status() の例外として返る。
+    immutable=True のURL（IDごとに内容が変わらないスタンプ画像）は、キャッシュがあれば
+    サーバのヘッダに関係なく再検証せずにキャッシュから返す。
+    fetcher を渡すとその接続を使い回す（None ならこの呼び出しの間だけ作る）。
+    """
+    if not urls:
+        return []
+    if fetcher is not None:
+        return fetcher.fetch_many(limiter, urls, timeout_sec, concurrency, immutable)
+    with AsyncFetcher(client) as temp_fetcher:
+        return temp_fetcher.fetch_many(limiter, urls, timeout_sec, concurrency, immutable)
+
+
+async def _fetch_many_async(
+    limiter: RateLimiter,
+    aclient: httpx.AsyncClient,
+    urls: list[str],
+    timeout_sec: float,
+    concurrency: int,
+    extensions: dict | None,
+) -> list[httpx.Response | Exception]:
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(url: str) -> httpx.Response:
+        async with sem:
+            await limiter.wait_async(httpx.URL(url).host)
+            r = await aclient.get(url, timeout=timeout_sec, extensions=extensions)
+            r.raise_for_status()
+            return r
+
+    return await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
+
+
+def _parse_html(html: str) -> Any:
+    """HTMLを解析してツリーを返す（selectolax があればそちらを使う）"""
+    if SELECTOLAX_AVAILABLE:
+        return LexborHTMLParser(html)
+    if not LXML_AVAILABLE:
+        raise ImportError("selectolax または lxml + cssselect が必要です")
+    # lxml は空文書を受け付けないので、空なら要素の無い文書として扱う
+    return lxml_html.fromstring(html if html.strip() else "<html></html>")
+
+
+@lru_cache(maxsize=None)
+def _lxml_selector(selector: str) -> Any:
+    """CSSセレクタを XPath にコンパイル（セレクタ文字列ごとに1回だけ）"""
+    return CSSSelector(selector)
+
+
+def _css(tree: Any, selector: str) -> list:
+    """CSSセレクタに一致する全要素"""
+    return tree.css(selector) if SELECTOLAX_AVAILABLE else _lxml_selector(selector)(tree)
+
+
+def _css_first(tree: Any, selector: str) -> Any:
+    """CSSセレクタに一致する最初の要素（無ければ None）"""
+    if SELECTOLAX_AVAILABLE:
+        return tree.css_first(selector)
+    found = _lxml_selector(selector)(tree)
+    return found[0] if found else None
+
+
+def _node_text(node: Any) -> str:
+    """要素のテキスト（各テキスト片を strip して連結）"""
+    if SELECTOLAX_AVAILABLE:
+        return node.text(strip=True)
+    return "".join(text.strip() for text in node.itertext())
+
+
+def _node_attr(node: Any, name: str) -> str | None:
+    """要素の属性値"""
+    return node.attributes.get(name) if SELECTOLAX_AVAILABLE else node.get(name)
 
 
 def log(msg: str) -> None:
@@ -83,29 +367,49 @@ def log(msg: str) -> None:
 
 
 def compute_list_hash(product_ids: list[int]) -> str:
-    """商品IDリストのハッシュを計算"""
-    data = ",".join(str(pid) for pid in product_ids)
-    return hashlib.sha256(data.encode()).hexdigest()
+    """商品IDリストのハッシュを計算
+
+    ranking_snapshots の重複判定キーなので、既存スナップショットと同じ値になる
+    形式（カンマ区切りの10進ID の SHA-256）を変えないこと。
+    """
+    return hashlib.sha256(",".join(map(str, product_ids)).encode()).hexdigest()
 
 
 # ==================== ランキング収集 ====================
 
-def extract_product_ids_from_showcase(html: str, max_items: int = 100) -> list[int]:
-    """ショーケースHTMLから商品IDを抽出"""
-    soup = BeautifulSoup(html, "lxml")
-    product_ids = []
+def _iter_anchor_product_ids(html: str | bytes):
+    """HTML中の <a href=".../stickershop/product/ID..."> の商品IDを出現順に返す（コメント・スクリプト内は除く）"""
+    if isinstance(html, str):
+        html = html.encode()
+    for match in _ANCHOR_PRODUCT_ID_RE.finditer(html):
+        if match.group(2) is not None:
+            yield int(match.group(2))
 
-    for a in soup.select("a[href*='/stickershop/product/']"):
-        href = a.get("href", "")
-        match = re.search(r"/stickershop/product/(\d+)", href)
-        if match:
-            pid = int(match.group(1))
-            if pid not in product_ids:
-                product_ids.append(pid)
-                if len(product_ids) >= max_items:
-                    break
 
-    return product_ids
+def extract_product_ids_from_showcase(html: str | bytes, max_items: int = 100) -> list[int]:
+    """ショーケースHTMLから商品IDを抽出（IDしか使わないのでHTMLは解析せず正規表現で拾う）"""
+    return extract_showcase_ids_and_hash(html, max_items)[0]
+
+
+def extract_showcase_ids_and_hash(html: str | bytes, max_items: int = 100) -> tuple[list[int], str]:
+    """ショーケースHTMLから商品IDと、その compute_list_hash を1回の走査で求める
+
+    ハッシュは採用したIDを見つけた順に更新するので、IDリストを改めて走査しない。
+    """
+    # 挿入順を保つ dict で重複排除（リストの in 判定は O(n)）
+    product_ids: dict[int, None] = {}
+    h = hashlib.sha256()
+
+    for pid in _iter_anchor_product_ids(html):
+        if pid in product_ids:
+            continue
+        # compute_list_hash と同じ「カンマ区切りの10進ID」をそのまま流し込む
+        h.update(b"%s%d" % (b"," if product_ids else b"", pid))
+        product_ids[pid] = None
+        if len(product_ids) >= max_items:
+            break
+
+    return list(product_ids), h.hexdigest()
 
 
 def collect_rankings(
@@ -129,7 +433,7 @@ def collect_rankings(
             log(f"  [warn] Unknown list type: {lt}")
             continue
 
-        limiter.wait()
+        limiter.wait(httpx.URL(url).host)
         try:
             r = client.get(url, timeout=timeout_sec)
             r.raise_for_status()
@@ -137,10 +441,9 @@ def collect_rankings(
             log(f"  [error] HTTP {e.response.status_code}")
             continue
 
-        product_ids = extract_product_ids_from_showcase(r.text, max_items=max_items)
+        product_ids, list_hash = extract_showcase_ids_and_hash(r.content, max_items=max_items)
         all_product_ids.update(product_ids)
 
-        list_hash = compute_list_hash(product_ids)
         snapshot_id, is_new = save_ranking_snapshot(lt, product_ids, list_hash)
 
         if is_new:
@@ -154,7 +457,7 @@ def collect_rankings(
 
 # ==================== メタデータ収集 ====================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProductMeta:
     """商品メタデータ"""
     product_id: int
@@ -171,55 +474,55 @@ class ProductMeta:
 
 def extract_product_meta(html: str, url: str) -> ProductMeta:
     """商品ページHTMLからメタデータを抽出"""
-    soup = BeautifulSoup(html, "lxml")
+    tree = _parse_html(html)
 
     # product_id抽出
-    match = re.search(r"/stickershop/product/(\d+)", url)
+    match = _PRODUCT_ID_RE.search(url)
     product_id = int(match.group(1)) if match else 0
 
     # タイトル（複数のセレクタを試行）
     title = None
     for selector in ["div.mdCMN38Item0lHead", "h3.mdCMN38Item01Ttl", ".mdCMN38Item01Ttl"]:
-        title_el = soup.select_one(selector)
-        if title_el:
-            title = title_el.get_text(strip=True)
+        title_el = _css_first(tree, selector)
+        if title_el is not None:
+            title = _node_text(title_el)
             break
 
     # 作者情報
-    author_el = soup.select_one("a[href*='/stickershop/author/']")
-    creator_name = author_el.get_text(strip=True) if author_el else None
+    author_el = _css_first(tree, "a[href*='/stickershop/author/']")
+    creator_name = _node_text(author_el) if author_el is not None else None
     creator_id = None
-    if author_el:
-        href = author_el.get("href", "")
-        match = re.search(r"/author/(\d+)", href)
+    if author_el is not None:
+        href = _node_attr(author_el, "href") or ""
+        match = _AUTHOR_ID_RE.search(href)
         if match:
             creator_id = int(match.group(1))
 
     # 説明
-    desc_el = soup.select_one("p.mdCMN38Item01Txt")
-    description = desc_el.get_text(strip=True) if desc_el else None
+    desc_el = _css_first(tree, "p.mdCMN38Item01Txt")
+    description = _node_text(desc_el) if desc_el is not None else None
 
     # 価格
-    price_el = soup.select_one("p.mdCMN38Item01Price")
+    price_el = _css_first(tree, "p.mdCMN38Item01Price")
     price_amount = None
-    if price_el:
-        price_text = price_el.get_text(strip=True)
-        match = re.search(r"([\d,]+)", price_text)
+    if price_el is not None:
+        price_text = _node_text(price_el)
+        match = _PRICE_RE.search(price_text)
         if match:
             price_amount = int(match.group(1).replace(",", ""))
 
     # スタンプタイプ
     sticker_type = "static"
-    if soup.select_one("[data-type='animation']") or "アニメーション" in (description or ""):
+    if _css_first(tree, "[data-type='animation']") is not None or "アニメーション" in (description or ""):
         sticker_type = "animation"
-    elif soup.select_one("[data-type='popup']") or "ポップアップ" in (description or ""):
+    elif _css_first(tree, "[data-type='popup']") is not None or "ポップアップ" in (description or ""):
         sticker_type = "popup"
-    elif soup.select_one("[data-type='sound']") or "サウンド" in (description or ""):
+    elif _css_first(tree, "[data-type='sound']") is not None or "サウンド" in (description or ""):
         sticker_type = "sound"
 
     # スタンプ数
     sticker_count = None
-    lis = soup.select(".FnStickerList li[data-preview]")
+    lis = _css(tree, ".FnStickerList li[data-preview]")
     if lis:
         sticker_count = len(lis)
 
@@ -243,8 +546,10 @@ def collect_metadata(
     product_ids: list[int] | None = None,
     limit: int = 50,
     timeout_sec: float = 30.0,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    fetcher: AsyncFetcher | None = None,
 ) -> int:
-    """メタデータを収集"""
+    """メタデータを収集（商品ページは並列に取得し、解析・保存は順に行う）"""
     if product_ids is None:
         product_ids = get_products_without_meta(limit=limit)
 
@@ -254,32 +559,31 @@ def collect_metadata(
 
     log(f"  Collecting metadata for {len(product_ids)} products...")
     collected = 0
+    pending: list[dict] = []
 
-    for pid in product_ids:
+    urls = [f"https://store.line.me/stickershop/product/{pid}/ja" for pid in product_ids]
+    responses = fetch_many(
+        limiter, client, urls, timeout_sec=timeout_sec, concurrency=concurrency, fetcher=fetcher
+    )
+
+    for pid, url, r in zip(product_ids, urls, responses):
         try:
-            url = f"https://store.line.me/stickershop/product/{pid}/ja"
-            limiter.wait()
-            r = client.get(url, timeout=timeout_sec)
-            r.raise_for_status()
+            if isinstance(r, Exception):
+                raise r
 
             meta = extract_product_meta(r.text, url)
-            upsert_product_meta(
-                product_id=meta.product_id,
-                store_url=meta.store_url,
-                title=meta.title,
-                creator_id=meta.creator_id,
-                creator_name=meta.creator_name,
-                description=meta.description,
-                price_amount=meta.price_amount,
-                price_currency=meta.price_currency,
-                sticker_type=meta.sticker_type,
-                sticker_count=meta.sticker_count,
-            )
+            pending.append(asdict(meta))
             collected += 1
             log(f"    [{collected}/{len(product_ids)}] {meta.title or pid}")
         except Exception as e:
             log(f"  [error] product/{pid}: {e}")
 
+        # 1件ずつ commit せず、まとめて1トランザクションで書き込む
+        if len(pending) >= META_FLUSH_ROWS:
+            upsert_product_meta_many(pending)
+            pending.clear()
+
+    upsert_product_meta_many(pending)
     return collected
 
 
@@ -287,17 +591,16 @@ def collect_metadata(
 
 def extract_sticker_previews(html: str) -> list[dict]:
     """商品ページからスタンププレビュー情報を抽出"""
-    soup = BeautifulSoup(html, "lxml")
-    lis = soup.select(".FnStickerList li[data-preview]")
+    lis = _css(_parse_html(html), ".FnStickerList li[data-preview]")
 
     previews = []
     for idx, li in enumerate(lis):
-        raw = li.get("data-preview")
+        raw = _node_attr(li, "data-preview")
         if not raw or not isinstance(raw, str):
             continue
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
+            data = _loads(raw)
+        except json.JSONDecodeError:  # orjson.JSONDecodeError もこのサブクラス
             continue
 
         sticker_id = data.get("id")
@@ -315,6 +618,75 @@ def extract_sticker_previews(html: str) -> list[dict]:
     return previews
 
 
+# 数値特徴の種類（size はヘッダだけで取れる。transparency / colors は画素のデコードが要る）
+IMAGE_FEATURE_FLAGS = frozenset({"size", "transparency", "colors"})
+_DECODE_FEATURE_FLAGS = frozenset({"transparency", "colors"})
+
+
+def _init_feature_worker() -> None:
+    """特徴計算ワーカーの初期化（PIL / numpy の読み込みを最初の画像の前に済ませる）"""
+    from PIL import Image  # noqa: F401
+    import numpy  # noqa: F401
+
+
+def _compute_image_features(img_data: bytes, feature_flags: frozenset[str] = IMAGE_FEATURE_FLAGS) -> dict:
+    """画像バイト列から数値特徴を計算（プロセスプールから呼べる純粋関数）
+
+    feature_flags に含まれる特徴だけを計算する。サイズはヘッダから読むだけで、
+    画素のデコードは transparency / colors を求めたときだけ行う
+    （APNG は先頭フレームだけがデコードされる）。
+    """
+    from PIL import Image
+    import io
+    import numpy as np
+
+    img = Image.open(io.BytesIO(img_data))
+    width, height = img.size  # ヘッダのみ（デコードしない）
+    result = {"width": width, "height": height}
+
+    # 透明度チェック
+    if "transparency" in feature_flags:
+        has_transparency = False
+        transparency_ratio = 0.0
+        if img.mode in ("RGBA", "LA"):
+            alpha = np.asarray(img.getchannel("A"), dtype=np.uint8)
+            transparent_pixels = int(np.count_nonzero(alpha < 128))
+            total_pixels = alpha.size
+            has_transparency = transparent_pixels > 0
+            transparency_ratio = transparent_pixels / total_pixels if total_pixels > 0 else 0.0
+        result["has_transparency"] = has_transparency
+        result["transparency_ratio"] = transparency_ratio
+
+    # 色分析（RGBを24bit整数に詰めて数える。10000色を超えたら10000で打ち止め）
+    if "colors" in feature_flags:
+        result["num_colors"] = min(_count_colors(img), 10000)
+
+    result["file_size_bytes"] = len(img_data)
+    return result
+
+
+def _count_colors(img) -> int:
+    """画像に含まれるRGB色の種類数（アルファは無視）"""
+    import numpy as np
+
+    if img.mode == "P":
+        # パレット画像は使われているインデックスのパレット色だけを数えればよい（全画素のRGB展開が不要）
+        palette = img.getpalette() or []
+        used = np.flatnonzero(np.bincount(np.asarray(img).ravel(), minlength=256))
+        if used.size and used[-1] * 3 + 2 < len(palette):
+            pal = np.asarray(palette, dtype=np.uint32).reshape(-1, 3)[used]
+            return int(np.unique((pal[:, 0] << 16) | (pal[:, 1] << 8) | pal[:, 2]).size)
+
+    rgb = np.asarray(img.convert("RGB"), dtype=np.uint32)
+    packed = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    return int(np.unique(packed).size)
+
+
+def create_feature_pool() -> ProcessPoolExecutor:
+    """画像特徴計算用のプロセスプール（CLI 1回につき1つ作って使い回す）"""
+    return ProcessPoolExecutor(initializer=_init_feature_worker)
+
+
 def analyze_product_features(
     limiter: RateLimiter,
     client: httpx.Client,
@@ -325,17 +697,29 @@ def analyze_product_features(
     gemini_limit: int = 5,
     analyzer_type: str | None = None,
     ai_limit: int | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    pool: Executor | None = None,
+    feature_flags: set[str] | frozenset[str] = IMAGE_FEATURE_FLAGS,
+    fetcher: AsyncFetcher | None = None,
 ) -> int:
-    """商品の特徴を抽出
+    """商品の特徴を抽出（スタンプ画像は並列に取得し、解析は順に行う）
 
     Args:
         use_gemini: Geminiで画像内容を分析するか（後方互換）
         gemini_limit: Gemini分析する最大スタンプ数（後方互換）
         analyzer_type: 使用するAIアナライザ ("claude", "gemini", None)
         ai_limit: AI分析する最大スタンプ数
+        pool: 数値特徴を並列計算する Executor（None ならこのプロセスで順に計算）
+        feature_flags: 計算する数値特徴（IMAGE_FEATURE_FLAGS の部分集合。{"size"} なら画像をデコードしない）
+        fetcher: 画像の並列取得に使い回す AsyncFetcher（商品をまたいで接続を再利用する）
     """
-    from PIL import Image
-    import io
+    feature_flags = frozenset(feature_flags)
+    unknown = feature_flags - IMAGE_FEATURE_FLAGS
+    if unknown:
+        raise ValueError(f"Unknown feature flags: {sorted(unknown)}")
+    # ヘッダだけで済む場合はプールに送る価値がない
+    if not feature_flags & _DECODE_FEATURE_FLAGS:
+        pool = None
 
     # 後方互換性: use_gemini が True なら analyzer_type を gemini に
     if analyzer_type is None and use_gemini:
@@ -344,7 +728,7 @@ def analyze_product_features(
         ai_limit = gemini_limit
 
     url = f"https://store.line.me/stickershop/product/{product_id}/ja"
-    limiter.wait()
+    limiter.wait(httpx.URL(url).host)
 
     try:
         r = client.get(url, timeout=timeout_sec)
@@ -369,49 +753,37 @@ def analyze_product_features(
     processed = 0
     ai_analyzed = 0
     all_features = []
+    sticker_rows = []
 
+    targets = []
     for preview in previews:
         img_url = preview.get("static_url") or preview.get("animation_url") or preview.get("popup_url")
-        if not img_url:
-            continue
+        if img_url:
+            targets.append((preview, img_url))
+    responses = fetch_many(
+        limiter, client, [img_url for _, img_url in targets],
+        timeout_sec=timeout_sec, concurrency=concurrency, immutable=True, fetcher=fetcher,
+    )
+
+    # 画像の数値特徴（CPU処理）は先にまとめてプールへ投入しておく
+    futures = [
+        pool.submit(_compute_image_features, r.content, feature_flags)
+        if pool is not None and not isinstance(r, Exception) else None
+        for r in responses
+    ]
 
+    for (preview, img_url), r, future in zip(targets, responses, futures):
         try:
-            limiter.wait()
-            r = client.get(img_url, timeout=timeout_sec)
-            r.raise_for_status()
-            img_data = r.content
+            if isinstance(r, Exception):
+                raise r
 
             # 画像を解析
-            img = Image.open(io.BytesIO(img_data))
-            width, height = img.size
-
-            # 透明度チェック
-            has_transparency = False
-            transparency_ratio = 0.0
-            if img.mode in ("RGBA", "LA"):
-                alpha = img.getchannel("A")
-                alpha_data = list(alpha.getdata())
-                transparent_pixels = sum(1 for a in alpha_data if a < 128)
-                total_pixels = len(alpha_data)
-                has_transparency = transparent_pixels > 0
-                transparency_ratio = transparent_pixels / total_pixels if total_pixels > 0 else 0.0
-
-            # 色分析
-            img_rgb = img.convert("RGB")
-            colors = img_rgb.getcolors(maxcolors=10000)
-            num_colors = len(colors) if colors else 10000
+            numeric = future.result() if future is not None else _compute_image_features(r.content, feature_flags)
 
             features = {
                 "sticker_id": preview["sticker_id"],
                 "product_id": product_id,
-                "numeric": {
-                    "width": width,
-                    "height": height,
-                    "has_transparency": has_transparency,
-                    "transparency_ratio": transparency_ratio,
-                    "num_colors": num_colors,
-                    "file_size_bytes": len(img_data),
-                }
+                "numeric": numeric,
             }
 
             # AI分析（制限内の場合）
@@ -424,11 +796,11 @@ def analyze_product_features(
                 except Exception as e:
                     log(f"    [{analyzer_type} error] {preview['sticker_id']}: {e}")
 
-            upsert_sticker_features(
-                sticker_id=preview["sticker_id"],
-                product_id=product_id,
-                features_json=features,
-            )
+            sticker_rows.append({
+                "sticker_id": preview["sticker_id"],
+                "product_id": product_id,
+                "features_json": features,
+            })
 
             all_features.append(features)
             processed += 1
@@ -436,10 +808,12 @@ def analyze_product_features(
         except Exception as e:
             log(f"  [error] sticker {preview['sticker_id']}: {e}")
 
-    # 商品全体の特徴を集約
-    if all_features:
+    # スタンプ特徴と商品全体の集約を1トランザクションで保存
+    if sticker_rows:
         pack_features = aggregate_features(all_features, analyzer_type=analyzer_type)
-        upsert_product_features(product_id, pack_features)
+        with transaction() as conn:
+            upsert_sticker_features_many(sticker_rows, conn=conn)
+            upsert_product_features(product_id, pack_features, conn=conn)
 
     return processed
 
@@ -458,72 +832,81 @@ def aggregate_features(features: list[dict], analyzer_type: str | None = None, u
     if analyzer_type is None and use_gemini:
         analyzer_type = "gemini"
 
-    transparencies = []
-    color_counts = []
-
-    for f in features:
+    from collections import Counter
+    import numpy as np
+
+    # 1パスで数値特徴とAI分析結果をまとめて集める（数値特徴が無いスタンプは NaN）
+    n = len(features)
+    transparencies = np.full(n, np.nan)
+    color_counts = np.full(n, np.nan)
+    has_text = np.zeros(n, dtype=bool)
+    analyzed = np.zeros(n, dtype=bool)
+
+    expressions: Counter = Counter()
+    poses: Counter = Counter()
+    intents: Counter = Counter()
+    moods: Counter = Counter()
+    styles: Counter = Counter()
+    all_tags: Counter = Counter()
+    texts = []
+
+    for i, f in enumerate(features):
         numeric = f.get("numeric", {})
         if "transparency_ratio" in numeric:
-            transparencies.append(numeric["transparency_ratio"])
+            transparencies[i] = numeric["transparency_ratio"]
         if "num_colors" in numeric:
-            color_counts.append(numeric["num_colors"])
+            color_counts[i] = numeric["num_colors"]
+
+        if not analyzer_type:
+            continue
+        # 新形式 "ai_analysis" または後方互換 "gemini"
+        ai_data = f.get("ai_analysis") or f.get("gemini")
+        if not ai_data:
+            continue
+        analyzed[i] = True
+        has_text[i] = bool(ai_data.get("has_text"))
+
+        if ai_data.get("expression"):
+            expressions[ai_data["expression"]] += 1
+        if ai_data.get("pose"):
+            poses[ai_data["pose"]] += 1
+        if ai_data.get("text_intent"):
+            intents[ai_data["text_intent"]] += 1
+        if ai_data.get("mood"):
+            moods[ai_data["mood"]] += 1
+        if ai_data.get("character_style"):
+            styles[ai_data["character_style"]] += 1
+        if ai_data.get("tags"):
+            all_tags.update(ai_data["tags"])
+        if ai_data.get("text_content") and len(texts) < 5:
+            texts.append(ai_data["text_content"])
+
+    def nan_mean(values: np.ndarray) -> float:
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if values.size else 0
 
     result = {
-        "sticker_count": len(features),
-        "avg_transparency_ratio": sum(transparencies) / len(transparencies) if transparencies else 0,
-        "avg_color_count": sum(color_counts) / len(color_counts) if color_counts else 0,
+        "sticker_count": n,
+        "avg_transparency_ratio": nan_mean(transparencies),
+        "avg_color_count": nan_mean(color_counts),
     }
 
     # AI分析結果を集約
     if analyzer_type:
-        from collections import Counter
-
-        expressions = []
-        poses = []
-        intents = []
-        moods = []
-        styles = []
-        all_tags = []
-        texts = []
-
-        for f in features:
-            # 新形式 "ai_analysis" または後方互換 "gemini"
-            ai_data = f.get("ai_analysis") or f.get("gemini", {})
-            if not ai_data:
-                continue
-
-            if ai_data.get("expression"):
-                expressions.append(ai_data["expression"])
-            if ai_data.get("pose"):
-                poses.append(ai_data["pose"])
-            if ai_data.get("text_intent"):
-                intents.append(ai_data["text_intent"])
-            if ai_data.get("mood"):
-                moods.append(ai_data["mood"])
-            if ai_data.get("character_style"):
-                styles.append(ai_data["character_style"])
-            if ai_data.get("tags"):
-                all_tags.extend(ai_data["tags"])
-            if ai_data.get("text_content"):
-                texts.append(ai_data["text_content"])
-
-        def top_items(items: list, n: int = 3) -> list:
-            if not items:
-                return []
-            counts = Counter(items)
-            return [item for item, _ in counts.most_common(n)]
+        def top_items(counts: Counter, k: int = 3) -> list:
+            return [item for item, _ in counts.most_common(k)]
 
         result["ai_summary"] = {
             "analyzer": analyzer_type,
-            "analyzed_count": sum(1 for f in features if f.get("ai_analysis") or f.get("gemini")),
+            "analyzed_count": int(np.count_nonzero(analyzed)),
             "top_expressions": top_items(expressions),
             "top_poses": top_items(poses),
             "top_intents": top_items(intents),
             "top_moods": top_items(moods),
             "character_styles": top_items(styles),
             "common_tags": top_items(all_tags, 10),
-            "sample_texts": texts[:5],
-            "has_text_ratio": sum(1 for f in features if (f.get("ai_analysis") or f.get("gemini", {})).get("has_text")) / len(features) if features else 0,
+            "sample_texts": texts,
+            "has_text_ratio": float(has_text.mean()),
         }
 
     return result
@@ -572,13 +955,13 @@ def interactive_select_products() -> list[int]:
 
 def extract_creator_id_from_url(url: str) -> int | None:
     """クリエイターURLからIDを抽出"""
-    match = re.search(r"/stickershop/author/(\d+)", url)
+    match = _CREATOR_URL_RE.search(url)
     return int(match.group(1)) if match else None
 
 
 def extract_product_id_from_url(url: str) -> int | None:
     """スタンプURLからIDを抽出"""
-    match = re.search(r"/stickershop/product/(\d+)", url)
+    match = _PRODUCT_ID_RE.search(url)
     return int(match.group(1)) if match else None
 
 
@@ -590,12 +973,13 @@ def fetch_creator_products(
     timeout_sec: float = 30.0,
 ) -> list[int]:
     """クリエイターの全スタンプIDを取得"""
-    product_ids: list[int] = []
+    # 挿入順を保つ dict で重複排除（全ページ分）
+    product_ids: dict[int, None] = {}
     page = 1
 
     while page <= max_pages:
         url = f"https://store.line.me/stickershop/author/{creator_id}/ja?page={page}"
-        limiter.wait()
+        limiter.wait(httpx.URL(url).host)
 
         try:
             r = client.get(url, timeout=timeout_sec)
@@ -604,25 +988,19 @@ def fetch_creator_products(
             log(f"  [error] HTTP {e.response.status_code}")
             break
 
-        soup = BeautifulSoup(r.text, "lxml")
-        found_on_page = []
+        known = len(product_ids)
 
-        for a in soup.select("a[href*='/stickershop/product/']"):
-            href = a.get("href", "")
-            match = re.search(r"/stickershop/product/(\d+)", href)
-            if match:
-                pid = int(match.group(1))
-                if pid not in product_ids and pid not in found_on_page:
-                    found_on_page.append(pid)
+        for pid in _iter_anchor_product_ids(r.content):
+            product_ids.setdefault(pid, None)
 
+        found_on_page = len(product_ids) - known
         if not found_on_page:
             break
 
-        product_ids.extend(found_on_page)
-        log(f"  Page {page}: found {len(found_on_page)} products")
+        log(f"  Page {page}: found {found_on_page} products")
         page += 1
 
-    return product_ids
+    return list(product_ids)
 
 
 def collect_by_url(
@@ -631,6 +1009,8 @@ def collect_by_url(
     url: str,
     collect_meta: bool = True,
     timeout_sec: float = 30.0,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    fetcher: AsyncFetcher | None = None,
 ) -> dict:
     """URL指定でデータを収集"""
     result = {
@@ -652,28 +1032,15 @@ def collect_by_url(
         result["products_found"] = len(product_ids)
         result["product_ids"] = product_ids
 
-        # DBに登録
-        try:
-            from .database import get_connection
-        except ImportError:
-            from database import get_connection
-
-        for pid in product_ids:
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO products_meta (product_id, store_url, creator_id)
-                VALUES (?, ?, ?)
-                """,
-                (pid, f"https://store.line.me/stickershop/product/{pid}/ja", creator_id)
-            )
-            conn.commit()
-            conn.close()
+        # DBに登録（1接続・1トランザクション）
+        register_products(product_ids, creator_id)
 
         if collect_meta and product_ids:
             log(f"Collecting metadata for {len(product_ids)} products...")
-            result["meta_collected"] = collect_metadata(limiter, client, product_ids, timeout_sec=timeout_sec)
+            result["meta_collected"] = collect_metadata(
+                limiter, client, product_ids, timeout_sec=timeout_sec, concurrency=concurrency,
+                fetcher=fetcher,
+            )
 
         return result
 
@@ -687,7 +1054,10 @@ def collect_by_url(
         log(f"Fetching product/{product_id}...")
 
         if collect_meta:
-            result["meta_collected"] = collect_metadata(limiter, client, [product_id], timeout_sec=timeout_sec)
+            result["meta_collected"] = collect_metadata(
+                limiter, client, [product_id], timeout_sec=timeout_sec, concurrency=concurrency,
+                fetcher=fetcher,
+            )
 
         return result
 
@@ -700,9 +1070,9 @@ def collect_by_url(
 def cmd_collect(args: argparse.Namespace) -> None:
     """ランキング＋メタデータを収集"""
     init_database()
-    limiter = RateLimiter(min_interval_sec=args.min_interval_sec)
+    limiter = RateLimiter(min_interval_sec=args.min_interval_sec, burst=args.burst)
 
-    with httpx.Client(headers=DEFAULT_HEADERS, follow_redirects=True) as client:
+    with create_client(use_cache=not args.no_cache) as client, AsyncFetcher(client) as fetcher:
         log("[step 1/2] Collecting rankings...")
         snapshots, product_ids = collect_rankings(
             limiter, client, max_items=args.max_items
@@ -710,19 +1080,23 @@ def cmd_collect(args: argparse.Namespace) -> None:
         log(f"  Created {snapshots} snapshots, found {len(product_ids)} products")
 
         log("[step 2/2] Collecting metadata...")
-        meta_count = collect_metadata(limiter, client, limit=args.meta_limit)
+        meta_count = collect_metadata(
+            limiter, client, limit=args.meta_limit, concurrency=args.concurrency, fetcher=fetcher
+        )
         log(f"  Collected metadata for {meta_count} products")
 
 
 def cmd_fetch_url(args: argparse.Namespace) -> None:
     """URL指定でデータを収集"""
     init_database()
-    limiter = RateLimiter(min_interval_sec=args.min_interval_sec)
+    limiter = RateLimiter(min_interval_sec=args.min_interval_sec, burst=args.burst)
 
-    with httpx.Client(headers=DEFAULT_HEADERS, follow_redirects=True) as client:
+    with create_client(use_cache=not args.no_cache) as client, AsyncFetcher(client) as fetcher:
         result = collect_by_url(
             limiter, client, args.url,
             collect_meta=not args.skip_meta,
+            concurrency=args.concurrency,
+            fetcher=fetcher,
         )
 
         if result.get("error"):
@@ -743,19 +1117,23 @@ def cmd_fetch_url(args: argparse.Namespace) -> None:
             log("[step] Analyzing features...")
             if analyzer_type:
                 log(f"  AI analyzer: {analyzer_type} (limit: {ai_limit})")
-            for pid in result["product_ids"]:
-                count = analyze_product_features(
-                    limiter, client, pid,
-                    analyzer_type=analyzer_type,
-                    ai_limit=ai_limit,
-                )
-                log(f"  product/{pid}: {count} stickers analyzed")
+            with create_feature_pool() as pool:
+                for pid in result["product_ids"]:
+                    count = analyze_product_features(
+                        limiter, client, pid,
+                        analyzer_type=analyzer_type,
+                        ai_limit=ai_limit,
+                        concurrency=args.concurrency,
+                        pool=pool,
+                        fetcher=fetcher,
+                    )
+                    log(f"  product/{pid}: {count} stickers analyzed")
 
 
 def cmd_analyze(args: argparse.Namespace) -> None:
     """特徴抽出を実行"""
     init_database()
-    limiter = RateLimiter(min_interval_sec=args.min_interval_sec)
+    limiter = RateLimiter(min_interval_sec=args.min_interval_sec, burst=args.burst)
 
     # 対象商品を決定
     if args.interactive:
@@ -779,13 +1157,20 @@ def cmd_analyze(args: argparse.Namespace) -> None:
     if analyzer_type:
         log(f"  AI analyzer: {analyzer_type} (limit per product: {ai_limit})")
 
-    with httpx.Client(headers=DEFAULT_HEADERS, follow_redirects=True) as client:
+    with (
+        create_client(use_cache=not args.no_cache) as client,
+        AsyncFetcher(client) as fetcher,
+        create_feature_pool() as pool,
+    ):
         for i, pid in enumerate(product_ids, 1):
             log(f"[{i}/{len(product_ids)}] product/{pid}")
             count = analyze_product_features(
                 limiter, client, pid,
                 analyzer_type=analyzer_type,
                 ai_limit=ai_limit,
+                concurrency=args.concurrency,
+                pool=pool,
+                fetcher=fetcher,
             )
             log(f"  Processed {count} stickers")
 
@@ -837,6 +1222,9 @@ def build_parser() -> argparse.ArgumentParser:
     s1.add_argument("--max-items", type=int, default=100)
     s1.add_argument("--meta-limit", type=int, default=50)
     s1.add_argument("--min-interval-sec", type=float, default=1.0)
+    s1.add_argument("--burst", type=int, default=1, help="Requests per host allowed back-to-back")
+    s1.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max in-flight requests")
+    s1.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP cache")
     s1.set_defaults(func=cmd_collect)
 
     # fetch (URL指定)
@@ -849,6 +1237,9 @@ def build_parser() -> argparse.ArgumentParser:
     s_fetch.add_argument("--ai-limit", type=int, default=5, help="Max stickers to analyze with AI per product")
     s_fetch.add_argument("--gemini-limit", type=int, default=5, help="[Deprecated] Use --ai-limit")
     s_fetch.add_argument("--min-interval-sec", type=float, default=1.0)
+    s_fetch.add_argument("--burst", type=int, default=1, help="Requests per host allowed back-to-back")
+    s_fetch.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max in-flight requests")
+    s_fetch.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP cache")
     s_fetch.set_defaults(func=cmd_fetch_url)
 
     # analyze
@@ -861,6 +1252,9 @@ def build_parser() -> argparse.ArgumentParser:
     s2.add_argument("--ai-limit", type=int, default=5, help="Max stickers to analyze with AI per product")
     s2.add_argument("--gemini-limit", type=int, default=5, help="[Deprecated] Use --ai-limit")
     s2.add_argument("--min-interval-sec", type=float, default=1.0)
+    s2.add_argument("--burst", type=int, default=1, help="Requests per host allowed back-to-back")
+    s2.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Max in-flight requests")
+    s2.add_argument("--no-cache", action="store_true", help="Bypass the on-disk HTTP cache")
     s2.set_defaults(func=cmd_analyze)
 
     # stats
@@ -0,0 +1,21 @@
+"""
+LINEスタンプ生成スキル - Vertex AI クライアント共有モジュール
+
+genai.Client を (project, location) ごとに1つだけ生成し、プロセス内で使い回す。
+ADC認証の解決・HTTPS接続プールの初期化を2回目以降の呼び出しで省略する。
+"""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4)
+def get_client(project: str, location: str = "global"):
+    """Vertex AI 用の genai クライアントを取得（(project, location) ごとにキャッシュ）
+
+    genai.Client はスレッドセーフなので、並列の generate_content 呼び出しで共有してよい。
+    """
+    try:
+        from google import genai
+    except ImportError:
+        raise RuntimeError("google-genai パッケージが必要です: pip install google-genai")
+    return genai.Client(vertexai=True, project=project, location=location)
@@ -1,104 +1,289 @@
 """緑残りピクセルを可視化するスクリプト"""
+import argparse
+import json
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from PIL import Image, ImageDraw
+# numpy は requirements の必須依存なので、画素判定の最後の経路は numpy のベクトル演算とし
+# tobytes() を1画素ずつ読む pure Python の経路は持たない（同じ判定で桁違いに遅い）
+import numpy as np
+import PIL
+from PIL import Image
 
+# 画素判定のJIT化（オプション、無ければ numpy のベクトル演算）
+try:
+    from numba import njit, types
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
-def detect_green_pixels(img: Image.Image, threshold: dict = None) -> list:
-    """緑っぽいピクセルを検出して座標リストを返す"""
+# Pillow-SIMD は同じ PIL パッケージを置き換えて入るので、バージョンの ".postN" で見分ける
+# （置き換わるだけで呼び出し側の分岐は要らない。合成やPNGの変換処理が速くなる）
+PILLOW_SIMD = ".post" in PIL.__version__
+
+# 緑判定の既定閾値
+DEFAULT_THRESHOLD = {
+    "green_min": 150,      # G成分の最小値
+    "green_gap": 30,       # G - max(R, B) の最小差
+    "bright_green_min": 200,
+    "bright_green_gap": 100,
+}
+
+# マーキングの枠（(半径, 色)。判定画素を中心とする 2*半径+1 四方の正方形の外周を塗る）
+GREEN_MARK = (1, (255, 255, 0, 255))   # 緑っぽい: 黄色の3x3枠
+BRIGHT_MARK = (2, (255, 0, 0, 255))    # 明らかな緑: 赤の5x5枠
+
+# 確認用の出力PNGは圧縮率より保存速度を優先（zlib の既定 6 → 1）
+PNG_COMPRESS_LEVEL = 1
+
+
+def detect_green_pixels(img: Image.Image, threshold: dict = None) -> tuple:
+    """緑っぽいピクセルを検出して (緑っぽいマスク, 明らかな緑マスク, 画素配列) を返す
+
+    img は RGBA。マスクは H×W の bool 配列で、画素ごとの座標リストは作らない。
+    """
     if threshold is None:
-        threshold = {
-            "green_min": 150,      # G成分の最小値
-            "green_gap": 30,       # G - max(R, B) の最小差
-            "bright_green_min": 200,
-            "bright_green_gap": 100,
-        }
+        threshold = DEFAULT_THRESHOLD
+    # 閾値は1回だけ取り出してローカルに置く
+    green_min, green_gap = int(threshold["green_min"]), int(threshold["green_gap"])
+    bright_min, bright_gap = int(threshold["bright_green_min"]), int(threshold["bright_green_gap"])
+
+    arr = np.asarray(img)
+    green_mask = np.zeros(arr.shape[:2], dtype=np.bool_)
+    bright_mask = np.zeros_like(green_mask)
+
+    # 透明な画素は判定対象外なので、不透明部分の外接矩形の中だけを調べる
+    bbox = _alpha_bbox(img)
+    if bbox is None:
+        return green_mask, bright_mask, arr
+    x0, y0, x1, y1 = bbox
+    sub = arr[y0:y1, x0:x1]
+
+    if NUMBA_AVAILABLE:
+        _classify_green_jit(
+            sub, green_min, green_gap, bright_min, bright_gap,
+            green_mask[y0:y1, x0:x1], bright_mask[y0:y1, x0:x1],
+        )
+        return green_mask, bright_mask, arr
+
+    # numba が無ければ H×W×4 の配列に対するマスク演算で判定する。
+    # G - max(R, B) は int16 に広げず、正負それぞれを0で切った uint8 の差で比べる
+    # （同じ判定を PIL の ImageChops.lighter/subtract と point のLUTで組むと約2.5倍遅い）
+    # 中間配列は out= で使い回し、結果もマスクの切り出しへ直接書く。main はスレッドで
+    # 並列に呼ぶので、呼び出しをまたいでモジュールで共有するバッファは持たない
+    visible = sub[..., 3] != 0
+    g = sub[..., 1]
+    mrb = np.maximum(sub[..., 0], sub[..., 2])
+    lo = np.minimum(g, mrb)
+    gap_neg = np.subtract(mrb, lo, out=mrb) if min(green_gap, bright_gap) <= 0 else None
+    gap_pos = np.subtract(g, lo, out=lo)  # max(G - max(R, B), 0)
+    scratch = np.empty_like(visible)
+
+    # g と gap は2つの判定で共有し、閾値との比較だけを2回行う。明らかな緑を緑っぽい画素
+    # だけで比べ直す形にすると np.nonzero と添字での取り出しの方が高くつく
+    for out, g_min, gap_min in (
+        (green_mask[y0:y1, x0:x1], green_min, green_gap),     # 緑っぽい
+        (bright_mask[y0:y1, x0:x1], bright_min, bright_gap),  # 明らかな緑（背景緑に近い）
+    ):
+        np.greater_equal(g, g_min, out=out)
+        out &= visible
+        out &= _gap_mask(gap_pos, gap_neg, gap_min, out=scratch)
+
+    return green_mask, bright_mask, arr
+
+
+def _alpha_bbox(img: Image.Image) -> tuple | None:
+    """アルファが0でない画素の外接矩形 (x0, y0, x1, y1)。全面透明なら None"""
+    return img.getchannel("A").getbbox()
+
+
+# main は画像ごとにスレッドで並列化するので、カーネルは並列化せず GIL を外して走らせる
+# （parallel=True を複数スレッドから呼ぶと numba の workqueue スレッド層は異常終了する）。
+# 外接矩形の切り出しは非連続になるので、任意レイアウト（A）の配列を受ける型を1つだけ
+# 明示してインポート時にコンパイル（2回目以降の実行は cache のディスクから読むだけ）する。
+# np.asarray(PIL画像) は読み取り専用配列になる
+if NUMBA_AVAILABLE:
+    _CLASSIFY_GREEN_SIGNATURE = types.void(
+        types.Array(types.uint8, 3, "A", readonly=True),
+        types.int64, types.int64, types.int64, types.int64,
+        types.Array(types.boolean, 2, "A"), types.Array(types.boolean, 2, "A"),
+    )
 
-    pixels = img.load()
-    w, h = img.size
+    @njit(_CLASSIFY_GREEN_SIGNATURE, cache=True, nogil=True)
+    def _classify_green_jit(arr, green_min, green_gap, bright_min, bright_gap, out_green, out_bright):
+        h, w = arr.shape[0], arr.shape[1]
+        for y in range(h):
+            for x in range(w):
+                g = np.int64(arr[y, x, 1])
+                gap = g - max(np.int64(arr[y, x, 0]), np.int64(arr[y, x, 2]))
+                visible = arr[y, x, 3] != 0
+                out_green[y, x] = visible and g >= green_min and gap >= green_gap
+                out_bright[y, x] = visible and g >= bright_min and gap >= bright_gap
 
-    green_coords = []
-    bright_green_coords = []
 
-    for y in range(h):
-        for x in range(w):
-            r, g, b, a = pixels[x, y]
-            if a == 0:
-                continue
+def _gap_mask(gap_pos: np.ndarray, gap_neg: np.ndarray | None, gap_min: int,
+              out: np.ndarray = None) -> np.ndarray:
+    """G - max(R, B) >= gap_min を判定（gap_pos / gap_neg は差の正側・負側を0で切った uint8）"""
+    if gap_min > 0:
+        return np.greater_equal(gap_pos, gap_min, out=out)
+    # 0以下の閾値は負側の差が -gap_min 以内なら満たす（G >= max(R, B) なら gap_neg は0）
+    return np.less_equal(gap_neg, -gap_min, out=out)
 
-            # 緑っぽい
-            if g >= threshold["green_min"] and (g - max(r, b)) >= threshold["green_gap"]:
-                green_coords.append((x, y, r, g, b, a))
 
-            # 明らかな緑（背景緑に近い）
-            if g >= threshold["bright_green_min"] and (g - max(r, b)) >= threshold["bright_green_gap"]:
-                bright_green_coords.append((x, y, r, g, b, a))
+def _mask_samples(arr: np.ndarray, mask: np.ndarray, n: int = 5) -> list:
+    """マスクが立っている先頭 n 画素の (x, y, r, g, b, a) を行優先の順で返す
 
-    return green_coords, bright_green_coords
+    全画素の座標配列は作らず、判定画素のある行を先頭から見て n 個集まったら止める。
+    """
+    samples = []
+    for y in np.flatnonzero(mask.any(axis=1)).tolist():
+        for x in np.flatnonzero(mask[y])[:n - len(samples)].tolist():
+            samples.append((x, y, *arr[y, x].tolist()))
+        if len(samples) >= n:
+            break
+    return samples
+
+
+def _or_shifted(out: np.ndarray, src: np.ndarray, dy: int, dx: int) -> None:
+    """out[y + dy, x + dx] |= src[y, x] を、ずらしたスライス（ビュー）同士の OR で行う（画像外は切り捨て）"""
+    h, w = src.shape
+    if abs(dy) >= h or abs(dx) >= w:
+        return  # 全部はみ出す（負の終端が末尾からの添字に化けないよう先に抜ける）
+    out[max(dy, 0):h + min(dy, 0), max(dx, 0):w + min(dx, 0)] |= \
+        src[max(-dy, 0):h + min(-dy, 0), max(-dx, 0):w + min(-dx, 0)]
+
+
+def _outline_mask(mask: np.ndarray, radius: int) -> np.ndarray:
+    """マスクの各画素を中心とする (2*radius+1) 四方の正方形の外周を塗ったマスク（画像外は切り捨て）"""
+    # 外周の上下の辺は横方向に ±radius 膨らませたマスクを縦に ±radius ずらしたもの、
+    # 左右の辺は縦方向に膨らませたマスクを横にずらしたもの。外周の 8*radius 点を
+    # 1点ずつずらして OR するより、1次元の膨張を挟む方が OR の回数が少ない
+    h_dilated = mask.copy()
+    v_dilated = mask.copy()
+    for d in range(1, radius + 1):
+        for s in (d, -d):
+            _or_shifted(h_dilated, mask, 0, s)
+            _or_shifted(v_dilated, mask, s, 0)
+    out = np.zeros_like(mask)
+    for s in (radius, -radius):
+        _or_shifted(out, h_dilated, s, 0)
+        _or_shifted(out, v_dilated, 0, s)
+    return out
 
 
 def visualize_green(img_path: str, output_path: str = None):
     """緑残りを赤でマーキングした画像を出力"""
-    img = Image.open(img_path).convert("RGBA")
-    green_coords, bright_green_coords = detect_green_pixels(img)
+    # 既にRGBAならコピーを作らない。デコードはここで済ませてファイルも閉じる
+    img = Image.open(img_path)
+    img.load()
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    green_mask, bright_mask, arr = detect_green_pixels(img)
+    green_count = int(np.count_nonzero(green_mask))
+    bright_green_count = int(np.count_nonzero(bright_mask))
 
-    if not green_coords and not bright_green_coords:
+    if not green_count and not bright_green_count:
         print(f"  No green pixels detected")
         return None
 
-    # マーキング用の画像を作成
-    marked = img.copy()
-    draw = ImageDraw.Draw(marked)
-
-    # 緑っぽいピクセルを黄色でマーク
-    for x, y, r, g, b, a in green_coords:
-        draw.rectangle([x-1, y-1, x+1, y+1], outline=(255, 255, 0, 255))
-
-    # 明らかな緑を赤でマーク
-    for x, y, r, g, b, a in bright_green_coords:
-        draw.rectangle([x-2, y-2, x+2, y+2], outline=(255, 0, 0, 255))
-
     if output_path:
-        marked.save(output_path, "PNG")
+        _save_marked(img, arr, green_mask, bright_mask, output_path)
 
     return {
-        "green_count": len(green_coords),
-        "bright_green_count": len(bright_green_coords),
-        "green_samples": green_coords[:5],
-        "bright_green_samples": bright_green_coords[:5],
+        "green_count": green_count,
+        "bright_green_count": bright_green_count,
+        "green_samples": _mask_samples(arr, green_mask),
+        "bright_green_samples": _mask_samples(arr, bright_mask),
     }
 
 
-def main():
-    output_dir = Path(r"F:\projects\linestamp\output\kimikimi_home_20250203")
+def _save_marked(img: Image.Image, arr: np.ndarray, green_mask: np.ndarray, bright_mask: np.ndarray,
+                 output_path: str) -> None:
+    """判定画素を枠で囲んだ確認用画像を保存"""
+    # マーキングは画素ごとに描かず、枠のマスクで元画像のコピーへ色を直接書き込む
+    # （明らかな緑の赤枠を後に塗り、重なりは赤が勝つ）。枠の色は不透明なので
+    # alpha_composite で全画素を合成し直した結果と同じになる。判定画素は不透明部分の
+    # 外接矩形内にあるので、枠が届く範囲（外接矩形を最大半径ぶん広げた窓）だけを計算する
+    h, w = green_mask.shape
+    pad = max(GREEN_MARK[0], BRIGHT_MARK[0])
+    x0, y0, x1, y1 = _alpha_bbox(img)
+    window = np.s_[max(y0 - pad, 0):min(y1 + pad, h), max(x0 - pad, 0):min(x1 + pad, w)]
+    marked = arr.copy()
+    for mask, (radius, color) in ((green_mask, GREEN_MARK), (bright_mask, BRIGHT_MARK)):
+        marked[window][_outline_mask(mask[window], radius)] = color
+    Image.fromarray(marked, "RGBA").save(output_path, "PNG", compress_level=PNG_COMPRESS_LEVEL)
+
+
+# --dir を省略したときに調べるスタンプ出力フォルダ
+DEFAULT_STAMP_DIR = Path(r"F:\projects\linestamp\output\kimikimi_home_20250203")
+
+# 画像の読み込み・判定・PNG保存を重ねるスレッド数（PIL のデコード/エンコードと numpy は GIL を外す）
+MAX_WORKERS = 8
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="緑残りピクセルの検出とマーキング画像の出力")
+    parser.add_argument("--dir", type=Path, default=DEFAULT_STAMP_DIR,
+                        help=f"スタンプ画像のフォルダ（既定: {DEFAULT_STAMP_DIR}）")
+    parser.add_argument("--pattern", default="??.png",
+                        help="対象ファイルの glob パターン（既定: ??.png）")
+    parser.add_argument("--indices", type=int, nargs="+",
+                        help="調べるスタンプ番号（例: --indices 3 12）。省略時はパターンに合う全件")
+    parser.add_argument("--force", action="store_true",
+                        help="前回の検出結果が元画像より新しくても再検出・再出力")
+    args = parser.parse_args(argv)
+
+    output_dir = args.dir
     debug_dir = output_dir / "debug_green"
     debug_dir.mkdir(exist_ok=True)
 
+    # 番号を決め打ちで回さず、実在するファイルだけを番号順に処理する
+    img_paths = sorted(output_dir.glob(args.pattern))
+    if args.indices is not None:
+        wanted = set(args.indices)
+        img_paths = [p for p in img_paths if p.stem.isdigit() and int(p.stem) in wanted]
+
     print("=" * 70)
     print("Green Pixel Detection - Detailed Analysis")
     print("=" * 70)
+    print(f"Backend: {'Pillow-SIMD' if PILLOW_SIMD else 'Pillow'} {PIL.__version__}, "
+          f"classifier: {'numba' if NUMBA_AVAILABLE else 'numpy'}")
 
     total_green = 0
     total_bright = 0
     problem_stamps = []
+    cached_stamps = []
 
-    for i in range(1, 25):
-        img_path = output_dir / f"{i:02d}.png"
-        if not img_path.exists():
-            continue
-
-        output_path = debug_dir / f"{i:02d}_green_marked.png"
+    def process_one(img_path: Path) -> tuple:
+        """(元画像, 検出結果, 前回の結果を使ったか) を返す"""
+        output_path = debug_dir / f"{img_path.stem}_green_marked.png"
+        # 検出結果（緑が無ければ null）はマーキング画像の隣に JSON で残し、元画像より
+        # 新しければ読み込み・判定を省いて前回の結果を集計に使う
+        result_path = output_path.with_suffix(".json")
+        if (not args.force and result_path.exists()
+                and result_path.stat().st_mtime >= img_path.stat().st_mtime):
+            return img_path, json.loads(result_path.read_text(encoding="utf-8")), True
         result = visualize_green(str(img_path), str(output_path))
+        result_path.write_text(json.dumps(result), encoding="utf-8")
+        return img_path, result, False
+
+    # map は入力順に結果を返すので、集計と表示は番号順のまま
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        results = list(ex.map(process_one, img_paths))
 
+    for img_path, result, cached in results:
+        i = int(img_path.stem) if img_path.stem.isdigit() else img_path.stem
+        if cached:
+            cached_stamps.append(i)
         if result:
             total_green += result["green_count"]
             total_bright += result["bright_green_count"]
 
             if result["green_count"] > 0 or result["bright_green_count"] > 0:
                 problem_stamps.append(i)
-                print(f"\n[{i:02d}.png]")
+                print(f"\n[{img_path.name}]{' (cached)' if cached else ''}")
                 print(f"  Green pixels: {result['green_count']}")
                 print(f"  Bright green: {result['bright_green_count']}")
                 if result["green_samples"]:
@@ -112,6 +297,8 @@ def main():
     print(f"Total green pixels: {total_green}")
     print(f"Total bright green: {total_bright}")
     print(f"Problem stamps: {problem_stamps}")
+    if cached_stamps:
+        print(f"From previous run (source unchanged, use --force to recheck): {cached_stamps}")
     print(f"\nDebug images saved to: {debug_dir}")
 
 